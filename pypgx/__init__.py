@@ -1,3 +1,5 @@
+import importlib
+
 from .api.core import (
     build_definition_table,
     collapse_alleles,
@@ -6,6 +8,7 @@ from .api.core import (
     has_sv,
     is_legit_allele,
     is_target_gene,
+    get_allele_definitions,
     get_default_allele,
     get_exon_ends,
     get_exon_starts,
@@ -13,11 +16,13 @@ from .api.core import (
     get_paralog,
     get_priority,
     get_recommendation,
+    get_recommendations,
     get_ref_allele,
     get_region,
     get_score,
     get_strand,
     get_variant_impact,
+    get_variant_index,
     get_variant_synonyms,
     list_alleles,
     list_functions,
@@ -35,52 +40,70 @@ from .api.core import (
     load_variant_table,
     predict_phenotype,
     predict_score,
+    predict_scores,
     sort_alleles,
 )
 
-from .api.utils import (
-    call_phenotypes,
-    combine_results,
-    compute_control_statistics,
-    compare_genotypes,
-    compute_copy_number,
-    compute_target_depth,
-    count_alleles,
-    create_consolidated_vcf,
-    create_input_vcf,
-    create_regions_bed,
-    estimate_phase_beagle,
-    filter_samples,
-    import_read_depth,
-    import_variants,
-    predict_alleles,
-    predict_cnv,
-    prepare_depth_of_coverage,
-    print_data,
-    print_metadata,
-    slice_bam,
-    test_cnv_caller,
-    train_cnv_caller,
-)
-
-from .api.plot import (
-    plot_bam_copy_number,
-    plot_bam_read_depth,
-    plot_cn_af,
-    plot_vcf_allele_fraction,
-    plot_vcf_read_depth,
-)
-
 from .api.genotype import (
     call_genotypes,
 )
 
-from .api.pipeline import (
-    run_chip_pipeline,
-    run_long_read_pipeline,
-    run_ngs_pipeline,
-)
-
 from .sdk import (
     Archive,
 )
+
+# Methods from submodules with heavy dependencies (e.g. pysam, scikit-learn,
+# and matplotlib) are imported on first access so that ``import pypgx``
+# stays fast for table lookups.
+_LAZY_METHODS = {
+    'api.utils': [
+        'call_phenotypes',
+        'combine_results',
+        'compute_control_statistics',
+        'compare_genotypes',
+        'compute_copy_number',
+        'compute_target_depth',
+        'count_alleles',
+        'create_consolidated_vcf',
+        'create_input_vcf',
+        'create_regions_bed',
+        'estimate_phase_beagle',
+        'filter_samples',
+        'import_read_depth',
+        'import_variants',
+        'predict_alleles',
+        'predict_cnv',
+        'prepare_depth_of_coverage',
+        'prepare_sv_inputs',
+        'print_data',
+        'print_metadata',
+        'slice_bam',
+        'test_cnv_caller',
+        'train_cnv_caller',
+    ],
+    'api.plot': [
+        'plot_bam_copy_number',
+        'plot_bam_read_depth',
+        'plot_cn_af',
+        'plot_vcf_allele_fraction',
+        'plot_vcf_read_depth',
+    ],
+    'api.pipeline': [
+        'run_chip_pipeline',
+        'run_long_read_pipeline',
+        'run_ngs_pipeline',
+    ],
+}
+
+_LAZY_MODULES = {x: k for k, v in _LAZY_METHODS.items() for x in v}
+
+def __getattr__(name):
+    if name not in _LAZY_MODULES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    module = importlib.import_module(f'.{_LAZY_MODULES[name]}', __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES))
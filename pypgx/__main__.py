@@ -1,7 +1,13 @@
 import argparse
+import sys
 
 from .version import __version__
-from .cli import commands
+from .cli import MANIFEST, commands
+
+# Top-level options that set the compression of output archives. Commands
+# pass them to Archive.to_file explicitly.
+COMPRESSION_OPTIONS = ('compression', 'compression_level',
+    'compression_threads')
 
 def main():
     parser = argparse.ArgumentParser(
@@ -22,14 +28,59 @@ def main():
         version=f'%(prog)s {__version__}',
         help='Show the version number and exit.'
     )
+    parser.add_argument(
+        '--compression',
+        metavar='TEXT',
+        help=
+"""Compression codec of output archives (default:
+'deflate') (choices: 'deflate', 'stored', 'bzip2',
+'lzma', 'zstd'). 'zstd' requires Python 3.14+."""
+    )
+    parser.add_argument(
+        '--compression-level',
+        metavar='INT',
+        type=int,
+        help=
+"""Compression level of output archives (e.g. 1 for
+fast deflate) (default: codec default). Must be
+between -1 and 9 for 'deflate' and between 1 and 9
+for 'bzip2'; ignored for 'stored' and 'lzma'."""
+    )
+    parser.add_argument(
+        '--compression-threads',
+        metavar='INT',
+        type=int,
+        help=
+"""Number of threads used to deflate output archives
+(default: 1)."""
+    )
     subparsers = parser.add_subparsers(
         dest='command',
         metavar='COMMAND',
         required=True,
     )
-    for name, command in commands.items():
-        command.create_parser(subparsers)
+    # Only the module of the requested command is imported; the other
+    # commands are listed with their help message from the manifest. Values
+    # of the top-level options are skipped when finding the command.
+    options = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    for dest in COMPRESSION_OPTIONS:
+        options.add_argument('--' + dest.replace('_', '-'))
+    _, remaining = options.parse_known_args()
+    names = [x for x in remaining if not x.startswith('-')]
+    requested = names[0] if names else None
+    for name, help, module in MANIFEST:
+        if name == requested:
+            commands[name].create_parser(subparsers)
+        else:
+            subparsers.add_parser(name, help=help, add_help=False)
     args = parser.parse_args()
+    # Incorrect compression settings are reported before the command runs.
+    from .sdk.utils import _get_compression
+    try:
+        _get_compression(args.compression, args.compression_level,
+            args.compression_threads)
+    except ValueError as e:
+        parser.error(str(e))
     commands[args.command].main(args)
 
 if __name__ == '__main__':
@@ -0,0 +1,13 @@
+import importlib
+
+# Submodules are imported on first access because some of them depend on
+# heavy packages (e.g. pysam, scikit-learn, and matplotlib).
+_SUBMODULES = ['core', 'genotype', 'pipeline', 'plot', 'utils']
+
+def __getattr__(name):
+    if name not in _SUBMODULES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    return importlib.import_module(f'.{name}', __name__)
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
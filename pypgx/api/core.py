@@ -2,16 +2,18 @@
 The core submodule is the main suite of tools for PGx research.
 """
 
-import pkgutil
 import pathlib
-from io import BytesIO
+from types import MappingProxyType
+import collections
+import functools
+import threading
 import warnings
 
 from .. import sdk
+from .data import read_index
 
 import numpy as np
 import pandas as pd
-from fuc import pyvcf, common
 
 LINK_GENES = 'https://pypgx.readthedocs.io/en/latest/genes.html'
 PROGRAM_PATH = pathlib.Path(__file__).parent.parent.parent.absolute()
@@ -35,6 +37,678 @@ FUNCTION_ORDER = [
     'Class IV (Normal)',
 ]
 
+ASSEMBLIES = ['GRCh37', 'GRCh38']
+
+###################
+# Private methods #
+###################
+
+_KNOWLEDGE_BASE = None
+_KNOWLEDGE_BASE_LOCK = threading.Lock()
+
+def _trim_variant(variant):
+    """
+    Return the minimal representation of a 'chrom-pos-ref-alt' variant by
+    removing the 'chr' prefix and trimming bases shared by REF and ALT.
+    """
+    chrom, pos, ref, alt = variant.split('-')
+    if chrom.startswith('chr'):
+        chrom = chrom[3:]
+    pos = int(pos)
+    while len(ref) > 1 and len(alt) > 1 and ref[-1] == alt[-1]:
+        ref, alt = ref[:-1], alt[:-1]
+    while len(ref) > 1 and len(alt) > 1 and ref[0] == alt[0]:
+        ref, alt, pos = ref[1:], alt[1:], pos + 1
+    return f'{chrom}-{pos}-{ref}-{alt}'
+
+@functools.lru_cache(maxsize=4096)
+def _parse_sv_allele(allele):
+    """
+    Parse a haplotype call with structural variation (e.g. '*1x2+*4x2+*10')
+    into a tuple of (base allele, multiplier) pairs.
+    """
+    results = []
+    for x in allele.split('+'):
+        if 'x' in x:
+            l = x.split('x')
+            results.append((l[0], int(l[1])))
+        else:
+            results.append((x, 1))
+    return tuple(results)
+
+class _KnowledgeBase:
+    """
+    Read-only, indexed view of the data tables bundled with PyPGx.
+
+    The object is built once per process by :func:`_get_knowledge_base` and
+    shared by every method in this submodule. Records are looked up through
+    dictionaries keyed by gene, (gene, allele) or variant name instead of
+    filtering the tables with boolean masks. All indexes are exposed as
+    read-only mappings of tuples and named tuples, so the object can be safely
+    shared between threads.
+
+    The indexes are built by :func:`api.data.build_index`, usually when
+    PyPGx is built, so that only the records of the gene, allele, and
+    variant tables are turned into named tuples here.
+
+    Parameters
+    ----------
+    index : dict
+        Index of the tables.
+    tables : collections.abc.Mapping
+        Mapping of table name to pandas.DataFrame.
+    """
+
+    def __init__(self, index, tables):
+        self.tables = MappingProxyType(tables)
+
+        records = {}
+        for name, (fields, rows) in index['Records'].items():
+            cls = collections.namedtuple('Pandas', fields, rename=True)
+            records[name] = [cls._make(x) for x in rows]
+
+        def lookup(name, table):
+            return MappingProxyType(
+                {k: records[table][v] for k, v in index[name].items()})
+
+        self.genes = lookup('genes', 'gene')
+        self.gene_lists = MappingProxyType(index['gene_lists'])
+        self.target_genes = frozenset(self.gene_lists['target'])
+
+        self.alleles = MappingProxyType(index['alleles'])
+        self.allele_records = lookup('allele_records', 'allele')
+        self.allele_variants = MappingProxyType(index['allele_variants'])
+        self.functions = MappingProxyType(index['functions'])
+
+        self.variants = lookup('variants', 'variant')
+        self.variant_records = lookup('variant_records', 'variant')
+        self.synonyms = MappingProxyType(
+            {k: MappingProxyType(v) for k, v in index['synonyms'].items()})
+
+        self.phenotypes = MappingProxyType(index['phenotypes'])
+        self.priorities = MappingProxyType(index['priorities'])
+
+    def __setattr__(self, name, value):
+        if name in self.__dict__:
+            raise AttributeError(f'{type(self).__name__} is read-only')
+        super().__setattr__(name, value)
+
+    def get_gene(self, gene):
+        """Return the gene table record, raising GeneNotFoundError."""
+        try:
+            return self.genes[gene]
+        except KeyError:
+            raise sdk.utils.GeneNotFoundError(gene)
+
+    def get_allele(self, gene, allele):
+        """Return the allele table record, raising AlleleNotFoundError."""
+        try:
+            return self.allele_records[(gene, allele)]
+        except KeyError:
+            raise sdk.utils.AlleleNotFoundError(gene, allele)
+
+def _get_knowledge_base():
+    """
+    Return the process-wide knowledge base, building it on first use.
+    """
+    global _KNOWLEDGE_BASE
+    if _KNOWLEDGE_BASE is None:
+        with _KNOWLEDGE_BASE_LOCK:
+            if _KNOWLEDGE_BASE is None:
+                _KNOWLEDGE_BASE = _KnowledgeBase(*read_index())
+    return _KNOWLEDGE_BASE
+
+def _parse_equation(equation):
+    """
+    Parse a phenotype equation (e.g. '0.25 <= score < 1.25') into a numeric
+    interval (lower, lower_inclusive, upper, upper_inclusive).
+    """
+    left, sep, right = equation.partition('score')
+    left, right = left.split(), right.split()
+    if not sep or len(left) not in [0, 2] or len(right) not in [0, 2]:
+        raise ValueError(f'Unsupported phenotype equation: {equation}')
+    lower, lower_inclusive = -np.inf, False
+    upper, upper_inclusive = np.inf, False
+    if left:
+        value, op = float(left[0]), left[1]
+        if op == '==':
+            return (value, True, value, True)
+        elif op in ['<', '<=']:
+            lower, lower_inclusive = value, op == '<='
+        else:
+            raise ValueError(f'Unsupported phenotype equation: {equation}')
+    if right:
+        op, value = right[0], float(right[1])
+        if op == '==' and not left:
+            return (value, True, value, True)
+        elif op in ['<', '<=']:
+            upper, upper_inclusive = value, op == '<='
+        else:
+            raise ValueError(f'Unsupported phenotype equation: {equation}')
+    return (lower, lower_inclusive, upper, upper_inclusive)
+
+class _PhenotypeResolver:
+    """
+    Compiled phenotype lookup for target gene.
+
+    Genes using the 'Diplotype' method are resolved with a dictionary keyed
+    by the unordered pair of star alleles, and genes using the 'Score' method
+    are resolved by comparing the activity score against numeric intervals
+    parsed from the equation table once.
+    """
+
+    def __init__(self, gene):
+        kb = _get_knowledge_base()
+        self.gene = gene
+        self.method = kb.genes[gene].PhenotypeMethod
+        self.diplotypes = {}
+        self.intervals = None
+        self.phenotypes = ()
+
+        if self.method == 'Score':
+            df = kb.tables['equation']
+            df = df[df.Gene == gene]
+            self.phenotypes = tuple(df.Phenotype)
+            bounds = [_parse_equation(x) for x in df.Equation]
+            self.intervals = tuple(np.array(x) for x in zip(*bounds))
+        elif self.method == 'Diplotype':
+            df = kb.tables['diplotype']
+            df = df[df.Gene == gene]
+            for diplotype, phenotype in zip(df.Diplotype, df.Phenotype):
+                key = tuple(sorted(diplotype.split('/')))
+                self.diplotypes.setdefault(key, phenotype)
+
+    def _resolve_scores(self, scores):
+        scores = np.asarray(scores, dtype=float)[:, np.newaxis]
+        lower, lower_inclusive, upper, upper_inclusive = self.intervals
+        matched = (
+            np.where(lower_inclusive, scores >= lower, scores > lower) &
+            np.where(upper_inclusive, scores <= upper, scores < upper)
+        )
+        results = []
+        for score, row in zip(scores[:, 0], matched):
+            if np.isnan(score):
+                results.append('Indeterminate')
+            elif not row.any():
+                raise IndexError(
+                    f'No phenotype defined for {self.gene} score {score}')
+            else:
+                results.append(self.phenotypes[row.argmax()])
+        return results
+
+    def resolve(self, a, b):
+        """Return the phenotype for the two haplotype calls."""
+        return self.resolve_many([(a, b)])[0]
+
+    def resolve_many(self, diplotypes):
+        """Return the phenotypes for a list of (a, b) haplotype calls."""
+        if self.method == 'Score':
+            if not diplotypes:
+                return []
+            a, b = zip(*[(x, y) for x, y in diplotypes])
+            scores = (predict_scores(self.gene, a) +
+                predict_scores(self.gene, b))
+            return self._resolve_scores(scores)
+        elif self.method == 'Diplotype':
+            results = []
+            for a, b in diplotypes:
+                if not is_legit_allele(self.gene, a):
+                    warnings.warn(f"{a} not found in the allele table for {self.gene}")
+                if not is_legit_allele(self.gene, b):
+                    warnings.warn(f"{b} not found in the allele table for {self.gene}")
+                key = (a, b) if a <= b else (b, a)
+                results.append(self.diplotypes.get(key, 'Indeterminate'))
+            return results
+        return ['Indeterminate' for x in diplotypes]
+
+@functools.lru_cache(maxsize=None)
+def _get_phenotype_resolver(gene):
+    """
+    Return the cached phenotype resolver for target gene.
+    """
+    if not is_target_gene(gene):
+        raise sdk.utils.NotTargetGeneError(gene)
+    return _PhenotypeResolver(gene)
+
+_RECOMMENDATION_KEYS = ['Drug', 'Gene1', 'Phenotype1', 'Gene2', 'Phenotype2']
+
+class _RecommendationIndex:
+    """
+    Keyed view of the recommendation table.
+
+    Every row is indexed by (drug, gene1, phenotype1, gene2, phenotype2).
+    For drugs determined by two genes, the table is extended with one row
+    per (drug, gene, phenotype) whose second gene and phenotype are 'None',
+    holding the first matching recommendation; this is what
+    :meth:`get_recommendation` returns when only one phenotype is given.
+    """
+
+    def __init__(self):
+        df = _get_knowledge_base().tables['recommendation']
+        self.drugs = {}
+        for drug, gene1, gene2 in zip(df.Drug, df.Gene1, df.Gene2):
+            self.drugs.setdefault(drug, (gene1, gene2))
+
+        multiple = df[df.Gene2 != 'None']
+        first = multiple.drop_duplicates(['Drug', 'Gene1', 'Phenotype1'])
+        second = multiple.drop_duplicates(['Drug', 'Gene2', 'Phenotype2'])
+        second = second.rename(columns={'Gene2': 'Gene1',
+            'Phenotype2': 'Phenotype1', 'Gene1': 'Gene2',
+            'Phenotype1': 'Phenotype2'})
+        single = pd.concat([first, second])
+        single['Gene2'] = 'None'
+        single['Phenotype2'] = 'None'
+
+        columns = _RECOMMENDATION_KEYS + ['Recommendation']
+        table = pd.concat([df[columns], single[columns]])
+        table = table.drop_duplicates(_RECOMMENDATION_KEYS)
+        self.table = table.reset_index(drop=True)
+        keys = zip(*[self.table[x] for x in _RECOMMENDATION_KEYS])
+        self.lookup = dict(zip(keys, self.table.Recommendation))
+
+    def get(self, key):
+        """Return the recommendation for key, raising IndexError."""
+        try:
+            return self.lookup[key]
+        except KeyError:
+            raise IndexError(f'Recommendation not found: {key}')
+
+@functools.lru_cache(maxsize=None)
+def _get_recommendation_index():
+    """
+    Return the cached recommendation index.
+    """
+    return _RecommendationIndex()
+
+##################
+# Public methods #
+##################
+
+class AlleleDefinitions:
+    """
+    Compiled star allele definitions for target gene.
+
+    The object stores which variants define each star allele as boolean
+    NumPy matrices (alleles by variants), so that allele matching,
+    collapsing, and sorting can be done with array operations instead of
+    repeated table lookups. Use :meth:`get_allele_definitions` to obtain a
+    cached instance rather than building one directly.
+
+    Parameters
+    ----------
+    gene : str
+        Target gene.
+    assembly : {'GRCh37', 'GRCh38'}, default: 'GRCh37'
+        Reference genome assembly.
+
+    Attributes
+    ----------
+    alleles : tuple
+        Star alleles in the order of the allele table.
+    variants : tuple
+        Coordinate sorted list of all core and tag variants.
+    allele_index : dict
+        Mapping of star allele to row index.
+    variant_index : dict
+        Mapping of variant to column index.
+    core, tag : numpy.ndarray
+        Boolean matrices indicating core and tag variants of each allele.
+    subsets : numpy.ndarray
+        Boolean allele-by-allele matrix where element (i, j) is True if core
+        variants of allele i are a subset of those of allele j (i != j).
+        Each row therefore lists the alleles that would collapse allele i.
+    definable : numpy.ndarray
+        Boolean mask of star alleles that are defined by SNVs and/or indels
+        (i.e. the star alleles in :meth:`build_definition_table`).
+    functions : numpy.ndarray
+        Index of each allele's function in ``FUNCTION_ORDER``, or -1 if the
+        function is not ranked.
+    priorities : dict
+        Mapping of star allele to its sort key used by
+        :meth:`sort_alleles` when ``by='priority'``.
+    """
+
+    def __init__(self, gene, assembly='GRCh37'):
+        from fuc import common
+
+        if not is_target_gene(gene):
+            raise sdk.utils.NotTargetGeneError(gene)
+
+        kb = _get_knowledge_base()
+
+        self.gene = gene
+        self.assembly = assembly
+        self.alleles = tuple(dict.fromkeys(kb.alleles[gene]))
+        self.allele_index = {x: i for i, x in enumerate(self.alleles)}
+
+        definitions = [kb.allele_variants[(gene, x, assembly)]
+            for x in self.alleles]
+        variants = set()
+        for c, t in definitions:
+            variants.update(c + t)
+        self.variants = tuple(common.sort_variants(variants))
+        self.variant_index = {x: i for i, x in enumerate(self.variants)}
+
+        shape = (len(self.alleles), len(self.variants))
+        self.core = np.zeros(shape, dtype=bool)
+        self.tag = np.zeros(shape, dtype=bool)
+        for i, (c, t) in enumerate(definitions):
+            self.core[i, [self.variant_index[x] for x in c]] = True
+            self.tag[i, [self.variant_index[x] for x in t]] = True
+
+        counts = self.core.astype(int)
+        shared = counts @ counts.T
+        self.subsets = shared == counts.sum(axis=1)[:, np.newaxis]
+        np.fill_diagonal(self.subsets, False)
+
+        records = [kb.allele_records[(gene, x)] for x in self.alleles]
+        self.definable = np.array(
+            [not r.SV for r in records], dtype=bool) & self.core.any(axis=1)
+        self.functions = np.array([FUNCTION_ORDER.index(r.Function)
+            if r.Function in FUNCTION_ORDER else -1 for r in records],
+            dtype=int)
+
+        self.priorities = {}
+        for allele in self.alleles:
+            try:
+                self.priorities[allele] = self._priority_key(allele)
+            except (ValueError, sdk.utils.VariantNotFoundError):
+                pass
+
+        for x in [self.core, self.tag, self.subsets, self.definable,
+            self.functions]:
+            x.flags.writeable = False
+
+    def _priority_key(self, allele):
+        function = get_function(self.gene, allele)
+        a = FUNCTION_ORDER.index(function)
+        core_variants = self.list_variants(allele, mode='core')
+        b = len(core_variants) * -1
+        impacts = [get_variant_impact(x) for x in core_variants]
+        impacts = [x for x in impacts if x]
+        c = len(impacts) * -1
+        d = allele == get_ref_allele(self.gene)
+        return (a, b, c, d)
+
+    def index(self, allele):
+        """
+        Return the row index of specified star allele.
+
+        Raises AlleleNotFoundError if the allele is not in the allele table.
+        """
+        try:
+            return self.allele_index[allele]
+        except KeyError:
+            raise sdk.utils.AlleleNotFoundError(self.gene, allele)
+
+    def encode(self, variants):
+        """
+        Return a boolean vector marking specified variants.
+
+        Variants that do not define any star allele are ignored.
+        """
+        mask = np.zeros(len(self.variants), dtype=bool)
+        mask[[self.variant_index[x] for x in variants
+            if x in self.variant_index]] = True
+        return mask
+
+    def list_variants(self, allele, mode='all'):
+        """
+        Return coordinate sorted variants of specified star allele.
+
+        Parameters
+        ----------
+        allele : str
+            Star allele.
+        mode : {'all', 'core', 'tag'}, default: 'all'
+            Whether to return all variants, core variants only, or tag
+            variants only.
+        """
+        i = self.index(allele)
+        if mode == 'all':
+            row = self.core[i] | self.tag[i]
+        elif mode == 'core':
+            row = self.core[i]
+        elif mode == 'tag':
+            row = self.tag[i]
+        else:
+            raise ValueError(f'Incorrect mode: {mode}')
+        return [self.variants[j] for j in np.flatnonzero(row)]
+
+    def match(self, variants):
+        """
+        Return star alleles whose core variants are all observed.
+
+        Only star alleles defined by SNVs and/or indels are considered.
+        Alleles are returned in the order of the allele table.
+
+        Parameters
+        ----------
+        variants : list
+            Observed variants.
+        """
+        return self.match_many([variants])[0]
+
+    def match_many(self, variant_lists):
+        """
+        Apply :meth:`match` to multiple lists of observed variants at once.
+
+        Parameters
+        ----------
+        variant_lists : list
+            List of observed variant lists (e.g. one for each haplotype).
+
+        Returns
+        -------
+        list
+            List of matched star allele lists.
+        """
+        if not variant_lists:
+            return []
+        observed = np.array([self.encode(x) for x in variant_lists])
+        missing = (~observed).astype(int) @ self.core.T.astype(int)
+        matched = self.definable & (missing == 0)
+        return [[self.alleles[j] for j in np.flatnonzero(x)] for x in matched]
+
+    def is_subset(self, a, b):
+        """
+        Return True if core variants of allele a are a subset of those of
+        allele b.
+        """
+        i, j = self.index(a), self.index(b)
+        return i == j or bool(self.subsets[i, j])
+
+    def collapse(self, alleles):
+        """
+        Remove star alleles whose core variants are a subset of those of
+        another allele in the list.
+
+        Parameters
+        ----------
+        alleles : list
+            Candidate star alleles.
+
+        Returns
+        -------
+        list
+            Collapsed list of alleles.
+        """
+        return self.collapse_many([alleles])[0]
+
+    def collapse_many(self, allele_lists):
+        """
+        Apply :meth:`collapse` to multiple candidate lists at once.
+
+        Parameters
+        ----------
+        allele_lists : list
+            List of candidate star allele lists.
+
+        Returns
+        -------
+        list
+            List of collapsed allele lists.
+        """
+        results = [list(x) for x in allele_lists]
+        todo = [i for i, x in enumerate(results) if len(set(x)) > 1]
+        if not todo:
+            return results
+        indices = [[self.index(x) for x in results[i]] for i in todo]
+        members = np.zeros((len(todo), len(self.alleles)), dtype=int)
+        for k, x in enumerate(indices):
+            members[k, x] = 1
+        collapsed = (members @ self.subsets.T.astype(int)) > 0
+        for k, i in enumerate(todo):
+            results[i] = [x for x, j in zip(results[i], indices[k])
+                if not collapsed[k, j]]
+        return results
+
+    def priority_key(self, allele):
+        """
+        Return the sort key used by :meth:`sort_alleles` when
+        ``by='priority'``.
+        """
+        try:
+            return self.priorities[allele]
+        except KeyError:
+            return self._priority_key(allele)
+
+class VariantIndex:
+    """
+    Inverted index of star allele-defining variants for an assembly.
+
+    The index maps every variant in the variant table to the (gene, star
+    allele) pairs whose definition includes it, and canonicalizes other
+    representations of the same variant (e.g. synonyms listed in the variant
+    table, a 'chr' prefix, or extra bases shared by REF and ALT) to the name
+    used in the tables. Use :meth:`get_variant_index` to obtain a cached
+    instance rather than building one directly.
+
+    Note that variants are not left-aligned because that requires the
+    reference sequence.
+
+    Parameters
+    ----------
+    assembly : {'GRCh37', 'GRCh38'}, default: 'GRCh37'
+        Reference genome assembly.
+
+    Attributes
+    ----------
+    alleles : dict
+        Mapping of variant to the (gene, star allele) pairs carrying it as a
+        core or tag variant, in the order of the allele table.
+    names : frozenset
+        Canonical variant names.
+    synonyms : dict
+        Mapping of alternative representation to canonical variant name.
+    """
+
+    def __init__(self, assembly='GRCh37'):
+        if assembly not in ASSEMBLIES:
+            raise ValueError(f'Incorrect assembly: {assembly}')
+
+        kb = _get_knowledge_base()
+
+        self.assembly = assembly
+
+        alleles = {}
+        for (gene, allele, x), (core, tag) in kb.allele_variants.items():
+            if x != assembly:
+                continue
+            for variant in core + tag:
+                pairs = alleles.setdefault(variant, [])
+                if (gene, allele) not in pairs:
+                    pairs.append((gene, allele))
+        self.alleles = MappingProxyType(
+            {k: tuple(v) for k, v in alleles.items()})
+
+        self.names = frozenset([k[2] for k in kb.variant_records
+            if k[1] == assembly]) | frozenset(self.alleles)
+
+        synonyms = {}
+        for (gene, x), d in kb.synonyms.items():
+            if x != assembly:
+                continue
+            for k, v in d.items():
+                if not pd.isna(v):
+                    synonyms.setdefault(k, v)
+
+        # Minimal representations are only used when they are unambiguous.
+        trimmed = {}
+        for variant in list(self.names) + list(synonyms):
+            name = synonyms.get(variant, variant)
+            trimmed.setdefault(_trim_variant(variant), set()).add(name)
+        for k, v in trimmed.items():
+            if len(v) == 1 and k not in self.names:
+                synonyms.setdefault(k, v.pop())
+
+        self.synonyms = MappingProxyType(synonyms)
+
+    def canonicalize(self, variant):
+        """
+        Return the canonical name of specified variant.
+
+        Parameters
+        ----------
+        variant : str
+            Variant in the 'chrom-pos-ref-alt' format.
+
+        Returns
+        -------
+        str or None
+            Canonical variant name, or None if the variant is not in the
+            variant table or is not in the 'chrom-pos-ref-alt' format.
+        """
+        if variant in self.names:
+            return variant
+        if variant in self.synonyms:
+            return self.synonyms[variant]
+        try:
+            variant = _trim_variant(variant)
+        except (ValueError, AttributeError):
+            return None
+        if variant in self.names:
+            return variant
+        return self.synonyms.get(variant)
+
+    def lookup(self, variant):
+        """
+        Return the (gene, star allele) pairs carrying specified variant.
+
+        The variant is canonicalized first. An empty tuple is returned if
+        the variant does not define any star allele.
+        """
+        return self.alleles.get(self.canonicalize(variant), ())
+
+    def annotate(self, variants):
+        """
+        Annotate variants with the star alleles they define.
+
+        Parameters
+        ----------
+        variants : list or fuc.api.pyvcf.VcfFrame
+            Variants in the 'chrom-pos-ref-alt' format, or VcfFrame whose
+            multiallelic sites will be split by ALT allele.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Table with one row per (variant, gene, star allele) hit and the
+            columns 'Variant', 'Canonical', 'Gene', and 'StarAllele'.
+            Variants with no hit are not reported.
+        """
+        from fuc import pyvcf
+
+        if isinstance(variants, pyvcf.VcfFrame):
+            variants = variants.to_variants()
+        data = []
+        for variant in variants:
+            name = self.canonicalize(variant)
+            for gene, allele in self.alleles.get(name, ()):
+                data.append([variant, name, gene, allele])
+        return pd.DataFrame(data,
+            columns=['Variant', 'Canonical', 'Gene', 'StarAllele'])
+
 def build_definition_table(gene, assembly='GRCh37'):
     """
     Build the definition table of star alleles for specified gene.
@@ -70,45 +744,38 @@ def build_definition_table(gene, assembly='GRCh37'):
     0    19  15879621  rs2108622   C   T    .      .  VI=V433M     GT  0  1
     1    19  15897578  rs3093105   A   C    .      .   VI=W12G     GT  1  0
     """
+    from fuc import pyvcf
+
     if not is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
-    df1 = load_allele_table()
-    df1 = df1[df1.Gene == gene]
+    kb = _get_knowledge_base()
     variants = []
-    for i, r in df1.iterrows():
-        if pd.isna(r[f'{assembly}Core']):
-            continue
-        for variant in r[f'{assembly}Core'].split(','):
+    for allele in kb.alleles[gene]:
+        for variant in kb.allele_variants[(gene, allele, assembly)][0]:
             if variant not in variants:
                 variants.append(variant)
     data = {x: [] for x in pyvcf.HEADERS}
 
-    for i, r in df1.iterrows():
-        if r.SV or pd.isna(r[f'{assembly}Core']):
+    for allele in kb.alleles[gene]:
+        core = kb.allele_variants[(gene, allele, assembly)][0]
+        if kb.allele_records[(gene, allele)].SV or not core:
             continue
+        data[allele] = ['1' if x in core else '0' for x in variants]
 
-        data[r.StarAllele] = [
-            '0' if pd.isna(r[f'{assembly}Core']) else
-            '1' if x in r[f'{assembly}Core'].split(',') else
-            '0' for x in variants
-        ]
-
-    df2 = load_variant_table()
-    df2 = df2[df2.Gene == gene]
     for variant in variants:
         pos = int(variant.split('-')[1])
         ref = variant.split('-')[2]
         alt = variant.split('-')[3]
-        s = df2[variant == df2[f'{assembly}Name']]
-        data['CHROM'].append(s.Chromosome.values[0])
+        r = kb.variant_records[(gene, assembly, variant)]
+        data['CHROM'].append(r.Chromosome)
         data['POS'].append(pos)
-        data['ID'].append(s.rsID.values[0])
+        data['ID'].append(r.rsID)
         data['REF'].append(ref)
         data['ALT'].append(alt)
         data['QUAL'].append('.')
         data['FILTER'].append('.')
-        data['INFO'].append(f'VI={s.Impact.values[0]}')
+        data['INFO'].append(f'VI={r.Impact}')
         data['FORMAT'].append('GT')
     meta = [
         '##fileformat=VCFv4.1',
@@ -149,20 +816,8 @@ def collapse_alleles(gene, alleles, assembly='GRCh37'):
     >>> pypgx.collapse_alleles('CYP2B6', ['*6', '*7'])
     ['*7']
     """
-    results = []
-    for a in alleles:
-        result = False
-        for b in alleles:
-            if a == b:
-                continue
-            v1 = set(list_variants(gene, alleles=a, assembly=assembly, mode='core'))
-            v2 = set(list_variants(gene, alleles=b, assembly=assembly, mode='core'))
-            if v1.issubset(v2):
-                result = True
-                break
-        results.append(result)
-
-    return [x for i, x in enumerate(alleles) if not results[i]]
+    definitions = get_allele_definitions(gene, assembly=assembly)
+    return definitions.collapse(alleles)
 
 def has_phenotype(gene):
     """
@@ -190,9 +845,7 @@ def has_phenotype(gene):
     if not is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
-    df = load_gene_table()
-
-    return gene in df[~df.PhenotypeMethod.isna()].Gene.to_list()
+    return not pd.isna(_get_knowledge_base().genes[gene].PhenotypeMethod)
 
 def has_score(gene):
     """
@@ -220,9 +873,7 @@ def has_score(gene):
     if not is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
-    df = load_gene_table()
-
-    return gene in df[df.PhenotypeMethod == 'Score'].Gene.unique()
+    return _get_knowledge_base().genes[gene].PhenotypeMethod == 'Score'
 
 def has_sv(gene, allele=None):
     """
@@ -270,8 +921,8 @@ def has_sv(gene, allele=None):
     if not is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
-    df = load_gene_table()
-    is_sv_gene = df[df.Gene == gene].SV.values[0]
+    kb = _get_knowledge_base()
+    is_sv_gene = kb.genes[gene].SV
 
     if allele is None:
         return is_sv_gene
@@ -285,11 +936,7 @@ def has_sv(gene, allele=None):
         elif 'x' in allele:
             return True
         else:
-            df = load_allele_table()
-            df = df[(df.Gene == gene) & (df.StarAllele == allele)]
-            if df.empty:
-                raise sdk.utils.AlleleNotFoundError(gene, allele)
-            return df.SV.values[0]
+            return kb.get_allele(gene, allele).SV
     else:
         warnings.warn(f"PyPGx currently has no SV data available for {gene}. "
                       f"For more details, please visit the Genes section "
@@ -312,7 +959,10 @@ def is_legit_allele(gene, allele):
     bool
         True if the allele is legit.
     """
-    return allele in list_alleles(gene)
+    if not is_target_gene(gene):
+        raise sdk.utils.NotTargetGeneError(gene)
+
+    return (gene, allele) in _get_knowledge_base().allele_records
 
 def is_target_gene(gene):
     """
@@ -337,7 +987,43 @@ def is_target_gene(gene):
     >>> pypgx.is_target_gene('CYP2D7')
     False
     """
-    return gene in list_genes(mode='target')
+    return gene in _get_knowledge_base().target_genes
+
+@functools.lru_cache(maxsize=None)
+def get_allele_definitions(gene, assembly='GRCh37'):
+    """
+    Get the compiled star allele definitions for specified gene.
+
+    The definitions are compiled once per gene and assembly, and cached for
+    the lifetime of the process.
+
+    Parameters
+    ----------
+    gene : str
+        Target gene.
+    assembly : {'GRCh37', 'GRCh38'}, default: 'GRCh37'
+        Reference genome assembly.
+
+    Returns
+    -------
+    pypgx.api.core.AlleleDefinitions
+        Compiled definitions.
+
+    Examples
+    --------
+
+    >>> import pypgx
+    >>> definitions = pypgx.get_allele_definitions('CYP4F2')
+    >>> definitions.variants
+    ('19-15990431-C-T', '19-16008388-A-C')
+    >>> definitions.core
+    array([[False, False],
+           [False,  True],
+           [ True, False]])
+    >>> definitions.match(['19-16008388-A-C'])
+    ['*2']
+    """
+    return AlleleDefinitions(gene, assembly=assembly)
 
 def get_default_allele(gene, assembly='GRCh37'):
     """
@@ -364,9 +1050,7 @@ def get_default_allele(gene, assembly='GRCh37'):
     >>> pypgx.get_default_allele('CYP2D6', assembly='GRCh38')
     '*1'
     """
-    df = load_gene_table()
-    allele = df[df.Gene == gene][f'{assembly}Default'].values[0]
-    return allele
+    return getattr(_get_knowledge_base().get_gene(gene), f'{assembly}Default')
 
 def get_exon_ends(gene, assembly='GRCh37'):
     """
@@ -398,11 +1082,10 @@ def get_exon_ends(gene, assembly='GRCh37'):
     >>> pypgx.get_exon_ends('CYP2D6', assembly='GRCh38')
     [42126752, 42126992, 42127634, 42127983, 42128350, 42128944, 42129185, 42129909, 42130810]
     """
-    if gene not in list_genes(mode='all'):
+    kb = _get_knowledge_base()
+    if gene not in kb.genes:
         raise sdk.utils.GeneNotFoundError(gene)
-    df = load_gene_table()
-    df = df[df.Gene == gene]
-    s = df[f'{assembly}ExonEnds'].values[0]
+    s = getattr(kb.genes[gene], f'{assembly}ExonEnds')
     return [int(x) for x in s.strip(',').split(',')]
 
 def get_exon_starts(gene, assembly='GRCh37'):
@@ -435,11 +1118,10 @@ def get_exon_starts(gene, assembly='GRCh37'):
     >>> pypgx.get_exon_starts('CYP2D6', assembly='GRCh38')
     [42126498, 42126850, 42127446, 42127841, 42128173, 42128783, 42129032, 42129737, 42130611]
     """
-    if gene not in list_genes(mode='all'):
+    kb = _get_knowledge_base()
+    if gene not in kb.genes:
         raise sdk.utils.GeneNotFoundError(gene)
-    df = load_gene_table()
-    df = df[df.Gene == gene]
-    s = df[f'{assembly}ExonStarts'].values[0]
+    s = getattr(kb.genes[gene], f'{assembly}ExonStarts')
     return [int(x) for x in s.strip(',').split(',')]
 
 def get_function(gene, allele):
@@ -476,13 +1158,7 @@ def get_function(gene, allele):
     if not is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
-    df = load_allele_table()
-    df = df[(df.Gene == gene) & (df.StarAllele == allele)]
-
-    if df.empty:
-        raise sdk.utils.AlleleNotFoundError(gene, allele)
-
-    return df.Function.values[0]
+    return _get_knowledge_base().get_allele(gene, allele).Function
 
 def get_paralog(gene):
     """
@@ -511,9 +1187,7 @@ def get_paralog(gene):
     >>> pypgx.get_paralog('CYP2E1')
     ''
     """
-    df = load_gene_table()
-    df = df[df.Gene == gene]
-    paralog = df.Paralog.values[0]
+    paralog = _get_knowledge_base().get_gene(gene).Paralog
     if pd.isna(paralog):
         paralog = ''
     return paralog
@@ -550,13 +1224,15 @@ def get_priority(gene, phenotype):
     if not is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
-    if phenotype not in list_phenotypes():
-        raise sdk.utils.PhenotypeNotFoundError(phenotype)
+    kb = _get_knowledge_base()
 
-    df = load_phenotype_table()
-    i = (df.Gene == gene) & (df.Phenotype == phenotype)
+    if phenotype not in kb.phenotypes[None]:
+        raise sdk.utils.PhenotypeNotFoundError(phenotype)
 
-    return df[i].Priority.values[0]
+    try:
+        return kb.priorities[(gene, phenotype)]
+    except KeyError:
+        raise IndexError(f'Priority not found: {gene}, {phenotype}')
 
 def get_recommendation(drug, gene1, phenotype1, gene2=None, phenotype2=None):
     """
@@ -610,10 +1286,12 @@ def get_recommendation(drug, gene1, phenotype1, gene2=None, phenotype2=None):
     >>> pypgx.get_recommendation('fluvastatin', 'SLCO1B1', 'Normal Function', 'CYP2C9', 'Normal Metabolizer')
     'Prescribe desired starting dose and adjust doses of fluvastatin based on disease-specific guidelines.'
     """
-    if gene1 not in list_genes(mode='all'):
+    kb = _get_knowledge_base()
+
+    if gene1 not in kb.genes:
         raise sdk.utils.GeneNotFoundError(gene1)
 
-    if gene2 is not None and gene2 not in list_genes(mode='all'):
+    if gene2 is not None and gene2 not in kb.genes:
         raise sdk.utils.GeneNotFoundError(gene2)
 
     if phenotype1 not in list_phenotypes(gene1):
@@ -624,14 +1302,12 @@ def get_recommendation(drug, gene1, phenotype1, gene2=None, phenotype2=None):
         l = ', '.join([f"'{x}'" for x in list_phenotypes(gene2)])
         raise sdk.utils.PhenotypeNotFoundError(f"{phenotype2} in {gene2} (choices: {l})")
 
-    df = load_recommendation_table()
+    index = _get_recommendation_index()
 
-    if drug not in df.Drug.unique():
+    if drug not in index.drugs:
         raise ValueError(f"Drug not found: {drug}")
 
-    df = df[df.Drug == drug]
-
-    target_genes = set(df.Gene1.to_list() + df.Gene2.to_list())
+    target_genes = index.drugs[drug]
 
     if gene1 not in target_genes:
         raise ValueError(f"{gene1} does not have any recommendations for {drug}")
@@ -639,22 +1315,126 @@ def get_recommendation(drug, gene1, phenotype1, gene2=None, phenotype2=None):
     if gene2 is not None and gene2 not in target_genes:
         raise ValueError(f"{gene2} does not have any recommendations for {drug}")
 
-    if df.Gene2.unique() == ['None']:
-        return df[(df.Gene1 == gene1) & (df.Phenotype1 == phenotype1)].Recommendation.values[0]
+    if target_genes[1] == 'None':
+        return index.get((drug, gene1, phenotype1, 'None', 'None'))
 
     if gene2 is None:
         message = (f"Recommendations for {drug} are determined by multiple genes "
                    f"({', '.join(target_genes)}); for best results, specify phenotype for each gene")
         warnings.warn(message)
-        if gene1 in df.Gene1.unique():
-            return df[(df.Gene1 == gene1) & (df.Phenotype1 == phenotype1)].Recommendation.values[0]
-        else:
-            return df[(df.Gene2 == gene1) & (df.Phenotype2 == phenotype1)].Recommendation.values[0]
+        return index.get((drug, gene1, phenotype1, 'None', 'None'))
 
-    if gene1 in df.Gene1.unique():
-        return df[(df.Gene1 == gene1) & (df.Phenotype1 == phenotype1) & (df.Gene2 == gene2) & (df.Phenotype2 == phenotype2)].Recommendation.values[0]
+    if gene1 == target_genes[0]:
+        return index.get((drug, gene1, phenotype1, gene2, phenotype2))
     else:
-        return df[(df.Gene2 == gene1) & (df.Phenotype2 == phenotype1) & (df.Gene1 == gene2) & (df.Phenotype1 == phenotype2)].Recommendation.values[0]
+        return index.get((drug, gene2, phenotype2, gene1, phenotype1))
+
+def get_recommendations(phenotypes, drugs=None):
+    """
+    Get recommendations for multiple samples and drugs at once.
+
+    For each drug, the phenotypes of every gene it depends on are taken from
+    the input table. If a drug is determined by two genes but only one of
+    them is present, the recommendation is chosen as in
+    :meth:`get_recommendation` when the second phenotype is omitted. Samples
+    with a missing phenotype get a missing recommendation.
+
+    Parameters
+    ----------
+    phenotypes : pandas.DataFrame
+        Phenotype table with samples as rows and genes as columns.
+    drugs : list, optional
+        Drugs to report. By default, report every drug with at least one of
+        its genes present in the table.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Recommendation table with samples as rows and drugs as columns.
+
+    See Also
+    --------
+    get_recommendation
+        Get recommendation for specified drug-phenotype combination.
+
+    Examples
+    --------
+
+    >>> import pypgx
+    >>> import pandas as pd
+    >>> df = pd.DataFrame({
+    ...     'CYP2D6': ['Normal Metabolizer', 'Poor Metabolizer'],
+    ...     'CYP3A5': ['Poor Metabolizer', 'Normal Metabolizer'],
+    ... }, index=['A', 'B'])
+    >>> df = pypgx.get_recommendations(df, drugs=['codeine', 'tacrolimus'])
+    >>> df.loc['B', 'tacrolimus']
+    'Increase starting dose 1.5 to 2 times recommended starting dose. Total starting dose should not exceed 0.3 mg/kg/day. Use therapeutic drug monitoring to guide dose adjustments.'
+    """
+    kb = _get_knowledge_base()
+    index = _get_recommendation_index()
+
+    choices = {}
+
+    for gene in phenotypes.columns:
+        if gene not in kb.genes:
+            raise sdk.utils.GeneNotFoundError(gene)
+        choices[gene] = list_phenotypes(gene)
+        for phenotype in phenotypes[gene].dropna().unique():
+            if phenotype not in choices[gene]:
+                l = ', '.join([f"'{x}'" for x in choices[gene]])
+                raise sdk.utils.PhenotypeNotFoundError(f"{phenotype} in {gene} (choices: {l})")
+
+    if drugs is None:
+        drugs = [k for k, v in index.drugs.items() if set(v) & set(choices)]
+
+    # Each drug is resolved from one or two genes, whose phenotypes are
+    # encoded as category codes so that a drug's recommendations can be
+    # gathered for all samples at once.
+    queries = []
+    categories = {}
+    codes = {}
+
+    for drug in drugs:
+        if drug not in index.drugs:
+            raise ValueError(f"Drug not found: {drug}")
+        genes = [x for x in index.drugs[drug] if x in choices]
+        if not genes:
+            raise ValueError(f"No phenotypes available for {drug}")
+        if len(genes) == 1 and index.drugs[drug][1] != 'None':
+            message = (f"Recommendations for {drug} are determined by multiple genes "
+                       f"({', '.join(index.drugs[drug])}); for best results, specify phenotype for each gene")
+            warnings.warn(message)
+        gene1 = genes[0]
+        gene2 = genes[1] if len(genes) > 1 else 'None'
+        labels1 = choices[gene1]
+        labels2 = choices[gene2] if len(genes) > 1 else ['None']
+        for gene in genes:
+            if gene not in categories:
+                categories[gene] = pd.Categorical(phenotypes[gene],
+                    categories=choices[gene]).codes.astype(int)
+        code1 = categories[gene1]
+        if len(genes) > 1:
+            code2 = categories[gene2]
+        else:
+            code2 = np.zeros(len(phenotypes), dtype=int)
+        code = code1 * len(labels2) + code2
+        code[(code1 < 0) | (code2 < 0)] = -1
+        codes[drug] = code
+        for phenotype1 in labels1:
+            for phenotype2 in labels2:
+                queries.append((drug, gene1, phenotype1, gene2, phenotype2))
+
+    queries = pd.DataFrame(queries, columns=_RECOMMENDATION_KEYS)
+    queries = queries.merge(index.table, on=_RECOMMENDATION_KEYS, how='left')
+
+    data = {}
+
+    for drug, df in queries.groupby('Drug', sort=False):
+        # Code -1 (missing phenotype) picks the trailing NaN.
+        values = np.append(df.Recommendation.to_numpy(dtype=object), np.nan)
+        data[drug] = values[codes[drug]]
+
+    return pd.DataFrame(data, index=phenotypes.index, columns=drugs)
 
 def get_ref_allele(gene):
     """
@@ -679,9 +1459,7 @@ def get_ref_allele(gene):
     >>> pypgx.get_ref_allele('NAT1')
     '*4'
     """
-    df = load_gene_table()
-    allele = df[df.Gene == gene]['RefAllele'].values[0]
-    return allele
+    return _get_knowledge_base().get_gene(gene).RefAllele
 
 def get_region(gene, assembly='GRCh37'):
     """
@@ -699,13 +1477,12 @@ def get_region(gene, assembly='GRCh37'):
     str
         Requested region.
     """
-    if gene not in list_genes(mode='all'):
-        raise sdk.utils.GeneNotFoundError(gene)
+    kb = _get_knowledge_base()
 
-    df = load_gene_table()
-    df = df[df.Gene == gene]
+    if gene not in kb.genes:
+        raise sdk.utils.GeneNotFoundError(gene)
 
-    return df[f'{assembly}Region'].values[0]
+    return getattr(kb.genes[gene], f'{assembly}Region')
 
 def get_score(gene, allele):
     """
@@ -747,13 +1524,7 @@ def get_score(gene, allele):
     if not has_score(gene):
         return np.nan
 
-    df = load_allele_table()
-    df = df[(df.Gene == gene) & (df.StarAllele == allele)]
-
-    if df.empty:
-        raise sdk.utils.AlleleNotFoundError(gene, allele)
-
-    return df.ActivityScore.values[0]
+    return _get_knowledge_base().get_allele(gene, allele).ActivityScore
 
 def get_strand(gene):
     """
@@ -772,10 +1543,7 @@ def get_strand(gene):
     if not is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
-    df = load_gene_table()
-    df = df[df.Gene == gene]
-
-    return df['Strand'].values[0]
+    return _get_knowledge_base().genes[gene].Strand
 
 def get_variant_impact(variant):
     """
@@ -808,15 +1576,43 @@ def get_variant_impact(variant):
         raise sdk.utils.VariantNotFoundError(variant)
     pypgx.sdk.utils.VariantNotFoundError: 22-42524435-T-C
     """
-    df = load_variant_table()
-    df = df[(df.GRCh37Name == variant) | (df.GRCh38Name == variant)]
-    if df.empty:
+    kb = _get_knowledge_base()
+    if variant not in kb.variants:
         raise sdk.utils.VariantNotFoundError(variant)
-    impact = df.Impact.values[0]
+    impact = kb.variants[variant].Impact
     if pd.isna(impact):
         impact = ''
     return impact
 
+@functools.lru_cache(maxsize=None)
+def get_variant_index(assembly='GRCh37'):
+    """
+    Get the inverted index of star allele-defining variants.
+
+    The index is built once per assembly and cached.
+
+    Parameters
+    ----------
+    assembly : {'GRCh37', 'GRCh38'}, default: 'GRCh37'
+        Reference genome assembly.
+
+    Returns
+    -------
+    VariantIndex
+        Variant index.
+
+    Examples
+    --------
+
+    >>> import pypgx
+    >>> index = pypgx.get_variant_index()
+    >>> index.canonicalize('chr2-234668879-CAT-CATAT')
+    '2-234668879-C-CAT'
+    >>> index.lookup('chr2-234668879-CAT-CATAT')
+    (('UGT1A1', '*28'), ('UGT1A1', '*80+*28'))
+    """
+    return VariantIndex(assembly)
+
 def get_variant_synonyms(gene, assembly='GRCh37'):
     """
     Get variant synonyms.
@@ -842,15 +1638,8 @@ def get_variant_synonyms(gene, assembly='GRCh37'):
     >>> pypgx.get_variant_synonyms('CYP2D6')
     {}
     """
-    df = load_variant_table()
-    df = df[df.Gene == gene]
-    synonyms = {}
-    for i, r in df.iterrows():
-        if pd.isna(r[f'{assembly}Synonym']):
-            continue
-        for variant in r[f'{assembly}Synonym'].split(','):
-            synonyms[variant] = r[f'{assembly}Name']
-    return synonyms
+    kb = _get_knowledge_base()
+    return dict(kb.synonyms.get((gene, assembly), {}))
 
 def list_alleles(gene, variants=None, assembly='GRCh37'):
     """
@@ -880,26 +1669,24 @@ def list_alleles(gene, variants=None, assembly='GRCh37'):
     ['*4', '*6', '*7', '*13', '*19', '*20', '*26', '*34', '*36', '*37', '*38']
     """
     if not is_target_gene(gene):
-        raise NotTargetGeneError(gene)
+        raise sdk.utils.NotTargetGeneError(gene)
 
-    df = load_allele_table()
-    df = df[df.Gene == gene]
+    kb = _get_knowledge_base()
+    alleles = list(kb.alleles[gene])
 
     if variants is not None:
         if isinstance(variants, str):
             variants = [variants]
 
-        def one_row(r):
-            l = []
-            if not pd.isna(r[f'{assembly}Core']):
-                l += r[f'{assembly}Core'].split(',')
-            if not pd.isna(r[f'{assembly}Tag']):
-                l += r[f'{assembly}Tag'].split(',')
-            return all([x in l for x in variants])
-
-        df = df[df.apply(one_row, axis=1)]
+        index = get_variant_index(assembly)
+        carriers = None
+        for variant in variants:
+            pairs = set(index.alleles.get(variant, ()))
+            carriers = pairs if carriers is None else carriers & pairs
+        if carriers is not None:
+            alleles = [x for x in alleles if (gene, x) in carriers]
 
-    return df.StarAllele.to_list()
+    return alleles
 
 def list_functions(gene=None):
     """
@@ -924,15 +1711,10 @@ def list_functions(gene=None):
     >>> pypgx.list_functions(gene='CYP2D6')
     ['Normal Function', 'No Function', 'Decreased Function', 'Uncertain Function', 'Unknown Function', nan]
     """
-    df = load_allele_table()
-
-    if gene is not None:
-        if not is_target_gene(gene):
-            raise NotTargetGeneError(gene)
-
-        df = df[df.Gene == gene]
+    if gene is not None and not is_target_gene(gene):
+        raise sdk.utils.NotTargetGeneError(gene)
 
-    return list(df.Function.unique())
+    return list(_get_knowledge_base().functions[gene])
 
 def list_genes(mode='target'):
     """
@@ -959,16 +1741,12 @@ def list_genes(mode='target'):
     >>> pypgx.list_genes(mode='all')[:5] # Includes pseudogenes
     ['CACNA1S', 'CFTR', 'CYP1A2', 'CYP2A6', 'CYP2A7']
     """
-    df = load_gene_table()
+    gene_lists = _get_knowledge_base().gene_lists
 
-    if mode == 'target':
-        df = df[df.Target]
-    elif mode == 'control':
-        df = df[df.Control]
-    else:
-        pass
+    if mode in ['target', 'control']:
+        return list(gene_lists[mode])
 
-    return df.Gene.to_list()
+    return list(gene_lists['all'])
 
 def list_phenotypes(gene=None):
     """
@@ -993,14 +1771,10 @@ def list_phenotypes(gene=None):
     >>> pypgx.list_phenotypes(gene='CYP2D6')
     ['Ultrarapid Metabolizer', 'Normal Metabolizer', 'Intermediate Metabolizer', 'Poor Metabolizer']
     """
-    df = load_phenotype_table()
-
-    if gene is not None:
-        if not is_target_gene(gene):
-            raise sdk.utils.NotTargetGeneError(gene)
-        df = df[df.Gene == gene]
+    if gene is not None and not is_target_gene(gene):
+        raise sdk.utils.NotTargetGeneError(gene)
 
-    return sorted(list(df.Phenotype.unique()))
+    return list(_get_knowledge_base().phenotypes.get(gene, ()))
 
 def list_variants(gene, alleles=None, mode='all', assembly='GRCh37'):
     """
@@ -1047,35 +1821,28 @@ def list_variants(gene, alleles=None, mode='all', assembly='GRCh37'):
     >>> pypgx.list_variants('CYP2B6', alleles=['*6'], mode='tag')
     ['19-41495755-T-C', '19-41496461-T-C']
     """
+    from fuc import common
+
     if not is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
-    allele_table = load_allele_table()
-    allele_table = allele_table[allele_table.Gene == gene]
+    kb = _get_knowledge_base()
 
     core_variants = []
     tag_variants = []
 
     if alleles is None:
-        alleles = list_alleles(gene, assembly=assembly)
+        alleles = kb.alleles[gene]
 
     if isinstance(alleles, str):
         alleles = [alleles]
 
     for allele in alleles:
-        df = allele_table[allele_table.StarAllele == allele]
-
-        if df.empty:
+        if (gene, allele) not in kb.allele_records:
             raise sdk.utils.AlleleNotFoundError(gene, allele)
-
-        c = df[f'{assembly}Core'].values[0]
-        t = df[f'{assembly}Tag'].values[0]
-
-        if not pd.isna(c):
-            core_variants += c.split(',')
-
-        if not pd.isna(t):
-            tag_variants += t.split(',')
+        c, t = kb.allele_variants[(gene, allele, assembly)]
+        core_variants += c
+        tag_variants += t
 
     if mode == 'all':
         results = core_variants + tag_variants
@@ -1110,8 +1877,7 @@ def load_allele_table():
     3  CACNA1S   c.520C>T            NaN  Malignant Hyperthermia Associated                               1-201061121-G-A       NaN                               1-201091993-G-A       NaN  False
     4  CACNA1S  c.3257G>A            NaN  Malignant Hyperthermia Associated                               1-201029943-C-T       NaN                               1-201060815-C-T       NaN  False
     """
-    b = BytesIO(pkgutil.get_data(__name__, 'data/allele-table.csv'))
-    return pd.read_csv(b)
+    return _get_knowledge_base().tables['allele'].copy()
 
 def load_cnv_table():
     """
@@ -1135,8 +1901,7 @@ def load_cnv_table():
     3  CYP2A6  Deletion2Het
     4  CYP2A6  Deletion3Het
     """
-    b = BytesIO(pkgutil.get_data(__name__, 'data/cnv-table.csv'))
-    return pd.read_csv(b)
+    return _get_knowledge_base().tables['cnv'].copy()
 
 def load_cpic_table():
     """
@@ -1164,8 +1929,7 @@ def load_cpic_table():
     3  CYP2C19  amitriptyline     704.0                    N06AA09, N06CA01  https://cpicpgx.org/guidelines/guideline-for-t...         A           Final            1A                  NaN  23486447;27997040
     4   CYP2D6  amitriptyline     704.0                    N06AA09, N06CA01  https://cpicpgx.org/guidelines/guideline-for-t...         A           Final            1A       Actionable PGx  23486447;27997040
     """
-    b = BytesIO(pkgutil.get_data(__name__, 'data/cpic-table.csv'))
-    return pd.read_csv(b)
+    return _get_knowledge_base().tables['cpic'].copy()
 
 def load_diplotype_table():
     """
@@ -1189,8 +1953,7 @@ def load_diplotype_table():
     3  CACNA1S    c.520C>T/c.520C>T  Malignant Hyperthermia Susceptibility
     4  CACNA1S   c.520C>T/c.3257G>A  Malignant Hyperthermia Susceptibility
     """
-    b = BytesIO(pkgutil.get_data(__name__, 'data/diplotype-table.csv'))
-    return pd.read_csv(b)
+    return _get_knowledge_base().tables['diplotype'].copy()
 
 def load_equation_table():
     """
@@ -1214,8 +1977,7 @@ def load_equation_table():
     3  CYP2D6          Poor Metabolizer     0 <= score < 0.25
     4  CYP2D6  Intermediate Metabolizer  0.25 <= score < 1.25
     """
-    b = BytesIO(pkgutil.get_data(__name__, 'data/equation-table.csv'))
-    return pd.read_csv(b)
+    return _get_knowledge_base().tables['equation'].copy()
 
 def load_gene_table():
     """
@@ -1239,8 +2001,7 @@ def load_gene_table():
     3   CYP1A1    True    False     NaN      True  False             NaN         *1            *1            *1      -   15:75008882-75020951   15:74716541-74728528  75011882,75013307,75013539,75013754,75013931,7...  75013115,75013394,75013663,75013844,75014058,7...  74719541,74720966,74721198,74721413,74721590,7...  74720774,74721053,74721322,74721503,74721717,7...
     4   CYP1A2    True    False     NaN      True  False             NaN        *1A           *1A           *1A      +   15:75038183-75051941   15:74745844-74759607  75041183,75042070,75043529,75044105,75044464,7...  75041238,75042910,75043650,75044195,75044588,7...  74748844,74749729,74751188,74751764,74752123,7...  74748897,74750569,74751309,74751854,74752247,7...
     """
-    b = BytesIO(pkgutil.get_data(__name__, 'data/gene-table.csv'))
-    return pd.read_csv(b)
+    return _get_knowledge_base().tables['gene'].copy()
 
 def load_phenotype_table():
     """
@@ -1264,8 +2025,7 @@ def load_phenotype_table():
     3     CFTR                   Unfavorable Response                         None
     4     CFTR                          Indeterminate                         None
     """
-    b = BytesIO(pkgutil.get_data(__name__, 'data/phenotype-table.csv'))
-    return pd.read_csv(b)
+    return _get_knowledge_base().tables['phenotype'].copy()
 
 def load_recommendation_table():
     """
@@ -1289,8 +2049,7 @@ def load_recommendation_table():
     3  tacrolimus  CYP3A5                   Poor Metabolizer  None       None  Initiate therapy with standard recommended dos...
     4  tacrolimus  CYP3A5                      Indeterminate  None       None                                               None
     """
-    b = BytesIO(pkgutil.get_data(__name__, 'data/recommendation-table.csv'))
-    return pd.read_csv(b, na_filter=False)
+    return _get_knowledge_base().tables['recommendation'].copy()
 
 def load_variant_table():
     """
@@ -1314,10 +2073,7 @@ def load_variant_table():
     3     CFTR                   Unfavorable Response                         None
     4     CFTR                          Indeterminate                         None
     """
-    b = BytesIO(pkgutil.get_data(__name__, 'data/variant-table.csv'))
-    df = pd.read_csv(b)
-    df.Chromosome = df.Chromosome.astype(str)
-    return df
+    return _get_knowledge_base().tables['variant'].copy()
 
 def predict_phenotype(gene, a, b):
     """
@@ -1360,36 +2116,7 @@ def predict_phenotype(gene, a, b):
     if not is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
-    df = load_gene_table()
-    phenotype_method = df[df.Gene == gene].PhenotypeMethod.values[0]
-
-    if phenotype_method == 'Score':
-        df = load_equation_table()
-        df = df[df.Gene == gene]
-        def one_row(r, score):
-            return eval(r.Equation)
-        score = predict_score(gene, a) + predict_score(gene, b)
-        if np.isnan(score):
-            return 'Indeterminate'
-        i = df.apply(one_row, args=(score,), axis=1)
-        phenotype = df[i].Phenotype.values[0]
-    elif phenotype_method == 'Diplotype':
-        df = load_diplotype_table()
-        df = df[df.Gene == gene]
-        if not is_legit_allele(gene, a):
-            warnings.warn(f"{a} not found in the allele table for {gene}")
-        if not is_legit_allele(gene, b):
-            warnings.warn(f"{b} not found in the allele table for {gene}")
-        l = [f'{a}/{b}', f'{b}/{a}']
-        i = df.Diplotype.isin(l)
-        try:
-            phenotype = df[i].Phenotype.values[0]
-        except IndexError:
-            phenotype = 'Indeterminate'
-    else:
-        phenotype = 'Indeterminate'
-
-    return phenotype
+    return _get_phenotype_resolver(gene).resolve(a, b)
 
 def predict_score(gene, allele):
     """
@@ -1472,18 +2199,66 @@ def predict_score(gene, allele):
     if not has_score(gene):
         return np.nan
 
+    return float(predict_scores(gene, [allele])[0])
+
+def predict_scores(gene, alleles):
+    """
+    Predict activity scores for multiple haplotype calls at once.
+
+    Each distinct haplotype call is parsed only once, and the scores are
+    computed with NumPy for the whole array.
+
+    Parameters
+    ----------
+    gene : str
+        Target gene.
+    alleles : list
+        Haplotype calls (e.g. ['*1', '*1x2', '*36+*10']).
+
+    Returns
+    -------
+    numpy.ndarray
+        Activity scores, in the same order as the input.
+
+    See Also
+    --------
+    predict_score
+        Predict activity score based on haplotype call.
+
+    Examples
+    --------
+
+    >>> import pypgx
+    >>> pypgx.predict_scores('CYP2D6', ['*1', '*1x2', '*4', '*36+*10', '*22'])
+    array([1.  , 2.  , 0.  , 0.25,  nan])
+    """
+    if not is_target_gene(gene):
+        raise sdk.utils.NotTargetGeneError(gene)
+
+    codes, uniques = pd.factorize(pd.Series(list(alleles), dtype=object))
+
+    if not has_score(gene):
+        return np.full(len(codes), np.nan)
+
     if has_sv(gene):
-        def parsecnv(x):
-            if 'x' in x:
-                l = x.split('x')
-                base = l[0]
-                times = int(l[1])
-                return get_score(gene, base) * times
-            else:
-                return get_score(gene, x)
-        return sum([parsecnv(x) for x in allele.split('+')])
+        parsed = [_parse_sv_allele(x) for x in uniques]
     else:
-        return get_score(gene, allele)
+        parsed = [((x, 1),) for x in uniques]
+
+    kb = _get_knowledge_base()
+    owners, scores, multipliers = [], [], []
+
+    for i, pairs in enumerate(parsed):
+        for base, multiplier in pairs:
+            owners.append(i)
+            scores.append(kb.get_allele(gene, base).ActivityScore)
+            multipliers.append(multiplier)
+
+    weights = np.array(scores, dtype=float) * np.array(multipliers)
+    totals = np.bincount(np.array(owners, dtype=int), weights=weights,
+        minlength=len(uniques))
+
+    return totals[codes]
 
 def sort_alleles(
     alleles, by='priority', gene=None, assembly='GRCh37'
@@ -1562,15 +2337,8 @@ def sort_alleles(
             raise ValueError('Gene is required when sorting by priority')
         if not is_target_gene(gene):
             raise sdk.utils.NotTargetGeneError(gene)
-        function = get_function(gene, allele)
-        a = FUNCTION_ORDER.index(function)
-        core_variants = list_variants(gene, alleles=allele, assembly=assembly, mode='core')
-        b = len(core_variants) * -1
-        impacts = [get_variant_impact(x) for x in core_variants]
-        impacts = [x for x in impacts if x]
-        c = len(impacts) * -1
-        d = allele == get_ref_allele(gene)
-        return (a, b, c, d)
+        definitions = get_allele_definitions(gene, assembly=assembly)
+        return definitions.priority_key(allele)
 
     def func2(allele):
         n = 99999
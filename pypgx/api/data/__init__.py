@@ -0,0 +1,281 @@
+"""
+The data subpackage contains the tables bundled with PyPGx.
+
+The tables are stored as CSV files. When PyPGx is built, they are also
+compiled into a binary snapshot (``tables.pkl``) holding the lookup index
+used by :mod:`api.core` (see :func:`build_index`) and the columns of the
+tables themselves, each table pickled separately so that it is only unpickled
+when it is needed. The snapshot only contains built-in types, so it does not
+depend on the pandas version it was compiled with.
+
+The snapshot records the size, modification time, and checksum of every CSV
+file it was compiled from. It is used as is while the sizes and modification
+times still match; otherwise the CSV files are hashed and the snapshot is
+only used if all checksums still match. If they do not (e.g. a table was
+edited after installation), the CSV files are parsed and indexed as usual.
+
+This module must only depend on the standard library and pandas because
+``setup.py`` loads it directly to compile the snapshot.
+"""
+
+import collections.abc
+import hashlib
+import pathlib
+import pickle
+import pkgutil
+import warnings
+from io import BytesIO
+
+import pandas as pd
+
+TABLES = [
+    'allele',
+    'cnv',
+    'cpic',
+    'diplotype',
+    'equation',
+    'gene',
+    'phenotype',
+    'recommendation',
+    'variant',
+]
+
+SNAPSHOT = 'tables.pkl'
+
+SNAPSHOT_VERSION = 1
+
+ASSEMBLIES = ['GRCh37', 'GRCh38']
+
+def _checksum(b):
+    return hashlib.sha1(b).hexdigest()
+
+def _stat_tables(path):
+    """
+    Return the size and modification time of each CSV file, or None if they
+    cannot be determined (e.g. PyPGx is imported from a ZIP file).
+    """
+    try:
+        stats = {x: (path / f'{x}-table.csv').stat() for x in TABLES}
+    except OSError:
+        return None
+    return {k: (v.st_size, v.st_mtime_ns) for k, v in stats.items()}
+
+def _read_contents():
+    """
+    Return the contents of each CSV file.
+    """
+    return {x: pkgutil.get_data(__name__, f'{x}-table.csv') for x in TABLES}
+
+def _split_variants(s):
+    if pd.isna(s):
+        return ()
+    return tuple(s.split(','))
+
+def parse_table(name, b):
+    """
+    Parse the CSV file contents of specified table.
+
+    Parameters
+    ----------
+    name : str
+        Table name (e.g. 'allele').
+    b : bytes
+        Contents of the CSV file.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Parsed table.
+    """
+    if name == 'recommendation':
+        return pd.read_csv(BytesIO(b), na_filter=False)
+    df = pd.read_csv(BytesIO(b))
+    if name == 'variant':
+        df.Chromosome = df.Chromosome.astype(str)
+    return df
+
+def build_index(tables):
+    """
+    Index the tables for the lookups of :mod:`api.core`.
+
+    The index only contains built-in types so that it can be pickled into
+    the snapshot. Records of the gene, allele, and variant tables are stored
+    as plain tuples under 'Records', along with the column names, and the
+    other entries refer to them by row number.
+
+    Parameters
+    ----------
+    tables : dict
+        Mapping of table name to pandas.DataFrame.
+
+    Returns
+    -------
+    dict
+        Index of the tables.
+    """
+    index = {'Records': {}}
+    for name in ['gene', 'allele', 'variant']:
+        df = tables[name]
+        index['Records'][name] = (list(df.columns),
+            list(df.itertuples(index=False, name=None)))
+
+    df = tables['gene']
+    index['genes'] = {x: i for i, x in enumerate(df.Gene)}
+    index['gene_lists'] = {
+        'target': tuple(df[df.Target].Gene),
+        'control': tuple(df[df.Control].Gene),
+        'all': tuple(df.Gene),
+    }
+
+    df = tables['allele']
+    alleles = {}
+    allele_records = {}
+    allele_variants = {}
+    for i, r in enumerate(df.itertuples(index=False)):
+        alleles.setdefault(r.Gene, []).append(r.StarAllele)
+        if (r.Gene, r.StarAllele) in allele_records:
+            continue
+        allele_records[(r.Gene, r.StarAllele)] = i
+        for assembly in ASSEMBLIES:
+            allele_variants[(r.Gene, r.StarAllele, assembly)] = (
+                _split_variants(getattr(r, f'{assembly}Core')),
+                _split_variants(getattr(r, f'{assembly}Tag')),
+            )
+    index['alleles'] = {k: tuple(v) for k, v in alleles.items()}
+    index['allele_records'] = allele_records
+    index['allele_variants'] = allele_variants
+    functions = {None: tuple(df.Function.unique())}
+    for gene, group in df.groupby('Gene', sort=False):
+        functions[gene] = tuple(group.Function.unique())
+    index['functions'] = functions
+
+    df = tables['variant']
+    variants = {}
+    variant_records = {}
+    synonyms = {}
+    for i, r in enumerate(df.itertuples(index=False)):
+        for assembly in ASSEMBLIES:
+            name = getattr(r, f'{assembly}Name')
+            if not pd.isna(name):
+                variants.setdefault(name, i)
+                variant_records.setdefault((r.Gene, assembly, name), i)
+            d = synonyms.setdefault((r.Gene, assembly), {})
+            synonym = getattr(r, f'{assembly}Synonym')
+            if pd.isna(synonym):
+                continue
+            for x in synonym.split(','):
+                d[x] = name
+    index['variants'] = variants
+    index['variant_records'] = variant_records
+    index['synonyms'] = synonyms
+
+    df = tables['phenotype']
+    phenotypes = {None: tuple(sorted(df.Phenotype.unique()))}
+    for gene, group in df.groupby('Gene', sort=False):
+        phenotypes[gene] = tuple(sorted(group.Phenotype.unique()))
+    index['phenotypes'] = phenotypes
+    priorities = {}
+    for r in df.itertuples(index=False):
+        priorities.setdefault((r.Gene, r.Phenotype), r.Priority)
+    index['priorities'] = priorities
+
+    return index
+
+class SnapshotTables(collections.abc.Mapping):
+    """
+    Read-only mapping of table name to pandas.DataFrame that unpickles each
+    table of the snapshot on first access.
+
+    Parameters
+    ----------
+    pickles : dict
+        Mapping of table name to the pickled columns of the table (see
+        :func:`write_snapshot`).
+    """
+
+    def __init__(self, pickles):
+        self._pickles = pickles
+        self._tables = {}
+
+    def __getitem__(self, name):
+        if name not in self._tables:
+            df = pd.DataFrame(pickle.loads(self._pickles[name]))
+            self._tables.setdefault(name, df)
+        return self._tables[name]
+
+    def __iter__(self):
+        return iter(self._pickles)
+
+    def __len__(self):
+        return len(self._pickles)
+
+def read_index():
+    """
+    Read the index and the tables, from the snapshot when it is up to date.
+
+    Returns
+    -------
+    dict
+        Index of the tables (see :func:`build_index`).
+    collections.abc.Mapping
+        Mapping of table name to pandas.DataFrame.
+    """
+    contents = None
+
+    try:
+        b = pkgutil.get_data(__name__, SNAPSHOT)
+    except OSError:
+        b = None
+
+    if b is not None:
+        try:
+            snapshot = pickle.loads(b)
+        except Exception:
+            snapshot = None
+        if (isinstance(snapshot, dict) and
+            snapshot.get('Version') == SNAPSHOT_VERSION):
+            # The CSV files are only hashed when their sizes or
+            # modification times differ from those in the snapshot (e.g. a
+            # copy of the files with new timestamps).
+            stats = _stat_tables(pathlib.Path(__file__).parent)
+            if stats is None or stats != snapshot['Stats']:
+                contents = _read_contents()
+                checksums = {k: _checksum(v) for k, v in contents.items()}
+            if contents is None or checksums == snapshot['Checksums']:
+                return snapshot['Index'], SnapshotTables(snapshot['Tables'])
+        warnings.warn(f'Ignoring outdated {SNAPSHOT}, parsing CSV tables')
+
+    if contents is None:
+        contents = _read_contents()
+    tables = {k: parse_table(k, v) for k, v in contents.items()}
+    return build_index(tables), tables
+
+def write_snapshot(path=None, output=None):
+    """
+    Compile the CSV tables into a binary snapshot.
+
+    Each table is stored as a dictionary of column lists, from which
+    pandas infers the same dtypes as when parsing the CSV file.
+
+    Parameters
+    ----------
+    path : str, optional
+        Directory containing the CSV tables. By default, use the directory of
+        this subpackage.
+    output : str, optional
+        Output snapshot file. By default, write ``tables.pkl`` into ``path``.
+    """
+    path = pathlib.Path(__file__).parent if path is None else pathlib.Path(path)
+    output = path / SNAPSHOT if output is None else pathlib.Path(output)
+    contents = {x: (path / f'{x}-table.csv').read_bytes() for x in TABLES}
+    tables = {k: parse_table(k, v) for k, v in contents.items()}
+    snapshot = {
+        'Version': SNAPSHOT_VERSION,
+        'Stats': _stat_tables(path),
+        'Checksums': {k: _checksum(v) for k, v in contents.items()},
+        'Index': build_index(tables),
+        'Tables': {k: pickle.dumps({x: v[x].tolist() for x in v.columns},
+            protocol=pickle.HIGHEST_PROTOCOL) for k, v in tables.items()},
+    }
+    with open(output, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
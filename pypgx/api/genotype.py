@@ -606,13 +606,13 @@ def call_genotypes(alleles=None, cnv_calls=None):
     }
 
     if isinstance(alleles, str):
-        alleles = sdk.Archive.from_file(alleles)
+        alleles = sdk.Archive.from_file(alleles, lazy=True)
 
     if alleles is not None:
         alleles.check_type('SampleTable[Alleles]')
 
     if isinstance(cnv_calls, str):
-        cnv_calls = sdk.Archive.from_file(cnv_calls)
+        cnv_calls = sdk.Archive.from_file(cnv_calls, lazy=True)
 
     if cnv_calls is not None:
         cnv_calls.check_type('SampleTable[CNVCalls]')
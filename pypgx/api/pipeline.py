@@ -13,7 +13,8 @@ from . import utils, plot, genotype, core
 
 def run_chip_pipeline(
     gene, output, variants, assembly='GRCh37', panel=None, impute=False,
-    force=False, samples=None, exclude=False
+    force=False, samples=None, exclude=False, compression=None,
+    compression_level=None, compression_threads=None
 ):
     """
     Run genotyping pipeline for chip data.
@@ -44,10 +45,20 @@ def run_chip_pipeline(
         you can provide a list of samples.
     exclude : bool, default: False
         If True, exclude specified samples.
+    compression : str, optional
+        Compression codec of output archives. See
+        :meth:`sdk.utils.Archive.to_file` for details.
+    compression_level : int, optional
+        Compression level of output archives.
+    compression_threads : int, optional
+        Number of threads used to deflate output archives.
     """
     if not core.is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
+    options = dict(compression=compression, level=compression_level,
+        threads=compression_threads)
+
     if os.path.exists(output) and force:
         shutil.rmtree(output)
 
@@ -55,7 +66,7 @@ def run_chip_pipeline(
 
     imported_variants = utils.import_variants(gene, variants,
         assembly=assembly, platform='Chip', samples=samples, exclude=exclude)
-    imported_variants.to_file(f'{output}/imported-variants.zip')
+    imported_variants.to_file(f'{output}/imported-variants.zip', **options)
 
     # Skip statistical phasing if input VCF is already fully phased.
     if imported_variants.type == 'VcfFrame[Consolidated]':
@@ -63,26 +74,27 @@ def run_chip_pipeline(
     else:
         phased_variants = utils.estimate_phase_beagle(
             imported_variants, panel=panel, impute=impute)
-        phased_variants.to_file(f'{output}/phased-variants.zip')
+        phased_variants.to_file(f'{output}/phased-variants.zip', **options)
         consolidated_variants = utils.create_consolidated_vcf(
             imported_variants, phased_variants)
         consolidated_variants.to_file(
-            f'{output}/consolidated-variants.zip')
+            f'{output}/consolidated-variants.zip', **options)
 
     alleles = utils.predict_alleles(consolidated_variants)
-    alleles.to_file(f'{output}/alleles.zip')
+    alleles.to_file(f'{output}/alleles.zip', **options)
     genotypes = genotype.call_genotypes(alleles=alleles)
-    genotypes.to_file(f'{output}/genotypes.zip')
+    genotypes.to_file(f'{output}/genotypes.zip', **options)
     phenotypes = utils.call_phenotypes(genotypes)
-    phenotypes.to_file(f'{output}/phenotypes.zip')
+    phenotypes.to_file(f'{output}/phenotypes.zip', **options)
     results = utils.combine_results(
         genotypes=genotypes, phenotypes=phenotypes, alleles=alleles
     )
-    results.to_file(f'{output}/results.zip')
+    results.to_file(f'{output}/results.zip', **options)
 
 def run_long_read_pipeline(
     gene, output, variants, assembly='GRCh37', force=False, samples=None,
-    exclude=False
+    exclude=False, compression=None, compression_level=None,
+    compression_threads=None
 ):
     """
     Run genotyping pipeline for long-read sequencing data.
@@ -106,10 +118,20 @@ def run_long_read_pipeline(
         you can provide a list of samples.
     exclude : bool, default: False
         If True, exclude specified samples.
+    compression : str, optional
+        Compression codec of output archives. See
+        :meth:`sdk.utils.Archive.to_file` for details.
+    compression_level : int, optional
+        Compression level of output archives.
+    compression_threads : int, optional
+        Number of threads used to deflate output archives.
     """
     if not core.is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
+    options = dict(compression=compression, level=compression_level,
+        threads=compression_threads)
+
     if os.path.exists(output) and force:
         shutil.rmtree(output)
 
@@ -118,24 +140,26 @@ def run_long_read_pipeline(
     consolidated_variants = utils.import_variants(gene, variants,
         assembly=assembly, platform='LongRead', samples=samples,
         exclude=exclude)
-    consolidated_variants.to_file(f'{output}/consolidated-variants.zip')
+    consolidated_variants.to_file(f'{output}/consolidated-variants.zip',
+        **options)
     alleles = utils.predict_alleles(consolidated_variants)
-    alleles.to_file(f'{output}/alleles.zip')
+    alleles.to_file(f'{output}/alleles.zip', **options)
     genotypes = genotype.call_genotypes(alleles=alleles)
-    genotypes.to_file(f'{output}/genotypes.zip')
+    genotypes.to_file(f'{output}/genotypes.zip', **options)
     phenotypes = utils.call_phenotypes(genotypes)
-    phenotypes.to_file(f'{output}/phenotypes.zip')
+    phenotypes.to_file(f'{output}/phenotypes.zip', **options)
     results = utils.combine_results(
         genotypes=genotypes, phenotypes=phenotypes, alleles=alleles
     )
-    results.to_file(f'{output}/results.zip')
+    results.to_file(f'{output}/results.zip', **options)
 
 def run_ngs_pipeline(
     gene, output, variants=None, depth_of_coverage=None,
     control_statistics=None, platform='WGS', assembly='GRCh37', panel=None,
     force=False, samples=None, exclude=False, samples_without_sv=None,
     do_not_plot_copy_number=False, do_not_plot_allele_fraction=False,
-    cnv_caller=None
+    cnv_caller=None, compression=None, compression_level=None,
+    compression_threads=None
 ):
     """
     Run genotyping pipeline for NGS data.
@@ -186,10 +210,20 @@ def run_ngs_pipeline(
         Archive file or object with the semantic type Model[CNV]. By default,
         a pre-trained CNV caller in the ``pypgx-bundle`` directory will be
         used.
+    compression : str, optional
+        Compression codec of output archives. See
+        :meth:`sdk.utils.Archive.to_file` for details.
+    compression_level : int, optional
+        Compression level of output archives.
+    compression_threads : int, optional
+        Number of threads used to deflate output archives.
     """
     if not core.is_target_gene(gene):
         raise sdk.utils.NotTargetGeneError(gene)
 
+    options = dict(compression=compression, level=compression_level,
+        threads=compression_threads)
+
     gene_table = core.load_gene_table()
     small_var = gene_table[gene_table.Gene == gene].Variants.values[0]
     large_var = gene_table[gene_table.Gene == gene].SV.values[0]
@@ -230,7 +264,8 @@ def run_ngs_pipeline(
         imported_variants = utils.import_variants(gene, variants,
             assembly=assembly, platform=platform, samples=samples,
             exclude=exclude)
-        imported_variants.to_file(f'{output}/imported-variants.zip')
+        imported_variants.to_file(f'{output}/imported-variants.zip',
+            **options)
 
         # Skip statistical phasing if input VCF is already fully phased.
         if imported_variants.type == 'VcfFrame[Consolidated]':
@@ -238,14 +273,15 @@ def run_ngs_pipeline(
         else:
             phased_variants = utils.estimate_phase_beagle(
                 imported_variants, panel=panel)
-            phased_variants.to_file(f'{output}/phased-variants.zip')
+            phased_variants.to_file(f'{output}/phased-variants.zip',
+                **options)
             consolidated_variants = utils.create_consolidated_vcf(
                 imported_variants, phased_variants)
             consolidated_variants.to_file(
-                f'{output}/consolidated-variants.zip')
+                f'{output}/consolidated-variants.zip', **options)
 
         alleles = utils.predict_alleles(consolidated_variants)
-        alleles.to_file(f'{output}/alleles.zip')
+        alleles.to_file(f'{output}/alleles.zip', **options)
 
         if not do_not_plot_allele_fraction:
             if imported_variants.data.empty:
@@ -264,7 +300,8 @@ def run_ngs_pipeline(
 
     if large_var and depth_of_coverage is not None:
         if isinstance(depth_of_coverage, str):
-            depth_of_coverage = sdk.Archive.from_file(depth_of_coverage)
+            depth_of_coverage = sdk.Archive.from_file(
+                depth_of_coverage, lazy=True)
 
         depth_of_coverage.check_type('CovFrame[DepthOfCoverage]')
         depth_of_coverage.check_metadata('Platform', platform)
@@ -274,24 +311,25 @@ def run_ngs_pipeline(
             raise ValueError('SV detection requires SampleTable[Statistics]')
 
         if isinstance(control_statistics, str):
-            control_statistics = sdk.Archive.from_file(control_statistics)
-
-        if samples is not None:
-            control_statistics = utils.filter_samples(control_statistics,
-                samples=samples, exclude=exclude)
+            control_statistics = sdk.Archive.from_file(
+                control_statistics, lazy=True)
 
         control_statistics.check_type('SampleTable[Statistics]')
         control_statistics.check_metadata('Platform', platform)
         control_statistics.check_metadata('Assembly', assembly)
 
+        if samples is not None:
+            control_statistics = utils.filter_samples(control_statistics,
+                samples=samples, exclude=exclude)
+
         read_depth = utils.import_read_depth(gene, depth_of_coverage,
             samples=samples, exclude=exclude)
-        read_depth.to_file(f'{output}/read-depth.zip')
+        read_depth.to_file(f'{output}/read-depth.zip', **options)
         copy_number = utils.compute_copy_number(read_depth,
             control_statistics, samples_without_sv=samples_without_sv)
-        copy_number.to_file(f'{output}/copy-number.zip')
+        copy_number.to_file(f'{output}/copy-number.zip', **options)
         cnv_calls = utils.predict_cnv(copy_number, cnv_caller=cnv_caller)
-        cnv_calls.to_file(f'{output}/cnv-calls.zip')
+        cnv_calls.to_file(f'{output}/cnv-calls.zip', **options)
         if not do_not_plot_copy_number:
             os.mkdir(f'{output}/copy-number-profile')
             plot.plot_bam_copy_number(
@@ -299,11 +337,11 @@ def run_ngs_pipeline(
             )
 
     genotypes = genotype.call_genotypes(alleles=alleles, cnv_calls=cnv_calls)
-    genotypes.to_file(f'{output}/genotypes.zip')
+    genotypes.to_file(f'{output}/genotypes.zip', **options)
     phenotypes = utils.call_phenotypes(genotypes)
-    phenotypes.to_file(f'{output}/phenotypes.zip')
+    phenotypes.to_file(f'{output}/phenotypes.zip', **options)
     results = utils.combine_results(
         genotypes=genotypes, phenotypes=phenotypes, alleles=alleles,
         cnv_calls=cnv_calls
     )
-    results.to_file(f'{output}/results.zip')
+    results.to_file(f'{output}/results.zip', **options)
@@ -126,7 +126,8 @@ def plot_bam_copy_number(
         Output type depends on ``path``.
     """
     if isinstance(copy_number, str):
-        copy_number = sdk.Archive.from_file(copy_number)
+        copy_number = sdk.Archive.from_file(copy_number, lazy=True,
+            mmap=True)
 
     copy_number.check_type('CovFrame[CopyNumber]')
 
@@ -205,7 +206,7 @@ def plot_bam_read_depth(
     """
 
     if isinstance(read_depth, str):
-        read_depth = sdk.Archive.from_file(read_depth)
+        read_depth = sdk.Archive.from_file(read_depth, lazy=True)
 
     read_depth.check_type('CovFrame[ReadDepth]')
 
@@ -288,12 +289,12 @@ def plot_cn_af(
         Output type depends on ``path``.
     """
     if isinstance(copy_number, str):
-        copy_number = sdk.Archive.from_file(copy_number)
+        copy_number = sdk.Archive.from_file(copy_number, lazy=True)
 
     copy_number.check_type('CovFrame[CopyNumber]')
 
     if isinstance(imported_variants, str):
-        imported_variants = sdk.Archive.from_file(imported_variants)
+        imported_variants = sdk.Archive.from_file(imported_variants, lazy=True)
 
     imported_variants.check_type(
         ['VcfFrame[Imported]', 'VcfFrame[Consolidated]'])
@@ -373,7 +374,7 @@ def plot_vcf_allele_fraction(
         Output type depends on ``path``.
     """
     if isinstance(imported_variants, str):
-        imported_variants = sdk.Archive.from_file(imported_variants)
+        imported_variants = sdk.Archive.from_file(imported_variants, lazy=True)
 
     imported_variants.check_type(
         ['VcfFrame[Imported]', 'VcfFrame[Consolidated]'])
@@ -11,6 +11,8 @@ import os
 import sys
 import pickle
 import warnings
+import functools
+from concurrent.futures import ProcessPoolExecutor
 
 from . import core
 from .. import sdk
@@ -44,22 +46,30 @@ def _phase_extension(vf, gene, assembly):
     have the most overlapping with the *2 allele, then PE will assign the
     phase of the variant of interest to '0|1'.
     """
-    anchors = {}
+    definitions = core.get_allele_definitions(gene, assembly=assembly)
+
+    # For each sample and haplotype, count how many times each defining
+    # variant was observed as an anchor variant.
+    anchors = {x: np.zeros((2, len(definitions.variants)), dtype=int)
+        for x in vf.samples}
 
     for i, r in vf.df.iterrows():
         for allele in r.ALT.split(','):
             variant = f'{r.CHROM}-{r.POS}-{r.REF}-{allele}'
+            if variant not in definitions.variant_index:
+                continue
+            k = definitions.variant_index[variant]
             for sample in vf.samples:
-                if sample not in anchors:
-                    anchors[sample] = [[], []]
                 gt = r[sample].split(':')[0]
                 if '|' not in gt:
                     continue
                 gt = gt.split('|')
                 if gt[0] != '0':
-                    anchors[sample][0].append(variant)
+                    anchors[sample][0][k] += 1
                 if gt[1] != '0':
-                    anchors[sample][1].append(variant)
+                    anchors[sample][1][k] += 1
+
+    defined = (definitions.core | definitions.tag).astype(int)
 
     variant_synonyms = core.get_variant_synonyms(gene, assembly=assembly)
 
@@ -89,16 +99,15 @@ def _phase_extension(vf, gene, assembly):
                 if variant in variant_synonyms:
                     variant = variant_synonyms[variant]
 
-                star_alleles = core.list_alleles(gene, variants=variant, assembly=assembly)
+                if variant not in definitions.variant_index:
+                    continue
+
+                # Star alleles carrying the variant as a part of definition.
+                star_alleles = defined[:, definitions.variant_index[variant]] > 0
 
                 for j in [0, 1]:
-                    for star_allele in star_alleles:
-                        score = 0
-                        for x in anchors[sample][j]:
-                            if x in core.list_variants(gene, alleles=star_allele, assembly=assembly, mode='all'):
-                                score += 1
-                        if score > scores[i][j]:
-                            scores[i][j] = score
+                    score = defined[star_alleles] @ anchors[sample][j]
+                    scores[i][j] = max(scores[i][j], int(score.max()))
 
             a = scores[0][0]
             b = scores[0][1]
@@ -138,26 +147,422 @@ def _phase_extension(vf, gene, assembly):
 
     return pyvcf.VcfFrame([], vf.df.apply(one_row, axis=1))
 
+@functools.lru_cache(maxsize=None)
+def _load_cnv_caller(fn, size, mtime):
+    # Bundle models are loaded once per process; the size and modification
+    # time of the file are part of the key so that updates are picked up.
+    # Only the metadata items and the model are cached.
+    archive = sdk.Archive.from_file(fn)
+    return tuple(archive.metadata.items()), archive.data
+
+def _get_bundle_cnv_caller(gene, assembly):
+    # Each call returns a new Archive so that changes made by the caller
+    # (e.g. to its metadata) do not leak into the cache.
+    fn = os.path.realpath(f'{sdk.get_bundle_path()}/cnv/{assembly}/{gene}.zip')
+    stat = os.stat(fn)
+    metadata, model = _load_cnv_caller(fn, stat.st_size, stat.st_mtime_ns)
+    return sdk.Archive(dict(metadata), model)
+
+def _get_bin_size(archive):
+    # Archives without the BinSize metadata key store per-base data.
+    return int(archive.metadata.get('BinSize', 1))
+
+def _check_bin_size(bin_size):
+    if bin_size is not None and bin_size < 1:
+        raise ValueError(f'Incorrect bin size: {bin_size}')
+
+def _bin_depth(df, bin_size):
+    # Average read depth over genome-aligned bins of bin_size bp, each bin
+    # being represented by its first position. Missing values are ignored.
+    if df.empty:
+        return df
+    chroms = df.Chromosome.to_numpy()
+    bins = (df.Position.to_numpy(dtype=np.int64) - 1) // bin_size
+    starts = np.flatnonzero(np.r_[True,
+        (bins[1:] != bins[:-1]) | (chroms[1:] != chroms[:-1])])
+    values = df.iloc[:, 2:].to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(present, values, 0), starts, axis=0)
+    counts = np.add.reduceat(present.astype(np.int64), starts, axis=0)
+    with np.errstate(invalid='ignore'):
+        means = sums / counts
+    result = pd.DataFrame(means, columns=df.columns[2:])
+    result.insert(0, 'Position', bins[starts] * bin_size + 1)
+    result.insert(0, 'Chromosome', chroms[starts])
+    return result
+
+def _unbin_copy_number(copy_number):
+    # Expand binned copy number to every position of the gene region, for
+    # CNV callers trained on per-base data such as those in the bundle.
+    region = core.get_region(copy_number.metadata['Gene'],
+        assembly=copy_number.metadata['Assembly'])
+    chrom, start, end = common.parse_region(region)
+    bin_size = _get_bin_size(copy_number)
+    df = copy_number.data.df
+    positions = np.arange(start, end + 1)
+    bins = (positions - 1) // bin_size * bin_size + 1
+    df = df.set_index('Position').drop(columns='Chromosome').reindex(bins)
+    df.insert(0, 'Position', positions)
+    df.insert(0, 'Chromosome', copy_number.data.df.Chromosome.iat[0])
+    metadata = copy_number.copy_metadata()
+    del metadata['BinSize']
+    return sdk.Archive(metadata, pycov.CovFrame(df.reset_index(drop=True)))
+
+def _match_bin_size(copy_number, cnv_caller):
+    # CNV callers trained on per-base data, such as those in the bundle, get
+    # binned copy number expanded back to every position of the gene region.
+    if 'BinSize' not in cnv_caller.metadata and 'BinSize' in copy_number.metadata:
+        return _unbin_copy_number(copy_number)
+    sizes = [_get_bin_size(x) for x in [cnv_caller, copy_number]]
+    if sizes[0] != sizes[1]:
+        types = [x.metadata['SemanticType'] for x in [cnv_caller, copy_number]]
+        raise sdk.utils.IncorrectMetadataError(
+            f"Archives {types} have 'BinSize'={sizes}, respectively")
+    return copy_number
+
 def _process_copy_number(copy_number):
     df = copy_number.data.copy_df()
     region = core.get_region(copy_number.metadata['Gene'], assembly=copy_number.metadata['Assembly'])
     chrom, start, end = common.parse_region(region)
+    bin_size = _get_bin_size(copy_number)
 
-    if (end - start + 1) > copy_number.data.shape[0]:
-        temp = pd.DataFrame.from_dict({'Temp': range(int(df.Position.iat[0]-1), int(df.Position.iat[-1])+1)})
+    if (end - start + 1) > copy_number.data.shape[0] * bin_size:
+        temp = pd.DataFrame.from_dict({'Temp': range(int(df.Position.iat[0]-bin_size), int(df.Position.iat[-1])+1, bin_size)})
         temp = temp.merge(df, left_on='Temp', right_on='Position', how='outer')
         df = temp.drop(columns='Temp')
 
-    df = df.fillna(method='ffill')
-    df = df.fillna(method='bfill')
+    df = df.ffill()
+    df = df.bfill()
 
-    df.iloc[:, 2:] = df.iloc[:, 2:].apply(lambda c: median_filter(c, size=1000), axis=0)
+    # The median filter spans about 1,000 bp regardless of the bin size.
+    size = max(1, 1000 // bin_size)
+    df.iloc[:, 2:] = df.iloc[:, 2:].apply(lambda c: median_filter(c, size=size), axis=0)
 
     if df.isnull().values.any():
         raise ValueError('Missing values detected')
 
     return sdk.Archive(copy_number.copy_metadata(), pycov.CovFrame(df))
 
+def _overlaps_bed(bf, chroms, positions):
+    # Vectorized form of the overlap query of CovFrame.mask_bed, which keeps
+    # positions with Start <= Position < End for any interval of the BED
+    # data. The 'chr' prefix in contig names is ignored.
+    result = np.zeros(len(positions), dtype=bool)
+    chroms = pd.Series(chroms).str.replace('chr', '').to_numpy()
+    df = bf.gr.df
+    df = df.assign(Chromosome=df.Chromosome.astype(str).str.replace('chr', ''))
+    for chrom, intervals in df.groupby('Chromosome'):
+        i = chroms == chrom
+        if not i.any():
+            continue
+        intervals = intervals.sort_values('Start')
+        starts = intervals.Start.to_numpy()
+        ends = np.maximum.accumulate(intervals.End.to_numpy())
+        j = np.searchsorted(starts, positions[i], side='right') - 1
+        result[i] = (j >= 0) & (ends[np.maximum(j, 0)] > positions[i])
+    return result
+
+def _mask_bed(cf, bf):
+    # Keep only the probed regions of targeted sequencing data, giving the
+    # same result as CovFrame.mask_bed(opposite=True).
+    df = cf.df.copy()
+    keep = _overlaps_bed(bf, df.Chromosome.to_numpy(),
+        df.Position.to_numpy())
+    if not keep.all():
+        columns = df.columns[2:]
+        df[columns] = df[columns].astype(float)
+        df.loc[~keep, columns] = np.nan
+    return pycov.CovFrame(df)
+
+def _imap_bams(func, bams, n_jobs, *args):
+    # Apply func to each BAM file, in a pool of n_jobs processes if n_jobs > 1,
+    # and yield the results in input order as they become available.
+    if n_jobs < 1:
+        raise ValueError(f'Incorrect number of jobs: {n_jobs}')
+    if n_jobs == 1:
+        for bam in bams:
+            yield func(bam, *args)
+        return
+    with ProcessPoolExecutor(min(n_jobs, len(bams))) as executor:
+        yield from executor.map(func, bams,
+            *[[x] * len(bams) for x in args])
+
+def _map_bams(func, bams, n_jobs, *args):
+    return list(_imap_bams(func, bams, n_jobs, *args))
+
+def _has_mixed_chr_prefix(bams):
+    # CovFrame.from_bam only adds the 'chr' prefix to regions when all BAM
+    # files have it, so mixed inputs must be read in a single call.
+    return len(set([pybam.has_chr_prefix(x) for x in bams])) > 1
+
+def _merge_depth(dfs, regions):
+    # Merge the per-sample read depth of BAM files read separately into the
+    # CovFrame that a single CovFrame.from_bam call would return.
+    coords = dfs[0][['Chromosome', 'Position']]
+    if all([x[['Chromosome', 'Position']].equals(coords) for x in dfs[1:]]):
+        df = pd.concat([coords] + [x.iloc[:, 2:] for x in dfs], axis=1)
+        return pycov.CovFrame(df)
+    # Without zero depth, each BAM file reports different positions. Those
+    # missing from a BAM file have zero depth, and positions are ordered by
+    # region and then coordinate as samtools does. Each sample keeps its
+    # dtype, so float read depth is not truncated.
+    dfs = [x.set_index(['Chromosome', 'Position']) for x in dfs]
+    dtypes = {k: v for x in dfs for k, v in x.dtypes.items()}
+    df = pd.concat(dfs, axis=1).fillna(0).astype(dtypes).reset_index()
+    if isinstance(regions, str):
+        regions = [regions]
+    contigs = [x.split(':')[0].replace('chr', '') for x in
+        common.sort_regions(regions)]
+    order = df.Chromosome.str.replace('chr', '').map(
+        {x: i for i, x in reversed(list(enumerate(contigs)))})
+    df = df.assign(Order=order).sort_values(['Order', 'Position'],
+        kind='stable').drop(columns='Order').reset_index(drop=True)
+    return pycov.CovFrame(df)
+
+# Unmapped, secondary, QC-failed, and duplicate reads are skipped by default,
+# as with samtools depth.
+_DEFAULT_FLAG_FILTER = 0x704
+
+def _get_depth_options(engine, min_mapq, flag_filter, hts_threads):
+    # Check the options of read depth computation, which are given to each
+    # worker as a dictionary.
+    if engine not in ['samtools', 'pysam']:
+        raise ValueError(f'Incorrect engine: {engine}')
+    if hts_threads < 1:
+        raise ValueError(f'Incorrect number of threads: {hts_threads}')
+    if engine == 'samtools' and (flag_filter != _DEFAULT_FLAG_FILTER or
+        hts_threads != 1):
+        raise ValueError(
+            "Arguments 'flag_filter' and 'hts_threads' require engine='pysam'")
+    return {'engine': engine, 'min_mapq': min_mapq,
+        'flag_filter': flag_filter, 'hts_threads': hts_threads}
+
+def _get_control_region(control, assembly):
+    # Region of the control gene, or the control itself if it is a custom
+    # region.
+    if control in core.list_genes(mode='all'):
+        return core.get_region(control, assembly=assembly)
+    return control
+
+def _get_sample_name(bam):
+    # Same as CovFrame.from_bam: the SM tag, or the file name if missing.
+    samples = pybam.tag_sm(bam)
+    if not samples:
+        basename = os.path.splitext(os.path.basename(bam))[0]
+        warnings.warn(f'SM tags were not found for {bam}, will use file '
+            f'name as sample name ({basename})')
+        return basename
+    if len(samples) > 1:
+        raise ValueError(f'multiple sample names detected: {bam}')
+    return samples[0]
+
+def _empty_depth(name):
+    return pd.DataFrame({'Chromosome': pd.Series(dtype=str),
+        'Position': pd.Series(dtype=int), name: pd.Series(dtype=int)})
+
+def _count_coverage(starts, ends, offset, size):
+    # Number of intervals [start, end) covering each of size positions after
+    # offset, with 0-based coordinates.
+    starts = np.clip(np.asarray(starts, dtype=np.int64) - offset, 0, size)
+    ends = np.clip(np.asarray(ends, dtype=np.int64) - offset, 0, size)
+    return np.cumsum(np.bincount(starts, minlength=size + 1) -
+        np.bincount(ends, minlength=size + 1))[:-1]
+
+def _count_depth(
+    bam, queries, chr_prefix, min_mapq=0, flag_filter=_DEFAULT_FLAG_FILTER,
+    hts_threads=1
+):
+    # Count read depth of a BAM file in the same way as samtools depth, but
+    # in process: the aligned blocks of reads fetched from each region are
+    # accumulated into a NumPy array as the differences at their ends. Like
+    # samtools depth, deletions and reference skips are not counted, but
+    # without zero depth they are still reported. Each query is a pair of
+    # regions and zero, and all of them are answered with one open file.
+    name = _get_sample_name(bam)
+    results = []
+    with pysam.AlignmentFile(bam, threads=hts_threads) as f:
+        bam_prefix = 'chr' if pybam.has_chr_prefix(bam) else ''
+        for regions, zero in queries:
+            if isinstance(regions, str):
+                regions = [regions]
+            chroms, positions, depths = [], [], []
+            for region in common.sort_regions(regions):
+                chrom, start, end = common.parse_region(region)
+                contig = bam_prefix + chrom.replace('chr', '')
+                if f.get_tid(contig) < 0:
+                    continue
+                length = f.get_reference_length(contig)
+                start = 1 if pd.isna(start) else int(start)
+                end = length if pd.isna(end) else min(int(end), length)
+                if start > end:
+                    continue
+                starts, ends, spans = [], [], []
+                for read in f.fetch(contig, start - 1, end):
+                    if (read.flag & flag_filter or
+                        read.mapping_quality < min_mapq or
+                        read.reference_end is None):
+                        continue
+                    for block in read.get_blocks():
+                        starts.append(block[0])
+                        ends.append(block[1])
+                    spans.append((read.reference_start, read.reference_end))
+                spans = np.array(spans, dtype=np.int64).reshape(-1, 2)
+                # Without zero depth, only the span of the reads is counted.
+                if not zero:
+                    if not len(spans):
+                        continue
+                    start = max(start, int(spans[:, 0].min()) + 1)
+                    end = min(end, int(spans[:, 1].max()))
+                offset, size = start - 1, end - start + 1
+                depth = _count_coverage(starts, ends, offset, size)
+                position = np.arange(start, end + 1)
+                if not zero:
+                    covered = _count_coverage(spans[:, 0], spans[:, 1],
+                        offset, size) > 0
+                    position, depth = position[covered], depth[covered]
+                chroms.append(np.full(len(position),
+                    chr_prefix + chrom.replace('chr', ''), dtype=object))
+                positions.append(position)
+                depths.append(depth)
+            if not positions:
+                results.append(_empty_depth(name))
+                continue
+            results.append(pd.DataFrame({
+                'Chromosome': np.concatenate(chroms),
+                'Position': np.concatenate(positions),
+                name: np.concatenate(depths)}))
+    return results
+
+def _with_chr_prefix(options, bams):
+    # Like CovFrame.from_bam, contig names have the 'chr' prefix only when
+    # all BAM files have it.
+    prefix = 'chr' if all([pybam.has_chr_prefix(x) for x in bams]) else ''
+    return dict(options, chr_prefix=prefix)
+
+def _read_depths_one(bam, queries, options=None):
+    # Read depth of a BAM file for each pair of regions and zero. The pysam
+    # engine opens the file once for all of them, whereas samtools depth is
+    # run once per region.
+    if options is None or options['engine'] == 'samtools':
+        min_mapq = 0 if options is None else options['min_mapq']
+        dfs = []
+        for regions, zero in queries:
+            try:
+                dfs.append(pycov.CovFrame.from_bam([bam], regions=regions,
+                    zero=zero, map_qual=min_mapq).df)
+            except pd.errors.EmptyDataError:
+                # samtools depth reports nothing for a BAM file without
+                # reads in the regions, unless zero depth is requested.
+                dfs.append(_empty_depth(_get_sample_name(bam)))
+        return dfs
+    return _count_depth(bam, queries, options['chr_prefix'],
+        min_mapq=options['min_mapq'], flag_filter=options['flag_filter'],
+        hts_threads=options['hts_threads'])
+
+def _read_depth_one(bam, regions, zero, bin_size=None, options=None):
+    df = _read_depths_one(bam, [(regions, zero)], options)[0]
+    if bin_size is not None:
+        df = _bin_depth(df, bin_size)
+    return df
+
+def _read_depth(bams, regions, zero, n_jobs=1, bin_size=None, options=None):
+    # Compute read depth with CovFrame.from_bam, one BAM file per worker
+    # process when n_jobs > 1. The per-sample columns are then merged in
+    # input order, which gives the same CovFrame as a single serial call.
+    # When binning, BAM files are always read one at a time so that only
+    # one sample is held at base resolution. The pysam engine always reads
+    # BAM files one at a time.
+    bams = common.parse_list_or_file(bams)
+    if options is None:
+        options = _get_depth_options('samtools', 0, _DEFAULT_FLAG_FILTER, 1)
+    if n_jobs < 1:
+        raise ValueError(f'Incorrect number of jobs: {n_jobs}')
+    if options['engine'] == 'samtools' and (_has_mixed_chr_prefix(bams) or
+        (bin_size is None and (n_jobs == 1 or len(bams) == 1))):
+        cf = pycov.CovFrame.from_bam(bams, regions=regions, zero=zero,
+            map_qual=options['min_mapq'])
+        if bin_size is not None:
+            cf = pycov.CovFrame(_bin_depth(cf.df, bin_size))
+        return cf
+    options = _with_chr_prefix(options, bams)
+    dfs = _map_bams(_read_depth_one, bams, n_jobs, regions, zero, bin_size,
+        options)
+    return _merge_depth(dfs, regions)
+
+def _count_depth_values(df, bf=None):
+    # Summarize the read depth of a BAM file in a region as the number of
+    # positions with each depth value, along with the positions themselves,
+    # optionally restricted to the probed regions of the BedFrame.
+    positions = df.Position.to_numpy(dtype=np.int64)
+    depth = df.iloc[:, 2].to_numpy(dtype=np.int64)
+    if bf is not None:
+        keep = _overlaps_bed(bf, df.Chromosome.to_numpy(), positions)
+        positions, depth = positions[keep], depth[keep]
+    return df.columns[2], np.bincount(depth, minlength=1), positions
+
+def _read_control_one(bam, region, bf=None, options=None):
+    return _count_depth_values(
+        _read_depth_one(bam, region, False, None, options), bf)
+
+def _read_sv_inputs_one(
+    bam, regions, control, bf=None, bin_size=None, options=None
+):
+    # Both the target regions and the control region of a BAM file are read
+    # by the same worker, through one open file with the pysam engine.
+    target, control = _read_depths_one(bam, [(regions, True),
+        (control, False)], options)
+    if bin_size is not None:
+        target = _bin_depth(target, bin_size)
+    return target, _count_depth_values(control, bf)
+
+def _describe_counts(counts):
+    # Statistics of DataFrame.describe() for the values 0, 1, 2, ... seen
+    # counts[0], counts[1], counts[2], ... times. Quantiles are linearly
+    # interpolated between ranks in the same way as NumPy.
+    n = int(counts.sum())
+    if n == 0:
+        return [0] + [np.nan] * 7
+    values = np.arange(len(counts))
+    mean = (values * counts).sum() / n
+    if n > 1:
+        std = np.sqrt(((values - mean) ** 2 * counts).sum() / (n - 1))
+    else:
+        std = np.nan
+    cumsum = np.cumsum(counts)
+    def quantile(q):
+        h = (n - 1) * q
+        i = int(np.floor(h))
+        a = np.searchsorted(cumsum, i, side='right')
+        b = np.searchsorted(cumsum, min(i + 1, n - 1), side='right')
+        t = h - i
+        if t >= 0.5:
+            return b - (b - a) * (1 - t)
+        return a + (b - a) * t
+    nonzero = np.flatnonzero(counts)
+    return [n, mean, std, nonzero[0], quantile(0.25), quantile(0.5),
+        quantile(0.75), nonzero[-1]]
+
+def _describe_depth(results):
+    # Compute the summary statistics of each sample from the output of
+    # _count_depth_values, one BAM file at a time. Only the counts of depth
+    # values are kept for each sample, so memory does not grow with the
+    # length of the region times the number of samples. As when BAM files
+    # are read together by samtools depth, positions reported for other
+    # samples have zero depth.
+    names, counts, sizes = [], [], []
+    union = np.array([], dtype=np.int64)
+    for name, count, positions in results:
+        union = np.union1d(union, positions)
+        names.append(name)
+        counts.append(count)
+        sizes.append(len(positions))
+    rows = []
+    for count, size in zip(counts, sizes):
+        count[0] += len(union) - size
+        rows.append(_describe_counts(count))
+    columns = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+    return pd.DataFrame(rows, index=names, columns=columns, dtype=float)
+
 ##################
 # Public methods #
 ##################
@@ -177,21 +582,22 @@ def call_phenotypes(genotypes):
         Archive object with the semantic type SampleTable[Phenotypes].
     """
     if isinstance(genotypes, str):
-        genotypes = sdk.Archive.from_file(genotypes)
+        genotypes = sdk.Archive.from_file(genotypes, lazy=True)
 
     genotypes.check_type('SampleTable[Genotypes]')
 
     gene = genotypes.metadata['Gene']
 
-    def one_row(r):
-        if r.Genotype == 'Indeterminate':
-            phenotype = 'Indeterminate'
-        else:
-            a1, a2 = r.Genotype.split('/')
-            phenotype = core.predict_phenotype(gene, a1, a2)
-        return phenotype
+    resolver = core._get_phenotype_resolver(gene)
 
-    data = genotypes.data.apply(one_row, axis=1).to_frame()
+    # Resolve each distinct genotype only once.
+    unique = [x for x in genotypes.data.Genotype.unique()
+        if x != 'Indeterminate']
+    phenotypes = dict(zip(unique,
+        resolver.resolve_many([tuple(x.split('/')) for x in unique])))
+    phenotypes['Indeterminate'] = 'Indeterminate'
+
+    data = genotypes.data.Genotype.map(phenotypes).to_frame()
     data.columns = ['Phenotype']
 
     metadata = {}
@@ -223,25 +629,25 @@ def combine_results(
         Archive object with the semantic type SampleTable[Results].
     """
     if isinstance(genotypes, str):
-        genotypes = sdk.Archive.from_file(genotypes)
+        genotypes = sdk.Archive.from_file(genotypes, lazy=True)
 
     if genotypes is not None:
         genotypes.check_type('SampleTable[Genotypes]')
 
     if isinstance(phenotypes, str):
-        phenotypes = sdk.Archive.from_file(phenotypes)
+        phenotypes = sdk.Archive.from_file(phenotypes, lazy=True)
 
     if phenotypes is not None:
         phenotypes.check_type('SampleTable[Phenotypes]')
 
     if isinstance(alleles, str):
-        alleles = sdk.Archive.from_file(alleles)
+        alleles = sdk.Archive.from_file(alleles, lazy=True)
 
     if alleles is not None:
         alleles.check_type('SampleTable[Alleles]')
 
     if isinstance(cnv_calls, str):
-        cnv_calls = sdk.Archive.from_file(cnv_calls)
+        cnv_calls = sdk.Archive.from_file(cnv_calls, lazy=True)
 
     if cnv_calls is not None:
         cnv_calls.check_type('SampleTable[CNVCalls]')
@@ -308,12 +714,12 @@ def compare_genotypes(first, second, verbose=False):
     Concordance: 1.000 (100/100)
     """
     if isinstance(first, str):
-        first = sdk.Archive.from_file(first)
+        first = sdk.Archive.from_file(first, lazy=True)
 
     first.check_type('SampleTable[Results]')
 
     if isinstance(second, str):
-        second = sdk.Archive.from_file(second)
+        second = sdk.Archive.from_file(second, lazy=True)
 
     second.check_type('SampleTable[Results]')
 
@@ -340,7 +746,8 @@ def compare_genotypes(first, second, verbose=False):
         show_comparison(col)
 
 def compute_control_statistics(
-    gene, bams, assembly='GRCh37', bed=None
+    gene, bams, assembly='GRCh37', bed=None, n_jobs=1, engine='samtools',
+    min_mapq=0, flag_filter=1796, hts_threads=1
 ):
     """
     Compute summary statistics for control gene from BAM files.
@@ -349,6 +756,12 @@ def compute_control_statistics(
     contig names (e.g. 'chr1' vs. '1') will be automatically added or removed
     as necessary to match the input BAM's contig names.
 
+    The statistics are those of :meth:`pandas.DataFrame.describe`. They are
+    computed from the number of positions with each read depth value, which
+    is counted as each BAM file is read, instead of from per-base read depth
+    for all samples. Because read depth is an integer, the quantiles are
+    exact, and memory does not grow with the number of samples.
+
     Parameters
     ----------
     gene : str
@@ -363,20 +776,38 @@ def compute_control_statistics(
     bed : str, optional
         By default, the input data is assumed to be WGS. If it's targeted
         sequencing, you must provide a BED file to indicate probed regions.
+    n_jobs : int, default: 1
+        Number of processes used to compute read depth. When greater than 1,
+        each BAM file is processed separately and the samples are merged in
+        input order.
+    engine : {'samtools', 'pysam'}, default: 'samtools'
+        Engine used to compute read depth. 'samtools' runs
+        :command:`samtools depth` through
+        :meth:`fuc.pycov.CovFrame.from_bam`. 'pysam' fetches reads with
+        :class:`pysam.AlignmentFile` and counts them into NumPy arrays in
+        the same process, giving the same read depth.
+    min_mapq : int, default: 0
+        Only count reads with mapping quality greater than or equal to this
+        number.
+    flag_filter : int, default: 1796
+        Skip reads with any of these SAM flags (by default, unmapped,
+        secondary, QC-failed, and duplicate reads, as with
+        :command:`samtools depth`). Requires ``engine='pysam'``.
+    hts_threads : int, default: 1
+        Number of htslib threads used to decompress each BAM file.
+        Requires ``engine='pysam'``.
 
     Returns
     -------
     pypgx.Archive
         Archive object with the semantic type SampleTable[Statistics].
     """
-    gene_table = core.load_gene_table()
+    region = _get_control_region(gene, assembly)
 
-    if gene in core.list_genes(mode='all'):
-        region = gene_table[gene_table.Gene == gene][f'{assembly}Region'].values[0]
-    else:
-        region = gene
+    options = _get_depth_options(engine, min_mapq, flag_filter, hts_threads)
 
-    cf = pycov.CovFrame.from_bam(bams, regions=region, zero=False)
+    bams = common.parse_list_or_file(bams)
+    options = _with_chr_prefix(options, bams)
 
     metadata = {
         'Control': gene,
@@ -387,19 +818,12 @@ def compute_control_statistics(
     if bed:
         metadata['Platform'] = 'Targeted'
         bf = pybed.BedFrame.from_file(bed)
-        if cf.has_chr_prefix and bf.has_chr_prefix:
-            pass
-        elif not cf.has_chr_prefix and not bf.has_chr_prefix:
-            pass
-        elif cf.has_chr_prefix and not bf.has_chr_prefix:
-            bf = bf.update_chr_prefix(mode='add')
-        else:
-            bf = bf.update_chr_prefix(mode='remove')
-        cf = cf.mask_bed(bf, opposite=True)
     else:
         metadata['Platform'] = 'WGS'
+        bf = None
 
-    data = cf.df.iloc[:, 2:].describe().T
+    data = _describe_depth(_imap_bams(_read_control_one, bams, n_jobs,
+        region, bf, options))
     result = sdk.Archive(metadata, data)
 
     return result
@@ -435,12 +859,13 @@ def compute_copy_number(
         Archive file with the semandtic type CovFrame[CopyNumber].
     """
     if isinstance(read_depth, str):
-        read_depth = sdk.Archive.from_file(read_depth)
+        read_depth = sdk.Archive.from_file(read_depth, lazy=True)
 
     read_depth.check_type('CovFrame[ReadDepth]')
 
     if isinstance(control_statistics, str):
-        control_statistics = sdk.Archive.from_file(control_statistics)
+        control_statistics = sdk.Archive.from_file(
+            control_statistics, lazy=True)
 
     control_statistics.check_type('SampleTable[Statistics]')
 
@@ -475,7 +900,8 @@ def compute_copy_number(
     return sdk.Archive(metadata, cf)
 
 def compute_target_depth(
-    gene, bams, assembly='GRCh37', bed=None
+    gene, bams, assembly='GRCh37', bed=None, n_jobs=1, bin_size=None,
+    engine='samtools', min_mapq=0, flag_filter=1796, hts_threads=1
 ):
     """
     Compute read depth for target gene from BAM files.
@@ -495,12 +921,38 @@ def compute_target_depth(
         Reference genome assembly.
     bed : str, optional
         BED file.
+    n_jobs : int, default: 1
+        Number of processes used to compute read depth. When greater than 1,
+        each BAM file is processed separately and the samples are merged in
+        input order.
+    bin_size : int, optional
+        If provided, average read depth over genome-aligned bins of this
+        many base pairs (e.g. 100) instead of storing it for every position.
+        The bin size is recorded in the metadata with the key 'BinSize'.
+    engine : {'samtools', 'pysam'}, default: 'samtools'
+        Engine used to compute read depth. 'samtools' runs
+        :command:`samtools depth` through
+        :meth:`fuc.pycov.CovFrame.from_bam`. 'pysam' fetches reads with
+        :class:`pysam.AlignmentFile` and counts them into NumPy arrays in
+        the same process, giving the same read depth.
+    min_mapq : int, default: 0
+        Only count reads with mapping quality greater than or equal to this
+        number.
+    flag_filter : int, default: 1796
+        Skip reads with any of these SAM flags (by default, unmapped,
+        secondary, QC-failed, and duplicate reads, as with
+        :command:`samtools depth`). Requires ``engine='pysam'``.
+    hts_threads : int, default: 1
+        Number of htslib threads used to decompress each BAM file.
+        Requires ``engine='pysam'``.
 
     Returns
     -------
     pypgx.Archive
         Archive object with the semantic type CovFrame[ReadDepth].
     """
+    _check_bin_size(bin_size)
+
     metadata = {
         'Gene': gene,
         'Assembly': assembly,
@@ -509,23 +961,22 @@ def compute_target_depth(
 
     region = core.get_region(gene, assembly=assembly)
 
-    cf = pycov.CovFrame.from_bam(bams, regions=region, zero=True)
+    options = _get_depth_options(engine, min_mapq, flag_filter, hts_threads)
+
+    cf = _read_depth(bams, region, True, n_jobs=n_jobs,
+        bin_size=None if bed else bin_size, options=options)
 
     if bed:
         metadata['Platform'] = 'Targeted'
-        bf = pybed.BedFrame.from_file(bed)
-        if cf.has_chr_prefix and bf.has_chr_prefix:
-            pass
-        elif not cf.has_chr_prefix and not bf.has_chr_prefix:
-            pass
-        elif cf.has_chr_prefix and not bf.has_chr_prefix:
-            bf = bf.update_chr_prefix(mode='add')
-        else:
-            bf = bf.update_chr_prefix(mode='remove')
-        cf = cf.mask_bed(bf, opposite=True)
+        cf = _mask_bed(cf, pybed.BedFrame.from_file(bed))
+        if bin_size is not None:
+            cf = pycov.CovFrame(_bin_depth(cf.df, bin_size))
     else:
         metadata['Platform'] = 'WGS'
 
+    if bin_size is not None:
+        metadata['BinSize'] = str(bin_size)
+
     archive = sdk.Archive(metadata, cf)
 
     return archive
@@ -535,7 +986,7 @@ def count_alleles(results):
     Count star alleles from genotype calls.
     """
     if isinstance(results, str):
-        results = sdk.Archive.from_file(results)
+        results = sdk.Archive.from_file(results, lazy=True)
 
     results.check_type('SampleTable[Results]')
 
@@ -569,12 +1020,12 @@ def create_consolidated_vcf(imported_variants, phased_variants):
         Archive object with the semantic type VcfFrame[Consolidated].
     """
     if isinstance(imported_variants, str):
-        imported_variants = sdk.Archive.from_file(imported_variants)
+        imported_variants = sdk.Archive.from_file(imported_variants, lazy=True)
 
     imported_variants.check_type('VcfFrame[Imported]')
 
     if isinstance(phased_variants, str):
-        phased_variants = sdk.Archive.from_file(phased_variants)
+        phased_variants = sdk.Archive.from_file(phased_variants, lazy=True)
 
     phased_variants.check_type('VcfFrame[Phased]')
 
@@ -805,7 +1256,7 @@ def estimate_phase_beagle(
         Archive object with the semantic type VcfFrame[Phased].
     """
     if isinstance(imported_variants, str):
-        imported_variants = sdk.Archive.from_file(imported_variants)
+        imported_variants = sdk.Archive.from_file(imported_variants, lazy=True)
 
     imported_variants.check_type('VcfFrame[Imported]')
 
@@ -931,12 +1382,13 @@ def filter_samples(archive, samples, exclude=False):
         Fitlered Archive object.
     """
     if isinstance(archive, str):
-        archive = sdk.Archive.from_file(archive)
+        archive = sdk.Archive.from_file(archive, lazy=True, mmap=True)
 
     samples = common.parse_list_or_file(samples)
 
-    if ('VcfFrame' in archive.metadata['SemanticType'] or
-        'CovFrame' in archive.metadata['SemanticType']):
+    if 'CovFrame' in archive.metadata['SemanticType']:
+        data = archive.subset(samples, exclude=exclude).data
+    elif 'VcfFrame' in archive.metadata['SemanticType']:
         data = archive.data.subset(samples, exclude=exclude)
     elif 'SampleTable' in archive.metadata['SemanticType']:
         if exclude:
@@ -974,7 +1426,7 @@ def import_read_depth(
         Archive object with the semantic type CovFrame[ReadDepth].
     """
     if isinstance(depth_of_coverage, str):
-        depth_of_coverage = sdk.Archive.from_file(depth_of_coverage)
+        depth_of_coverage = sdk.Archive.from_file(depth_of_coverage, lazy=True)
 
     depth_of_coverage.check_type('CovFrame[DepthOfCoverage]')
 
@@ -984,8 +1436,18 @@ def import_read_depth(
 
     region = core.get_region(gene, assembly=metadata['Assembly'])
 
-    cf = depth_of_coverage.data.update_chr_prefix(mode='remove')
-    cf = cf.slice(region)
+    # Binned data also includes the bin overlapping the start of the gene.
+    bin_size = _get_bin_size(depth_of_coverage)
+    if bin_size > 1:
+        chrom, start, end = common.parse_region(region)
+        start = (start - 1) // bin_size * bin_size + 1
+        region = f'{chrom}:{start}-{end}'
+
+    # Only the region of the gene is read when the archive was opened lazily
+    # from a file written with payload='chunked'.
+    df = depth_of_coverage.slice(region).data.copy_df()
+    df['Chromosome'] = df.Chromosome.str.replace('chr', '')
+    cf = pycov.CovFrame(df)
 
     if samples is not None:
         samples = common.parse_list_or_file(samples)
@@ -1101,17 +1563,17 @@ def predict_alleles(consolidated_variants):
         Archive object with the semantic type SampleTable[Alleles].
     """
     if isinstance(consolidated_variants, str):
-        consolidated_variants = sdk.Archive.from_file(consolidated_variants)
+        consolidated_variants = sdk.Archive.from_file(
+            consolidated_variants, lazy=True)
 
     consolidated_variants.check_type('VcfFrame[Consolidated]')
 
     gene = consolidated_variants.metadata['Gene']
     assembly = consolidated_variants.metadata['Assembly']
 
-    definition_table = core.build_definition_table(gene, assembly)
+    definitions = core.get_allele_definitions(gene, assembly=assembly)
     ref_allele = core.get_ref_allele(gene)
     default_allele = core.get_default_allele(gene, assembly)
-    defining_variants = core.list_variants(gene, assembly=assembly)
     variant_synonyms = core.get_variant_synonyms(gene, assembly=assembly)
 
     reformatted_variants = {}
@@ -1122,30 +1584,9 @@ def predict_alleles(consolidated_variants):
             if y in reformatted_variants:
                 warnings.warn(f"Multiple variant synonyms detected for {y}: PyPGx will report information for {x}")
             reformatted_variants[y] = x
-    star_alleles = {}
-
-    for allele in definition_table.samples:
-        df = definition_table.df[definition_table.df[allele] == '1']
-        star_alleles[allele] = set(df.apply(lambda r: f'{r.CHROM}-{r.POS}-{r.REF}-{r.ALT}', axis=1))
 
     samples = {}
 
-    def one_haplotype(observed):
-        """
-        Call candidate alleles for haplotype.
-        """
-        candidates = []
-        for allele, variants in star_alleles.items():
-            if variants.issubset(observed):
-                candidates.append(allele)
-        candidates = core.collapse_alleles(gene, candidates, assembly=assembly)
-        if ref_allele != default_allele and ref_allele not in candidates and default_allele not in candidates:
-            candidates.append(default_allele)
-        if not candidates:
-            candidates.append(default_allele)
-        candidates = core.sort_alleles(candidates, by='priority', gene=gene, assembly=assembly)
-        return candidates
-
     def one_row(r, sample, i):
         gt = r[sample].split(':')[0]
         if '.' in gt:
@@ -1157,26 +1598,48 @@ def predict_alleles(consolidated_variants):
         variant = f'{r.CHROM}-{r.POS}-{r.REF}-{alt}'
         if variant in variant_synonyms:
             variant = variant_synonyms[variant]
-        if variant not in defining_variants:
+        if variant not in definitions.variant_index:
             return ''
         return variant
 
+    # Observed variants for the first haplotype, the second haplotype, and
+    # the alternative phase (i.e. both haplotypes combined) of each sample.
+    haplotypes = []
+
     for sample in consolidated_variants.data.samples:
-        results = []
         alt_phase = []
+        for i in [0, 1]:
+            observed = consolidated_variants.data.df.apply(one_row, args=(sample, i), axis=1)
+            observed = [x for x in observed if x]
+            alt_phase += [x for x in observed if x not in alt_phase]
+            haplotypes.append(observed)
+        haplotypes.append(alt_phase)
+
+    # Match and collapse candidate alleles for all haplotypes at once.
+    haplotypes = definitions.collapse_many(definitions.match_many(haplotypes))
+
+    def one_haplotype(candidates):
+        """
+        Finalize candidate alleles for haplotype.
+        """
+        if ref_allele != default_allele and ref_allele not in candidates and default_allele not in candidates:
+            candidates.append(default_allele)
+        if not candidates:
+            candidates.append(default_allele)
+        candidates = core.sort_alleles(candidates, by='priority', gene=gene, assembly=assembly)
+        return candidates
+
+    for k, sample in enumerate(consolidated_variants.data.samples):
+        results = []
         all_alleles = []
 
         for i in [0, 1, 2]:
+            candidates = one_haplotype(haplotypes[k * 3 + i])
             if i == 2:
-                candidates = one_haplotype(set(alt_phase))
                 candidates = [x for x in candidates if x not in all_alleles]
                 all_alleles += [x for x in candidates if x not in all_alleles]
                 all_alleles = core.sort_alleles(all_alleles, by='priority', gene=gene, assembly=assembly)
             else:
-                observed = consolidated_variants.data.df.apply(one_row, args=(sample, i), axis=1)
-                observed = [x for x in observed if x]
-                alt_phase += [x for x in observed if x not in alt_phase]
-                candidates = one_haplotype(observed)
                 all_alleles += [x for x in candidates if x not in all_alleles]
 
             results.append(';'.join(candidates) + ';')
@@ -1187,8 +1650,9 @@ def predict_alleles(consolidated_variants):
             if allele == default_allele:
                 af_list.append(f'{allele}:default')
             else:
-                variants = ','.join(star_alleles[allele])
-                fractions = ','.join([str(consolidated_variants.data.get_af(sample, reformatted_variants[x])) if x in reformatted_variants else str(consolidated_variants.data.get_af(sample, x)) for x in star_alleles[allele]])
+                core_variants = definitions.list_variants(allele, mode='core')
+                variants = ','.join(core_variants)
+                fractions = ','.join([str(consolidated_variants.data.get_af(sample, reformatted_variants[x])) if x in reformatted_variants else str(consolidated_variants.data.get_af(sample, x)) for x in core_variants])
                 af_list.append(f'{allele}:{variants}:{fractions}')
 
         results.append(';'.join(af_list) + ';')
@@ -1208,6 +1672,13 @@ def predict_cnv(copy_number, cnv_caller=None):
     Genomic positions that are missing copy number because, for example, the
     input data is targeted sequencing will be imputed with forward filling.
 
+    If the copy number was computed from binned read depth (metadata key
+    'BinSize'), a CNV caller trained on the same bins is required. For CNV
+    callers trained on per-base copy number, including the pre-trained ones,
+    each bin's copy number is expanded to every position in the bin before
+    prediction. CNV calling then runs at base resolution and is no faster
+    than without bins; only the earlier steps benefit from binning.
+
     Parameters
     ----------
     copy_number : str or pypgx.Archive
@@ -1215,7 +1686,7 @@ def predict_cnv(copy_number, cnv_caller=None):
     cnv_caller : str or pypgx.Archive, optional
         Archive file or object with the semantic type Model[CNV]. By default,
         a pre-trained CNV caller in the ``pypgx-bundle`` directory will be
-        used.
+        used, which is loaded only once per process.
 
     Returns
     -------
@@ -1223,22 +1694,22 @@ def predict_cnv(copy_number, cnv_caller=None):
         Archive object with the semantic type SampleTable[CNVCalls].
     """
     if isinstance(copy_number, str):
-        copy_number = sdk.Archive.from_file(copy_number)
+        copy_number = sdk.Archive.from_file(copy_number, lazy=True)
 
     copy_number.check_type('CovFrame[CopyNumber]')
 
     gene = copy_number.metadata['Gene']
     assembly = copy_number.metadata['Assembly']
-    model_file = f'{sdk.get_bundle_path()}/cnv/{assembly}/{gene}.zip'
 
     if cnv_caller is None:
-        cnv_caller = sdk.Archive.from_file(model_file)
+        cnv_caller = _get_bundle_cnv_caller(gene, assembly)
     else:
         if isinstance(cnv_caller, str):
-            cnv_caller = sdk.Archive.from_file(cnv_caller)
+            cnv_caller = sdk.Archive.from_file(cnv_caller, lazy=True)
 
         cnv_caller.check_type('Model[CNV]')
 
+    copy_number = _match_bin_size(copy_number, cnv_caller)
     copy_number = _process_copy_number(copy_number)
     df = copy_number.data.df.iloc[:, 2:]
     X = df.T.to_numpy()
@@ -1255,7 +1726,9 @@ def predict_cnv(copy_number, cnv_caller=None):
     return sdk.Archive(metadata, data)
 
 def prepare_depth_of_coverage(
-    bams, assembly='GRCh37', bed=None, genes=None, exclude=False
+    bams, assembly='GRCh37', bed=None, genes=None, exclude=False, n_jobs=1,
+    bin_size=None, engine='samtools', min_mapq=0, flag_filter=1796,
+    hts_threads=1
 ):
     """
     Prepare a depth of coverage file for all target genes with SV from BAM
@@ -1283,12 +1756,38 @@ def prepare_depth_of_coverage(
         List of genes to include.
     exclude : bool, default: False
         Exclude specified genes. Ignored when ``genes=None``.
+    n_jobs : int, default: 1
+        Number of processes used to compute read depth. When greater than 1,
+        each BAM file is processed separately and the samples are merged in
+        input order.
+    bin_size : int, optional
+        If provided, average read depth over genome-aligned bins of this
+        many base pairs (e.g. 100) instead of storing it for every position.
+        The bin size is recorded in the metadata with the key 'BinSize'.
+    engine : {'samtools', 'pysam'}, default: 'samtools'
+        Engine used to compute read depth. 'samtools' runs
+        :command:`samtools depth` through
+        :meth:`fuc.pycov.CovFrame.from_bam`. 'pysam' fetches reads with
+        :class:`pysam.AlignmentFile` and counts them into NumPy arrays in
+        the same process, giving the same read depth.
+    min_mapq : int, default: 0
+        Only count reads with mapping quality greater than or equal to this
+        number.
+    flag_filter : int, default: 1796
+        Skip reads with any of these SAM flags (by default, unmapped,
+        secondary, QC-failed, and duplicate reads, as with
+        :command:`samtools depth`). Requires ``engine='pysam'``.
+    hts_threads : int, default: 1
+        Number of htslib threads used to decompress each BAM file.
+        Requires ``engine='pysam'``.
 
     Returns
     -------
     pypgx.Archive
         Archive object with the semantic type CovFrame[DepthOfCoverage].
     """
+    _check_bin_size(bin_size)
+
     metadata = {
         'Assembly': assembly,
         'SemanticType': 'CovFrame[DepthOfCoverage]',
@@ -1299,25 +1798,156 @@ def prepare_depth_of_coverage(
         exclude=exclude
     ).to_regions()
 
-    cf = pycov.CovFrame.from_bam(bams, regions=regions, zero=True)
+    options = _get_depth_options(engine, min_mapq, flag_filter, hts_threads)
+
+    cf = _read_depth(bams, regions, True, n_jobs=n_jobs,
+        bin_size=None if bed else bin_size, options=options)
 
     if bed:
         metadata['Platform'] = 'Targeted'
-        bf = pybed.BedFrame.from_file(bed)
-        if cf.has_chr_prefix and bf.has_chr_prefix:
-            pass
-        elif not cf.has_chr_prefix and not bf.has_chr_prefix:
-            pass
-        elif cf.has_chr_prefix and not bf.has_chr_prefix:
-            bf = bf.update_chr_prefix(mode='add')
-        else:
-            bf = bf.update_chr_prefix(mode='remove')
-        cf = cf.mask_bed(bf, opposite=True)
+        cf = _mask_bed(cf, pybed.BedFrame.from_file(bed))
+        if bin_size is not None:
+            cf = pycov.CovFrame(_bin_depth(cf.df, bin_size))
     else:
         metadata['Platform'] = 'WGS'
 
+    if bin_size is not None:
+        metadata['BinSize'] = str(bin_size)
+
     return sdk.Archive(metadata, cf)
 
+def prepare_sv_inputs(
+    control, bams, assembly='GRCh37', bed=None, genes=None, exclude=False,
+    n_jobs=1, bin_size=None, engine='samtools', min_mapq=0, flag_filter=1796,
+    hts_threads=1
+):
+    """
+    Prepare both a depth of coverage file for all target genes with SV and
+    summary statistics for control gene from BAM files.
+
+    This method gives the same results as
+    :meth:`pypgx.api.utils.prepare_depth_of_coverage` and
+    :meth:`pypgx.api.utils.compute_control_statistics`, but reads the target
+    regions and the control region of each BAM file in the same job. Only
+    with ``engine='pysam'`` are both read through one open BAM file in a
+    single pass; with the default ``engine='samtools'``,
+    :command:`samtools depth` still runs twice for each BAM file.
+
+    Parameters
+    ----------
+    control : str
+        Control gene (recommended choices: 'EGFR', 'RYR1', 'VDR').
+        Alternatively, you can provide a custom region (format:
+        chrom:start-end).
+    bams : str or list
+        One or more input BAM files. Alternatively, you can provide a text
+        file (.txt, .tsv, .csv, or .list) containing one BAM file per line.
+    assembly : {'GRCh37', 'GRCh38'}, default: 'GRCh37'
+        Reference genome assembly.
+    bed : str, optional
+        By default, the input data is assumed to be WGS. If it's targeted
+        sequencing, you must provide a BED file to indicate probed regions.
+        Note that the 'chr' prefix in contig names (e.g. 'chr1' vs. '1') will
+        be automatically added or removed as necessary to match the input
+        BAM's contig names.
+    genes : list, optional
+        List of genes to include.
+    exclude : bool, default: False
+        Exclude specified genes. Ignored when ``genes=None``.
+    n_jobs : int, default: 1
+        Number of processes used to compute read depth, each handling one
+        BAM file at a time.
+    bin_size : int, optional
+        If provided, average the depth of coverage over genome-aligned bins
+        of this many base pairs (e.g. 100). The bin size is recorded in the
+        metadata with the key 'BinSize'. Summary statistics for control
+        gene are always computed from per-base read depth.
+    engine : {'samtools', 'pysam'}, default: 'samtools'
+        Engine used to compute read depth. 'samtools' runs
+        :command:`samtools depth` through
+        :meth:`fuc.pycov.CovFrame.from_bam`. 'pysam' fetches reads with
+        :class:`pysam.AlignmentFile` and counts them into NumPy arrays in
+        the same process, giving the same read depth.
+    min_mapq : int, default: 0
+        Only count reads with mapping quality greater than or equal to this
+        number.
+    flag_filter : int, default: 1796
+        Skip reads with any of these SAM flags (by default, unmapped,
+        secondary, QC-failed, and duplicate reads, as with
+        :command:`samtools depth`). Requires ``engine='pysam'``.
+    hts_threads : int, default: 1
+        Number of htslib threads used to decompress each BAM file.
+        Requires ``engine='pysam'``.
+
+    Returns
+    -------
+    pypgx.Archive
+        Archive object with the semantic type CovFrame[DepthOfCoverage].
+    pypgx.Archive
+        Archive object with the semantic type SampleTable[Statistics].
+    """
+    _check_bin_size(bin_size)
+
+    region = _get_control_region(control, assembly)
+
+    regions = create_regions_bed(
+        merge=True, sv_genes=True, assembly=assembly, genes=genes,
+        exclude=exclude
+    ).to_regions()
+
+    bams = common.parse_list_or_file(bams)
+
+    # Bins are computed after masking with the BED file.
+    worker_bin_size = None if bed else bin_size
+
+    options = _get_depth_options(engine, min_mapq, flag_filter, hts_threads)
+
+    # The BED file is parsed once, for the control statistics of all BAM
+    # files and for masking the depth of coverage.
+    bf = pybed.BedFrame.from_file(bed) if bed else None
+
+    if engine == 'samtools' and _has_mixed_chr_prefix(bams):
+        depth = _read_depth(bams, regions, True, bin_size=worker_bin_size,
+            options=options)
+        data = _describe_depth(_imap_bams(_read_control_one, bams, n_jobs,
+            region, bf, options))
+    else:
+        options = _with_chr_prefix(options, bams)
+        results = _map_bams(_read_sv_inputs_one, bams, n_jobs, regions,
+            region, bf, worker_bin_size, options)
+        depth = _merge_depth([x[0] for x in results], regions)
+        data = _describe_depth([x[1] for x in results])
+
+    platform = 'WGS'
+
+    if bed:
+        platform = 'Targeted'
+        depth = _mask_bed(depth, bf)
+        if bin_size is not None:
+            depth = pycov.CovFrame(_bin_depth(depth.df, bin_size))
+
+    metadata = {
+        'Assembly': assembly,
+        'SemanticType': 'CovFrame[DepthOfCoverage]',
+        'Platform': platform,
+    }
+
+    if bin_size is not None:
+        metadata['BinSize'] = str(bin_size)
+
+    depth_of_coverage = sdk.Archive(metadata, depth)
+
+    metadata = {
+        'Control': control,
+        'Assembly': assembly,
+        'SemanticType': 'SampleTable[Statistics]',
+        'Platform': platform,
+    }
+
+    control_statistics = sdk.Archive(metadata, data)
+
+    return depth_of_coverage, control_statistics
+
 def print_data(input):
     """
     Print the main data of specified archive.
@@ -1327,7 +1957,7 @@ def print_data(input):
     input : pypgx.Archive
         Archive file.
     """
-    archive = sdk.Archive.from_file(input)
+    archive = sdk.Archive.from_file(input, lazy=True)
     if 'SampleTable' in archive.type:
         data = archive.data.to_csv(sep='\t')
     elif 'CovFrame' in archive.type:
@@ -1405,23 +2035,24 @@ def test_cnv_caller(
         sample.
     """
     if isinstance(cnv_caller, str):
-        cnv_caller = sdk.Archive.from_file(cnv_caller)
+        cnv_caller = sdk.Archive.from_file(cnv_caller, lazy=True)
 
     cnv_caller.check_type('Model[CNV]')
 
     if isinstance(copy_number, str):
-        copy_number = sdk.Archive.from_file(copy_number)
+        copy_number = sdk.Archive.from_file(copy_number, lazy=True)
 
     copy_number.check_type('CovFrame[CopyNumber]')
 
     if isinstance(cnv_calls, str):
-        cnv_calls = sdk.Archive.from_file(cnv_calls)
+        cnv_calls = sdk.Archive.from_file(cnv_calls, lazy=True)
 
     cnv_calls.check_type('SampleTable[CNVCalls]')
 
     sdk.compare_metadata('Gene', cnv_caller, copy_number, cnv_calls)
     sdk.compare_metadata('Assembly', cnv_caller, copy_number, cnv_calls)
 
+    copy_number = _match_bin_size(copy_number, cnv_caller)
     copy_number = _process_copy_number(copy_number)
 
     cnv_table = core.load_cnv_table()
@@ -1461,7 +2092,13 @@ def train_cnv_caller(
     Train a CNV caller for the target gene.
 
     This method will return a SVM-based multiclass classifier that makes CNV
-    calls using the one-vs-rest strategy.
+    calls using the one-vs-rest strategy. The classifier is stored as
+    :class:`pypgx.sdk.utils.OneVsRestSVC`, whose archive does not depend on
+    the version of scikit-learn.
+
+    If the copy number was computed from binned read depth, the bin size is
+    recorded in the model's metadata (key 'BinSize') so that the model is
+    only used with copy number computed from the same bins.
 
     Parameters
     ----------
@@ -1482,12 +2119,12 @@ def train_cnv_caller(
         Archive object with the semantic type Model[CNV].
     """
     if isinstance(copy_number, str):
-        copy_number = sdk.Archive.from_file(copy_number)
+        copy_number = sdk.Archive.from_file(copy_number, lazy=True)
 
     copy_number.check_type('CovFrame[CopyNumber]')
 
     if isinstance(cnv_calls, str):
-        cnv_calls = sdk.Archive.from_file(cnv_calls)
+        cnv_calls = sdk.Archive.from_file(cnv_calls, lazy=True)
 
     cnv_calls.check_type('SampleTable[CNVCalls]')
 
@@ -1510,6 +2147,7 @@ def train_cnv_caller(
     model = OneVsRestClassifier(SVC(random_state=1)).fit(X, Y)
     metadata = copy_number.copy_metadata()
     metadata['SemanticType'] = 'Model[CNV]'
+    model = sdk.utils.OneVsRestSVC.from_sklearn(model)
     predictions = model.predict(X)
     results = predictions == Y
     print(f'Accuracy: {sum(results)/len(Y):.3f} ({sum(results)}/{len(Y)})')
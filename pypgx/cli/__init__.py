@@ -1,9 +1,69 @@
 from importlib import import_module
-from pathlib import Path
+from collections.abc import Mapping
 
-commands = {}
+# Name, help message, and module of each command. The manifest lets the CLI
+# list every command without importing the command modules, which in turn
+# import most of PyPGx and its dependencies (e.g. pysam and matplotlib).
+MANIFEST = [
+    ('call-genotypes', 'Call genotypes for target gene.', 'call_genotypes'),
+    ('call-phenotypes', 'Call phenotypes for target gene.', 'call_phenotypes'),
+    ('combine-results', 'Combine various results for target gene.', 'combine_results'),
+    ('compare-genotypes', 'Calculate concordance between two genotype results.', 'compare_genotypes'),
+    ('compute-control-statistics', 'Compute summary statistics for control gene from BAM\nfiles.', 'compute_control_statistics'),
+    ('compute-copy-number', 'Compute copy number from read depth for target gene.', 'compute_copy_number'),
+    ('compute-target-depth', 'Compute read depth for target gene from BAM files.', 'compute_target_depth'),
+    ('create-consolidated-vcf', 'Create a consolidated VCF file.', 'create_consolidated_vcf'),
+    ('create-input-vcf', 'Call SNVs/indels from BAM files for all target genes.', 'create_input_vcf'),
+    ('create-regions-bed', 'Create a BED file which contains all regions used by\nPyPGx.', 'create_regions_bed'),
+    ('estimate-phase-beagle', 'Estimate haplotype phase of observed variants with\nthe Beagle program.', 'estimate_phase_beagle'),
+    ('filter-samples', 'Filter Archive file for specified samples.', 'filter_samples'),
+    ('import-read-depth', 'Import read depth data for target gene.', 'import_read_depth'),
+    ('import-variants', 'Import SNV/indel data for target gene.', 'import_variants'),
+    ('plot-bam-copy-number', 'Plot copy number profile from CovFrame[CopyNumber].', 'plot_bam_copy_number'),
+    ('plot-bam-read-depth', 'Plot read depth profile with BAM data.', 'plot_bam_read_depth'),
+    ('plot-cn-af', 'Plot both copy number profile and allele fraction\nprofile in one figure.', 'plot_cn_af'),
+    ('plot-vcf-allele-fraction', 'Plot allele fraction profile with VCF data.', 'plot_vcf_allele_fraction'),
+    ('plot-vcf-read-depth', 'Plot read depth profile with VCF data.', 'plot_vcf_read_depth'),
+    ('predict-alleles', 'Predict candidate star alleles based on observed\nvariants.', 'predict_alleles'),
+    ('predict-cnv', 'Predict CNV from copy number data for target gene.', 'predict_cnv'),
+    ('prepare-depth-of-coverage', 'Prepare a depth of coverage file for all target\ngenes with SV from BAM files.', 'prepare_depth_of_coverage'),
+    ('prepare-sv-inputs', 'Prepare both a depth of coverage file and control\nstatistics from BAM files.', 'prepare_sv_inputs'),
+    ('print-data', 'Print the main data of specified archive.', 'print_data'),
+    ('print-metadata', 'Print the metadata of specified archive.', 'print_metadata'),
+    ('run-chip-pipeline', 'Run genotyping pipeline for chip data.', 'run_chip_pipeline'),
+    ('run-long-read-pipeline', 'Run genotyping pipeline for long-read sequencing data.', 'run_long_read_pipeline'),
+    ('run-ngs-pipeline', 'Run genotyping pipeline for NGS data.', 'run_ngs_pipeline'),
+    ('slice-bam', 'Slice BAM file for all genes used by PyPGx.', 'slice_bam'),
+    ('test-cnv-caller', 'Test CNV caller for target gene.', 'test_cnv_caller'),
+    ('train-cnv-caller', 'Train CNV caller for target gene.', 'train_cnv_caller'),
+]
 
-for f in sorted(Path(__file__).parent.glob('*.py')):
-    if '__' in f.stem:
-        continue
-    commands[f.stem.replace('_', '-')] = import_module(f'.{f.stem}', __package__)
+class _Commands(Mapping):
+    """
+    Mapping of command name to command module, imported on first access.
+    """
+
+    def __init__(self):
+        self._modules = {name: module for name, _, module in MANIFEST}
+
+    def __getitem__(self, name):
+        return import_module(f'.{self._modules[name]}', __package__)
+
+    def __iter__(self):
+        return iter(self._modules)
+
+    def __len__(self):
+        return len(self._modules)
+
+commands = _Commands()
+
+def _archive_options(args):
+    """
+    Return the keyword arguments of :meth:`sdk.utils.Archive.to_file` for
+    the top-level compression options of the command line.
+    """
+    return {
+        'compression': getattr(args, 'compression', None),
+        'level': getattr(args, 'compression_level', None),
+        'threads': getattr(args, 'compression_threads', None),
+    }
@@ -1,6 +1,7 @@
 import sys
 
 from ..api import genotype
+from . import _archive_options
 
 import fuc
 
@@ -41,4 +42,4 @@ def main(args):
     archive = genotype.call_genotypes(
         alleles=args.alleles, cnv_calls=args.cnv_calls
     )
-    archive.to_file(args.genotypes)
+    archive.to_file(args.genotypes, **_archive_options(args))
@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 
@@ -31,4 +32,4 @@ SampleTable[Phenotypes]."""
 
 def main(args):
     archive = utils.call_phenotypes(args.genotypes)
-    archive.to_file(args.phenotypes)
+    archive.to_file(args.phenotypes, **_archive_options(args))
@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 
@@ -56,4 +57,4 @@ def main(args):
         genotypes=args.genotypes, phenotypes=args.phenotypes,
         alleles=args.alleles, cnv_calls=args.cnv_calls
     )
-    archive.to_file(args.results)
+    archive.to_file(args.results, **_archive_options(args))
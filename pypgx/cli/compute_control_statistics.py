@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -76,9 +77,59 @@ containing one BAM file per line."""
 it's targeted sequencing, you must provide a BED file
 to indicate probed regions."""
     )
+    parser.add_argument(
+        '--threads',
+        metavar='INT',
+        type=int,
+        default=1,
+        help=
+"""Number of processes used to compute read depth, each
+handling one BAM file at a time (default: 1)."""
+    )
+    parser.add_argument(
+        '--engine',
+        metavar='TEXT',
+        default='samtools',
+        choices=['samtools', 'pysam'],
+        help=
+"""Engine used to compute read depth (default: 'samtools')
+(choices: 'samtools', 'pysam'). 'pysam' counts reads
+in process with NumPy instead of running 'samtools
+depth', giving the same read depth."""
+    )
+    parser.add_argument(
+        '--min-mapq',
+        metavar='INT',
+        type=int,
+        default=0,
+        help=
+"""Only count reads with mapping quality greater than or
+equal to this number (default: 0)."""
+    )
+    parser.add_argument(
+        '--flag-filter',
+        metavar='INT',
+        type=int,
+        default=1796,
+        help=
+"""Skip reads with any of these SAM flags (default: 1796,
+i.e. unmapped, secondary, QC-failed, and duplicate
+reads). Requires --engine pysam."""
+    )
+    parser.add_argument(
+        '--hts-threads',
+        metavar='INT',
+        type=int,
+        default=1,
+        help=
+"""Number of htslib threads used to decompress each BAM
+file (default: 1). Requires --engine pysam."""
+    )
 
 def main(args):
     result = utils.compute_control_statistics(
-        args.gene, args.bams, assembly=args.assembly, bed=args.bed
+        args.gene, args.bams, assembly=args.assembly, bed=args.bed,
+        n_jobs=args.threads, engine=args.engine, min_mapq=args.min_mapq,
+        flag_filter=args.flag_filter, hts_threads=args.hts_threads
     )
-    result.to_file(args.control_statistics)
+    result.to_file(args.control_statistics, **_archive_options(args))
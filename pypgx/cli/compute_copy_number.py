@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -59,4 +60,4 @@ def main(args):
         args.read_depth, args.control_statistics,
         samples_without_sv=args.samples_without_sv
     )
-    result.to_file(args.copy_number)
+    result.to_file(args.copy_number, **_archive_options(args))
@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -43,4 +44,4 @@ def main(args):
     archive = utils.create_consolidated_vcf(
         args.imported_variants, args.phased_variants
     )
-    archive.to_file(args.consolidated_variants)
+    archive.to_file(args.consolidated_variants, **_archive_options(args))
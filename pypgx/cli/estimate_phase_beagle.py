@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -54,4 +55,4 @@ def main(args):
     result = utils.estimate_phase_beagle(
         args.imported_variants, args.panel, impute=args.impute
     )
-    result.to_file(args.phased_variants)
+    result.to_file(args.phased_variants, **_archive_options(args))
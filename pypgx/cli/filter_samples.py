@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -47,4 +48,4 @@ def main(args):
     archive = utils.filter_samples(
         args.input, args.samples, exclude=args.exclude
     )
-    archive.to_file(args.output)
+    archive.to_file(args.output, **_archive_options(args))
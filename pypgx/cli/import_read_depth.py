@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -58,4 +59,4 @@ def main(args):
         args.gene, args.depth_of_coverage, samples=args.samples,
         exclude=args.exclude
     )
-    archive.to_file(args.read_depth)
+    archive.to_file(args.read_depth, **_archive_options(args))
@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -87,4 +88,4 @@ def main(args):
         args.gene, args.vcf, assembly=args.assembly, platform=args.platform,
         samples=args.samples, exclude=args.exclude
     )
-    archive.to_file(args.imported_variants)
+    archive.to_file(args.imported_variants, **_archive_options(args))
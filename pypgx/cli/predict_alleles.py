@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -34,4 +35,4 @@ SampleTable[Alleles]."""
 
 def main(args):
     alleles = utils.predict_alleles(args.consolidated_variants)
-    alleles.to_file(args.alleles)
+    alleles.to_file(args.alleles, **_archive_options(args))
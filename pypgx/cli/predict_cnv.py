@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -45,4 +46,4 @@ directory will be used."""
 
 def main(args):
     archive = utils.predict_cnv(args.copy_number, cnv_caller=args.cnv_caller)
-    archive.to_file(args.cnv_calls)
+    archive.to_file(args.cnv_calls, **_archive_options(args))
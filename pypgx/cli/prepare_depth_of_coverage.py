@@ -1,6 +1,7 @@
 import tempfile
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -85,10 +86,70 @@ the input BAM's contig names."""
 """Exclude specified genes. Ignored when --genes is not
 used."""
     )
+    parser.add_argument(
+        '--threads',
+        metavar='INT',
+        type=int,
+        default=1,
+        help=
+"""Number of processes used to compute read depth, each
+handling one BAM file at a time (default: 1)."""
+    )
+    parser.add_argument(
+        '--bin-size',
+        metavar='INT',
+        type=int,
+        help=
+"""Average read depth over genome-aligned bins of this
+many base pairs (e.g. 100) instead of storing it for
+every position."""
+    )
+    parser.add_argument(
+        '--engine',
+        metavar='TEXT',
+        default='samtools',
+        choices=['samtools', 'pysam'],
+        help=
+"""Engine used to compute read depth (default: 'samtools')
+(choices: 'samtools', 'pysam'). 'pysam' counts reads
+in process with NumPy instead of running 'samtools
+depth', giving the same read depth."""
+    )
+    parser.add_argument(
+        '--min-mapq',
+        metavar='INT',
+        type=int,
+        default=0,
+        help=
+"""Only count reads with mapping quality greater than or
+equal to this number (default: 0)."""
+    )
+    parser.add_argument(
+        '--flag-filter',
+        metavar='INT',
+        type=int,
+        default=1796,
+        help=
+"""Skip reads with any of these SAM flags (default: 1796,
+i.e. unmapped, secondary, QC-failed, and duplicate
+reads). Requires --engine pysam."""
+    )
+    parser.add_argument(
+        '--hts-threads',
+        metavar='INT',
+        type=int,
+        default=1,
+        help=
+"""Number of htslib threads used to decompress each BAM
+file (default: 1). Requires --engine pysam."""
+    )
 
 def main(args):
     archive = utils.prepare_depth_of_coverage(
         args.bams, assembly=args.assembly, bed=args.bed, genes=args.genes,
-        exclude=args.exclude
+        exclude=args.exclude, n_jobs=args.threads,
+        bin_size=args.bin_size, engine=args.engine, min_mapq=args.min_mapq,
+        flag_filter=args.flag_filter, hts_threads=args.hts_threads
     )
-    archive.to_file(args.depth_of_coverage)
+    archive.to_file(args.depth_of_coverage, payload='chunked',
+        **_archive_options(args))
@@ -0,0 +1,178 @@
+from ..api import utils
+from . import _archive_options
+
+import fuc
+import pysam
+
+description = """
+Prepare both a depth of coverage file for all target genes with SV and
+summary statistics for control gene from BAM files.
+
+This command gives the same results as the prepare-depth-of-coverage and
+compute-control-statistics commands, but reads the target regions and the
+control region of each BAM file in the same job. Only with '--engine pysam'
+are both read through one open BAM file in a single pass; with the default
+'--engine samtools', 'samtools depth' still runs twice for each BAM file.
+"""
+
+epilog = f"""
+[Example] For the VDR gene from WGS data:
+  $ pypgx {fuc.api.common._script_name()} \\
+  VDR \\
+  depth-of-coverage.zip \\
+  control-statistics.zip \\
+  1.bam 2.bam
+
+[Example] From targeted sequencing data with 8 processes:
+  $ pypgx {fuc.api.common._script_name()} \\
+  VDR \\
+  depth-of-coverage.zip \\
+  control-statistics.zip \\
+  bam.list \\
+  --bed probes.bed \\
+  --threads 8
+"""
+
+def create_parser(subparsers):
+    parser = fuc.api.common._add_parser(
+        subparsers,
+        fuc.api.common._script_name(),
+        description=description,
+        epilog=epilog,
+        help=
+"""Prepare both a depth of coverage file and control
+statistics from BAM files."""
+    )
+    parser.add_argument(
+        'control',
+        help=
+"""Control gene (recommended choices: 'EGFR', 'RYR1',
+'VDR'). Alternatively, you can provide a custom region
+(format: chrom:start-end)."""
+    )
+    parser.add_argument(
+        'depth_of_coverage',
+        metavar='depth-of-coverage',
+        help=
+"""Output archive file with the semantic type
+CovFrame[DepthOfCoverage]."""
+    )
+    parser.add_argument(
+        'control_statistics',
+        metavar='control-statistics',
+        help=
+"""Output archive file with the semantic type
+SampleTable[Statistics]."""
+    )
+    parser.add_argument(
+        'bams',
+        nargs='+',
+        help=
+"""One or more input BAM files. Alternatively, you can
+provide a text file (.txt, .tsv, .csv, or .list)
+containing one BAM file per line."""
+    )
+    parser.add_argument(
+        '--assembly',
+        metavar='TEXT',
+        default='GRCh37',
+        help=
+"""Reference genome assembly (default: 'GRCh37')
+(choices: 'GRCh37', 'GRCh38')."""
+    )
+    parser.add_argument(
+        '--bed',
+        metavar='PATH',
+        help=
+"""By default, the input data is assumed to be WGS. If
+it's targeted sequencing, you must provide a BED file
+to indicate probed regions. Note that the 'chr' prefix
+in contig names (e.g. 'chr1' vs. '1') will be
+automatically added or removed as necessary to match
+the input BAM's contig names."""
+    )
+    parser.add_argument(
+        '--genes',
+        metavar='TEXT',
+        nargs='+',
+        help=
+"""List of genes to include."""
+    )
+    parser.add_argument(
+        '--exclude',
+        action='store_true',
+        help=
+"""Exclude specified genes. Ignored when --genes is not
+used."""
+    )
+    parser.add_argument(
+        '--threads',
+        metavar='INT',
+        type=int,
+        default=1,
+        help=
+"""Number of processes used to compute read depth, each
+handling one BAM file at a time (default: 1)."""
+    )
+    parser.add_argument(
+        '--bin-size',
+        metavar='INT',
+        type=int,
+        help=
+"""Average read depth over genome-aligned bins of this
+many base pairs (e.g. 100) instead of storing it for
+every position."""
+    )
+    parser.add_argument(
+        '--engine',
+        metavar='TEXT',
+        default='samtools',
+        choices=['samtools', 'pysam'],
+        help=
+"""Engine used to compute read depth (default: 'samtools')
+(choices: 'samtools', 'pysam'). 'pysam' counts reads
+in process with NumPy instead of running 'samtools
+depth', giving the same read depth, and reads each
+BAM file in a single pass. 'samtools' runs 'samtools
+depth' twice per BAM file (target and control regions)."""
+    )
+    parser.add_argument(
+        '--min-mapq',
+        metavar='INT',
+        type=int,
+        default=0,
+        help=
+"""Only count reads with mapping quality greater than or
+equal to this number (default: 0)."""
+    )
+    parser.add_argument(
+        '--flag-filter',
+        metavar='INT',
+        type=int,
+        default=1796,
+        help=
+"""Skip reads with any of these SAM flags (default: 1796,
+i.e. unmapped, secondary, QC-failed, and duplicate
+reads). Requires --engine pysam."""
+    )
+    parser.add_argument(
+        '--hts-threads',
+        metavar='INT',
+        type=int,
+        default=1,
+        help=
+"""Number of htslib threads used to decompress each BAM
+file (default: 1). Requires --engine pysam."""
+    )
+
+def main(args):
+    depth_of_coverage, control_statistics = utils.prepare_sv_inputs(
+        args.control, args.bams, assembly=args.assembly, bed=args.bed,
+        genes=args.genes, exclude=args.exclude, n_jobs=args.threads,
+        bin_size=args.bin_size, engine=args.engine, min_mapq=args.min_mapq,
+        flag_filter=args.flag_filter, hts_threads=args.hts_threads
+    )
+    depth_of_coverage.to_file(args.depth_of_coverage, payload='chunked',
+        **_archive_options(args))
+    control_statistics.to_file(args.control_statistics,
+        **_archive_options(args))
@@ -92,5 +92,8 @@ def main(args):
     pipeline.run_chip_pipeline(
         args.gene, args.output, args.variants, assembly=args.assembly,
         panel=args.panel, impute=args.impute, force=args.force,
-        samples=args.samples, exclude=args.exclude
+        samples=args.samples, exclude=args.exclude,
+        compression=args.compression,
+        compression_level=args.compression_level,
+        compression_threads=args.compression_threads
     )
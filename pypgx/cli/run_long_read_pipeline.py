@@ -75,5 +75,8 @@ can provide a list of samples."""
 def main(args):
     pipeline.run_long_read_pipeline(
         args.gene, args.output, args.variants, assembly=args.assembly,
-        force=args.force, samples=args.samples, exclude=args.exclude
+        force=args.force, samples=args.samples, exclude=args.exclude,
+        compression=args.compression,
+        compression_level=args.compression_level,
+        compression_threads=args.compression_threads
     )
@@ -164,5 +164,8 @@ def main(args):
         exclude=args.exclude, samples_without_sv=args.samples_without_sv,
         do_not_plot_copy_number=args.do_not_plot_copy_number,
         do_not_plot_allele_fraction=args.do_not_plot_allele_fraction,
-        platform=args.platform, cnv_caller=args.cnv_caller
+        platform=args.platform, cnv_caller=args.cnv_caller,
+        compression=args.compression,
+        compression_level=args.compression_level,
+        compression_threads=args.compression_threads
     )
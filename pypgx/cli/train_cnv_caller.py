@@ -1,6 +1,7 @@
 import sys
 
 from ..api import utils
+from . import _archive_options
 
 import fuc
 import pysam
@@ -62,4 +63,4 @@ def main(args):
         confusion_matrix=args.confusion_matrix,
         comparison_table=args.comparison_table
     )
-    result.to_file(args.cnv_caller)
+    result.to_file(args.cnv_caller, **_archive_options(args))
@@ -1,3 +1,3 @@
-from .utils import (Archive, add_cn_samples, compare_metadata, get_bundle_path, simulate_copy_number)
+from .utils import (Archive, add_cn_samples, compare_metadata, disable_archive_cache, enable_archive_cache, get_archive_cache_info, GenotypeArrays, get_bundle_path, OneVsRestSVC, simulate_copy_number)
 
-__all__ = ['Archive', 'add_cn_samples', 'compare_metadata', 'get_bundle_path', 'simulate_copy_number']
+__all__ = ['Archive', 'add_cn_samples', 'compare_metadata', 'disable_archive_cache', 'enable_archive_cache', 'get_archive_cache_info', 'GenotypeArrays', 'get_bundle_path', 'OneVsRestSVC', 'simulate_copy_number']
@@ -1,13 +1,19 @@
 import os
 import io
+import re
+import time
+import zlib
+import struct
 import zipfile
-import tempfile
 import copy
 import pickle
+import collections
+import threading
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 import numpy as np
-from fuc import pyvcf, pycov, common, pybam
 
 class AlleleNotFoundError(Exception):
     """Raise if specified allele is not present in the allele table."""
@@ -36,6 +42,1174 @@ class VariantNotFoundError(Exception):
 class BundleNotFoundError(Exception):
     """Raise if the given path to the pypgx-bundle directory does not exist."""
 
+PAYLOADS = ['tsv', 'npy', 'chunked', 'sharded']
+
+# Minimum gap between two positions of CovFrame data that starts a new chunk
+# when ``payload='chunked'``.
+CHUNK_GAP = 10000
+
+# Maximum number of samples per shard when ``payload='sharded'``.
+SHARD_SIZE = 100
+
+COMPRESSIONS = {
+    'deflate': zipfile.ZIP_DEFLATED,
+    'stored': zipfile.ZIP_STORED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+# Zstandard is only supported by the zipfile module of Python 3.14+.
+if hasattr(zipfile, 'ZIP_ZSTANDARD'):
+    COMPRESSIONS['zstd'] = zipfile.ZIP_ZSTANDARD
+
+# Range of compression levels accepted by each codec. The level is ignored
+# for the other codecs.
+LEVELS = {
+    'deflate': (-1, 9),
+    'bzip2': (1, 9),
+}
+
+if 'zstd' in COMPRESSIONS:
+    from compression.zstd import CompressionParameter
+    LEVELS['zstd'] = CompressionParameter.compression_level.bounds()
+    del CompressionParameter
+
+# Size of the blocks that are deflated in parallel threads.
+BLOCK_SIZE = 1024 * 1024
+
+# Byte boundary on which uncompressed NumPy members start. NumPy also pads
+# the header of a .npy file to a multiple of 64 bytes, so the array data of
+# such members is aligned as well.
+ALIGNMENT = 64
+
+# NumPy members of CovFrame data that are memory-mapped with ``mmap=True``
+# and therefore stored uncompressed and aligned. This includes the sample
+# matrices of other dtypes ('data1', 'data2', ...).
+MMAP_ARRAYS = ('chromosomes', 'positions', 'data')
+
+# Header ID of the extra field used to pad local file headers (the same one
+# used by Android's zipalign).
+_PADDING_HEADER_ID = 0xd935
+
+def _get_compression(compression=None, level=None, threads=None):
+    """
+    Return the zipfile constant, level, and number of threads for the
+    compression settings, using the ``PYPGX_COMPRESSION``,
+    ``PYPGX_COMPRESSION_LEVEL``, and ``PYPGX_COMPRESSION_THREADS``
+    environment variables for those not specified.
+
+    Raise ValueError if the codec, the level for the codec, or the number of
+    threads is incorrect.
+    """
+    if compression is None:
+        compression = os.environ.get('PYPGX_COMPRESSION', 'deflate')
+    if level is None and 'PYPGX_COMPRESSION_LEVEL' in os.environ:
+        level = int(os.environ['PYPGX_COMPRESSION_LEVEL'])
+    if threads is None:
+        threads = int(os.environ.get('PYPGX_COMPRESSION_THREADS', 1))
+    if compression not in COMPRESSIONS:
+        raise ValueError(f'Incorrect compression: {compression}')
+    if compression not in LEVELS:
+        level = None
+    elif level is not None:
+        lower, upper = LEVELS[compression]
+        if not lower <= level <= upper:
+            raise ValueError(f'Incorrect compression level for '
+                f'{compression}: {level} (must be between {lower} and '
+                f'{upper})')
+    if threads < 1:
+        raise ValueError(f'Incorrect number of threads: {threads}')
+    return COMPRESSIONS[compression], level, threads
+
+class _ZipFile(zipfile.ZipFile):
+    """
+    ZIP file whose deflated members are compressed in parallel threads.
+
+    The threads are shared by all members and shut down when the ZIP file
+    is closed, even if writing a member failed.
+    """
+
+    def __init__(self, file, mode='r', compression=zipfile.ZIP_DEFLATED,
+        compresslevel=None, threads=1):
+        self.threads = threads
+        self._executor = None
+        super().__init__(file, mode, compression, compresslevel=compresslevel)
+
+    @property
+    def executor(self):
+        """concurrent.futures.ThreadPoolExecutor : Pool of threads, started
+        on first access."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.threads)
+        return self._executor
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+class _ParallelDeflater:
+    """
+    Deflate compressor that compresses blocks of data in parallel in the
+    threads of an executor, which is owned by the caller.
+
+    As in pigz, each block is primed with the last 32 KiB of the previous
+    block and all but the last one end with a sync flush, so that the
+    concatenated output is a single raw deflate stream. It can be used in
+    place of the compressor of a member opened for writing by zipfile.
+    """
+
+    def __init__(self, level, executor, threads):
+        self._level = level
+        self._threads = threads
+        self._executor = executor
+        self._pending = collections.deque()
+        self._buffer = bytearray()
+        self._previous = b''
+
+    def _deflate(self, block, zdict, final):
+        kwargs = {'zdict': zdict} if zdict else {}
+        compressor = zlib.compressobj(self._level, zlib.DEFLATED, -15,
+            **kwargs)
+        mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return compressor.compress(block) + compressor.flush(mode)
+
+    def _submit(self, block, final):
+        block = bytes(block)
+        self._pending.append(self._executor.submit(self._deflate, block,
+            self._previous, final))
+        self._previous = block[-32768:]
+
+    def compress(self, data):
+        self._buffer += data
+        while len(self._buffer) >= BLOCK_SIZE:
+            self._submit(self._buffer[:BLOCK_SIZE], False)
+            del self._buffer[:BLOCK_SIZE]
+        # Return finished blocks in order, waiting for the oldest one when
+        # too many are pending to bound memory usage.
+        results = []
+        while self._pending and (self._pending[0].done() or
+            len(self._pending) > 2 * self._threads):
+            results.append(self._pending.popleft().result())
+        return b''.join(results)
+
+    def flush(self):
+        self._submit(self._buffer, True)
+        self._buffer = bytearray()
+        results = [x.result() for x in self._pending]
+        self._pending.clear()
+        return b''.join(results)
+
+# zipfile has no public way to set the compression level of a member opened
+# for writing or to replace its compressor. The attributes used for these are
+# only set when they exist; otherwise the member is written by zipfile alone
+# with the default level and a single thread, and a warning is issued once.
+_LEVEL_ATTRIBUTE = next((x for x in ('compress_level', '_compresslevel')
+    if hasattr(zipfile.ZipInfo, x)), None)
+_ZLIB_COMPRESSOR = type(zlib.compressobj())
+
+# Messages of the warnings issued by _warn_once.
+_WARNED = set()
+
+def _warn_once(message):
+    """
+    Issue a warning only the first time the message is given.
+    """
+    if message not in _WARNED:
+        _WARNED.add(message)
+        warnings.warn(message)
+
+def _open_member(zf, parent, name, text=False, align=False):
+    """
+    Open a member of the ZIP file for writing, as a text stream if requested.
+
+    ZIP64 extensions are always enabled because the size of the member is
+    not known in advance. Deflated members are compressed in parallel when
+    the ZIP file uses more than one thread. If ``align=True``, the member is
+    stored without compression and its local file header is padded so that
+    the member data starts on an :data:`ALIGNMENT` byte boundary of the
+    file.
+    """
+    zinfo = zipfile.ZipInfo(f'{parent}/{name}', time.localtime()[:6])
+    zinfo.compress_type = zf.compression
+    if _LEVEL_ATTRIBUTE is not None:
+        setattr(zinfo, _LEVEL_ATTRIBUTE, zf.compresslevel)
+    elif zf.compresslevel is not None:
+        _warn_once('Compression level is not supported by this version of '
+            'zipfile, using the default level')
+    if align:
+        zinfo.compress_type = zipfile.ZIP_STORED
+        # Local file header: 30 fixed bytes, file name, padding field and
+        # the 20-byte ZIP64 extra field added by zipfile.
+        size = (zipfile.sizeFileHeader + len(zinfo.filename.encode('utf-8'))
+            + 4 + 20)
+        n = -(zf.start_dir + size) % ALIGNMENT
+        zinfo.extra = struct.pack('<HH', _PADDING_HEADER_ID, n) + b'\0' * n
+    zinfo.external_attr = 0o644 << 16
+    f = zf.open(zinfo, 'w', force_zip64=True)
+    if zinfo.compress_type == zipfile.ZIP_DEFLATED and zf.threads > 1:
+        if isinstance(getattr(f, '_compressor', None), _ZLIB_COMPRESSOR):
+            level = zf.compresslevel
+            if level is None:
+                level = zlib.Z_DEFAULT_COMPRESSION
+            f._compressor = _ParallelDeflater(level, zf.executor, zf.threads)
+        else:
+            _warn_once('Parallel compression is not supported by this '
+                'version of zipfile, using a single thread')
+    if text:
+        return io.TextIOWrapper(f, encoding='utf-8')
+    return f
+
+def _write_arrays(zf, parent, arrays, aligned=()):
+    """
+    Write NumPy arrays as .npy members of the ZIP file.
+
+    Arrays named in ``aligned`` are stored uncompressed and aligned so that
+    they can be memory-mapped; the others use the compression of the ZIP
+    file.
+    """
+    for name, array in arrays.items():
+        align = (name.rstrip('0123456789') in aligned and
+            array.dtype.kind in 'biuf')
+        with _open_member(zf, parent, f'{name}.npy', align=align) as f:
+            np.save(f, array)
+
+def _coordinate_arrays(cf):
+    """
+    Return the contigs, chromosome codes, and positions of CovFrame.
+    """
+    contigs, codes = np.unique(cf.df.Chromosome.to_numpy(dtype=str),
+        return_inverse=True)
+    return {
+        'contigs': contigs,
+        'chromosomes': codes.astype(np.min_scalar_type(len(contigs))),
+        'positions': cf.df.Position.to_numpy(dtype=np.int64),
+    }
+
+def _data_name(group):
+    """
+    Return the name of the sample matrix of a dtype group.
+    """
+    return 'data' if group == 0 else f'data{group}'
+
+def _sample_arrays(cf, samples):
+    """
+    Return the names and the column-major data matrices of specified samples.
+
+    Samples of the same dtype share one matrix ('data'). If the samples have
+    different dtypes (e.g. int and float), each dtype has its own matrix
+    ('data', 'data1', ...) in the order of first appearance, and 'groups'
+    holds the matrix of each sample, so that no sample changes dtype.
+    """
+    df = cf.df[samples]
+    arrays = {'samples': np.array(samples, dtype=str)}
+    dtypes = list(dict.fromkeys(df.dtypes))
+    if len(dtypes) <= 1:
+        arrays['data'] = np.asfortranarray(df.to_numpy())
+        return arrays
+    groups = np.array([dtypes.index(x) for x in df.dtypes])
+    arrays['groups'] = groups.astype(np.min_scalar_type(len(dtypes)))
+    for i in range(len(dtypes)):
+        arrays[_data_name(i)] = np.asfortranarray(
+            df.iloc[:, groups == i].to_numpy())
+    return arrays
+
+def _read_sample_arrays(zf, parent, names, mmap=False):
+    """
+    Read the data matrices written by :func:`_sample_arrays` from the ZIP
+    file as a DataFrame of the samples, memory-mapping them if requested.
+    """
+    def load(name):
+        return _load_npy(zf, f'{parent}/{name}.npy', mmap=mmap)
+
+    if f'{parent}/groups.npy' not in zf.namelist():
+        return pd.DataFrame(load('data'), columns=names, copy=False)
+    groups = _load_npy(zf, f'{parent}/groups.npy')
+    frames = []
+    for i in range(groups.max() + 1):
+        columns = [x for x, y in zip(names, groups) if y == i]
+        frames.append(pd.DataFrame(load(_data_name(i)), columns=columns,
+            copy=False))
+    return pd.concat(frames, axis=1)[names]
+
+def _write_covframe_npy(cf, zf, parent):
+    """
+    Write CovFrame as NumPy binary members of the ZIP file.
+
+    The sample matrix is stored in column-major order so that the data of
+    each sample is contiguous.
+    """
+    arrays = _coordinate_arrays(cf)
+    arrays.update(_sample_arrays(cf, cf.samples))
+    _write_arrays(zf, parent, arrays, aligned=MMAP_ARRAYS)
+
+def _write_covframe_shards(cf, zf, parent, start=0):
+    """
+    Write the samples of CovFrame as shards of at most :data:`SHARD_SIZE`
+    samples, numbered from ``start``.
+
+    Each shard ('shards/<number>/') holds the names and the data matrix of
+    its samples. The shards present in the ZIP file form the manifest of
+    the archive, so new shards can be appended without rewriting it.
+    """
+    samples = cf.samples
+    for i, j in enumerate(range(0, len(samples), SHARD_SIZE), start):
+        _write_arrays(zf, f'{parent}/shards/{i}',
+            _sample_arrays(cf, samples[j:j+SHARD_SIZE]), aligned=MMAP_ARRAYS)
+
+def _list_shards(zf, parent):
+    """
+    Return the numbers of the shards in the ZIP file in order.
+    """
+    prefix = f'{parent}/shards/'
+    shards = [x[len(prefix):].split('/')[0] for x in zf.namelist()
+        if x.startswith(prefix) and x.endswith('/samples.npy')]
+    return sorted(int(x) for x in shards)
+
+def _load_npy(zf, name, mmap=False):
+    """
+    Load a .npy member of the ZIP file, memory-mapping it if requested and
+    possible.
+    """
+    if mmap:
+        array = _memmap_member(zf, name)
+        if array is not None:
+            return array
+    with zf.open(name) as f:
+        return np.load(f)
+
+def _memmap_member(zf, name):
+    """
+    Map an uncompressed .npy member of the ZIP file into memory.
+
+    Return None if the member cannot be mapped (e.g. it is compressed).
+    """
+    zinfo = zf.getinfo(name)
+    if (zinfo.compress_type != zipfile.ZIP_STORED or
+        not isinstance(zf.filename, str) or not zinfo.file_size):
+        return None
+    # The data starts after the local file header, whose extra field may
+    # differ from the one in the central directory.
+    zf.fp.seek(zinfo.header_offset)
+    header = struct.unpack(zipfile.structFileHeader,
+        zf.fp.read(zipfile.sizeFileHeader))
+    offset = (zinfo.header_offset + zipfile.sizeFileHeader
+        + header[zipfile._FH_FILENAME_LENGTH]
+        + header[zipfile._FH_EXTRA_FIELD_LENGTH])
+    with zf.open(zinfo) as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = \
+                np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = \
+                np.lib.format.read_array_header_2_0(f)
+        offset += f.tell()
+    if dtype.hasobject or not np.prod(shape):
+        return None
+    # Copy-on-write mapping: the archive is never modified, but callers may
+    # still change the array in place.
+    return np.memmap(zf.filename, dtype=dtype, mode='c', offset=offset,
+        shape=shape, order='F' if fortran_order else 'C')
+
+def _write_covframe_chunks(cf, zf, parent):
+    """
+    Write CovFrame as chunks of contiguous regions, each in the format of
+    :func:`_write_covframe_npy`, along with an index of the chunks.
+
+    A new chunk starts whenever the chromosome changes or the distance to
+    the previous position exceeds :data:`CHUNK_GAP`.
+    """
+    from fuc import pycov
+
+    chromosomes = cf.df.Chromosome.to_numpy(dtype=str)
+    positions = cf.df.Position.to_numpy(dtype=np.int64)
+    breaks = np.flatnonzero((chromosomes[1:] != chromosomes[:-1]) |
+        (np.diff(positions) > CHUNK_GAP)) + 1
+    starts = np.concatenate([[0], breaks])
+    ends = np.concatenate([breaks, [len(positions)]])
+    index = []
+    for i, (a, b) in enumerate(zip(starts, ends)):
+        _write_covframe_npy(pycov.CovFrame(cf.df.iloc[a:b]), zf,
+            f'{parent}/chunks/{i}')
+        if b > a:
+            index.append([i, chromosomes[a], positions[a], positions[b-1]])
+    df = pd.DataFrame(index, columns=['Chunk', 'Chromosome', 'Start', 'End'])
+    with _open_member(zf, parent, 'chunks.tsv', text=True) as f:
+        df.to_csv(f, index=False, sep='\t')
+
+def _read_covframe_chunks(zf, parent, mmap=False, region=None):
+    """
+    Read CovFrame written by :func:`_write_covframe_chunks` from the ZIP file.
+
+    If ``region`` is given, only the chunks overlapping it are read and the
+    data is sliced for the region. The 'chr' prefix in contig names is
+    ignored when matching the region.
+    """
+    from fuc import pycov, common
+
+    with zf.open(f'{parent}/chunks.tsv') as f:
+        index = pd.read_table(f, dtype={'Chromosome': str})
+    if region is not None:
+        chrom, start, end = common.parse_region(region)
+        i = index.Chromosome.str.replace('chr', '') == chrom.replace('chr', '')
+        if not pd.isna(start):
+            i &= index.End >= start
+        if not pd.isna(end):
+            i &= index.Start <= end
+        index = index[i]
+    # The first chunk is always present and provides the sample names.
+    chunks = index.Chunk.to_list() or [0]
+    df = pd.concat([_read_covframe_npy(zf, f'{parent}/chunks/{x}',
+        mmap=mmap).df for x in chunks], ignore_index=True)
+    cf = pycov.CovFrame(df)
+    if region is not None:
+        cf = _slice_covframe(cf, region)
+    return cf
+
+def _slice_covframe(cf, region):
+    """
+    Slice CovFrame for the region, ignoring the 'chr' prefix in contig names.
+    """
+    from fuc import pycov, common
+
+    chrom, start, end = common.parse_region(region)
+    df = cf.df
+    i = df.Chromosome.str.replace('chr', '') == chrom.replace('chr', '')
+    if not pd.isna(start):
+        i &= df.Position >= start
+    if not pd.isna(end):
+        i &= df.Position <= end
+    return pycov.CovFrame(df[i])
+
+def _read_covframe_npy(zf, parent, mmap=False):
+    """
+    Read CovFrame written by :func:`_write_covframe_npy` from the ZIP file.
+
+    If ``mmap=True``, uncompressed numeric members are memory-mapped instead
+    of being read into memory.
+    """
+    from fuc import pycov
+
+    def load(name):
+        return _load_npy(zf, f'{parent}/{name}.npy', mmap=mmap)
+
+    contigs = load('contigs')
+    df = _read_sample_arrays(zf, parent, load('samples').tolist(), mmap=mmap)
+    df.insert(0, 'Position', load('positions'))
+    df.insert(0, 'Chromosome', contigs[load('chromosomes')])
+    return pycov.CovFrame(df)
+
+def _read_covframe_shards(zf, parent, mmap=False, samples=None,
+    exclude=False):
+    """
+    Read CovFrame written by :func:`_write_covframe_shards` from the ZIP file.
+
+    If ``samples`` is given, only the shards containing the selected samples
+    are read.
+    """
+    from fuc import pycov
+
+    if isinstance(samples, str):
+        samples = [samples]
+    frames = []
+    for shard in _list_shards(zf, parent):
+        prefix = f'{parent}/shards/{shard}'
+        names = _load_npy(zf, f'{prefix}/samples.npy').tolist()
+        if samples is None:
+            columns = names
+        elif exclude:
+            columns = [x for x in names if x not in samples]
+        else:
+            columns = [x for x in names if x in samples]
+        if not columns:
+            continue
+        df = _read_sample_arrays(zf, prefix, names, mmap=mmap)
+        frames.append(df[columns])
+    df = pd.concat(frames, axis=1) if frames else pd.DataFrame()
+    if samples is not None and not exclude:
+        df = df[samples]
+    contigs = _load_npy(zf, f'{parent}/contigs.npy')
+    df.insert(0, 'Position', _load_npy(zf, f'{parent}/positions.npy',
+        mmap=mmap))
+    df.insert(0, 'Chromosome', contigs[_load_npy(zf,
+        f'{parent}/chromosomes.npy', mmap=mmap)])
+    return pycov.CovFrame(df)
+
+def _read_metadata(zf, parent):
+    """
+    Read the metadata of an archive from the ZIP file.
+    """
+    metadata = {}
+    with zf.open(f'{parent}/metadata.txt') as f:
+        for line in f:
+            fields = line.decode('utf-8').strip().split('=')
+            metadata[fields[0]] = fields[1]
+    return metadata
+
+def _read_data(zf, parent, semantic_type, mmap=False, region=None,
+    samples=None, exclude=False, genotypes=False):
+    """
+    Read the data of an archive with specified semantic type from the ZIP
+    file. CovFrame data can be restricted to a region and/or samples, and
+    VcfFrame data can be returned as GenotypeArrays.
+    """
+    from fuc import pyvcf, pycov
+
+    if 'CovFrame' in semantic_type:
+        names = zf.namelist()
+        if f'{parent}/shards/0/samples.npy' in names:
+            data = _read_covframe_shards(zf, parent, mmap=mmap,
+                samples=samples, exclude=exclude)
+            samples = None
+        elif f'{parent}/chunks.tsv' in names:
+            data = _read_covframe_chunks(zf, parent, mmap=mmap,
+                region=region)
+            region = None
+        elif f'{parent}/data.npy' in names:
+            data = _read_covframe_npy(zf, parent, mmap=mmap)
+        else:
+            with zf.open(f'{parent}/data.tsv') as fh:
+                data = pycov.CovFrame.from_file(fh)
+        if region is not None:
+            data = _slice_covframe(data, region)
+        if samples is not None:
+            data = data.subset(samples, exclude=exclude)
+    elif 'SampleTable' in semantic_type:
+        with zf.open(f'{parent}/data.tsv') as fh:
+            data = pd.read_table(fh, dtype={0: str})
+            data = data.set_index(data.columns[0])
+            data.index.name = None
+    elif 'VcfFrame' in semantic_type:
+        if f'{parent}/alleles.npy' in zf.namelist():
+            data = _read_genotype_arrays(zf, parent)
+            if not genotypes:
+                data = data.to_vcfframe()
+        else:
+            with zf.open(f'{parent}/data.vcf') as fh:
+                data = pyvcf.VcfFrame.from_file(fh)
+            if genotypes:
+                data = GenotypeArrays.from_vcfframe(data)
+    elif 'Model' in semantic_type:
+        if f'{parent}/kernel.txt' in zf.namelist():
+            data = _read_model_npy(zf, parent)
+        else:
+            with zf.open(f'{parent}/data.sav') as fh:
+                data = pickle.load(fh)
+    else:
+        raise SemanticTypeNotFoundError(semantic_type)
+    return data
+
+def _file_signature(stat):
+    """
+    Return the inode, size, and modification time of a file from its stat.
+    """
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+def _load_data(fn, semantic_type, signature=None, **kwargs):
+    """
+    Open the ZIP file again and read the data of a lazy archive.
+
+    If ``signature`` is given, raise RuntimeError when the file is no longer
+    the one the archive was opened from (e.g. it was replaced or modified).
+    """
+    with open(fn, 'rb') as f:
+        if (signature is not None and
+            _file_signature(os.fstat(f.fileno())) != signature):
+            raise RuntimeError(f'ZIP file has changed since the archive '
+                f'was opened: {fn}')
+        with zipfile.ZipFile(f) as zf:
+            parent = zf.filelist[0].filename.split('/')[0]
+            return _read_data(zf, parent, semantic_type, **kwargs)
+
+def _copy_on_write():
+    """
+    Return True if pandas uses Copy-on-Write.
+    """
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    return getattr(pd.options.mode, 'copy_on_write', False) is True
+
+def _copy_data(data):
+    """
+    Return a copy of archive data that cannot change the original.
+
+    With Copy-on-Write, DataFrames share memory with the original until
+    either of them is modified; otherwise, they are copied.
+    """
+    from fuc import pyvcf, pycov
+
+    deep = not _copy_on_write()
+    if isinstance(data, pycov.CovFrame):
+        return pycov.CovFrame(data.df.copy(deep=deep))
+    if isinstance(data, pyvcf.VcfFrame):
+        return pyvcf.VcfFrame(list(data.meta), data.df.copy(deep=deep))
+    if isinstance(data, pd.DataFrame):
+        return data.copy(deep=deep)
+    return copy.deepcopy(data)
+
+def _sizeof_data(data):
+    """
+    Return the approximate size of archive data in bytes.
+    """
+    from fuc import pyvcf, pycov
+
+    if isinstance(data, (pycov.CovFrame, pyvcf.VcfFrame)):
+        data = data.df
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(deep=True).sum())
+    return len(pickle.dumps(data))
+
+CacheInfo = collections.namedtuple('CacheInfo',
+    ['hits', 'misses', 'evictions', 'currsize', 'nbytes', 'maxbytes'])
+
+class _ArchiveCache:
+    """
+    Least recently used cache of archive data read from ZIP files, bounded
+    by the total size of the data.
+    """
+
+    def __init__(self, maxbytes):
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(fn, mmap):
+        """
+        Return the cache key of a ZIP file, or None if it is not a path.
+        """
+        if not isinstance(fn, (str, os.PathLike)):
+            return None
+        stat = os.stat(fn)
+        return (os.path.realpath(fn), stat.st_size, stat.st_mtime_ns, mmap)
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            metadata, data, nbytes = self._entries[key]
+        return copy.deepcopy(metadata), _copy_data(data)
+
+    def put(self, key, metadata, data):
+        nbytes = _sizeof_data(data)
+        if nbytes > self.maxbytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[2]
+            self._entries[key] = (copy.deepcopy(metadata), data, nbytes)
+            self.nbytes += nbytes
+            while self.nbytes > self.maxbytes:
+                self.nbytes -= self._entries.popitem(last=False)[1][2]
+                self.evictions += 1
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions,
+            len(self._entries), self.nbytes, self.maxbytes)
+
+# Cache used by Archive.from_file; disabled by default.
+_ARCHIVE_CACHE = None
+
+class OneVsRestSVC:
+    """
+    One-vs-rest SVM classifier stored as NumPy arrays.
+
+    This is a portable, pickle-free equivalent of a fitted
+    :class:`sklearn.multiclass.OneVsRestClassifier` of
+    :class:`sklearn.svm.SVC` estimators, which is what CNV callers are. It
+    only supports prediction and does not depend on scikit-learn.
+
+    Parameters
+    ----------
+    classes : numpy.ndarray
+        Class labels.
+    support_vectors : list
+        Support vectors of each binary estimator.
+    dual_coef : list
+        Dual coefficients of the support vectors of each binary estimator.
+    intercepts : numpy.ndarray
+        Intercept of each binary estimator.
+    kernel : {'rbf', 'linear', 'poly', 'sigmoid'}
+        Kernel type.
+    gamma : float
+        Kernel coefficient.
+    degree : int
+        Degree of the 'poly' kernel.
+    coef0 : float
+        Independent term of the 'poly' and 'sigmoid' kernels.
+    """
+
+    def __init__(self, classes, support_vectors, dual_coef, intercepts,
+        kernel, gamma, degree, coef0):
+        if kernel not in ['rbf', 'linear', 'poly', 'sigmoid']:
+            raise ValueError(f'Unsupported kernel: {kernel}')
+        self.classes = np.asarray(classes)
+        self.support_vectors = [np.asarray(x, dtype=float)
+            for x in support_vectors]
+        self.dual_coef = [np.asarray(x, dtype=float) for x in dual_coef]
+        self.intercepts = np.asarray(intercepts, dtype=float)
+        self.kernel = kernel
+        self.gamma = float(gamma)
+        self.degree = int(degree)
+        self.coef0 = float(coef0)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Construct OneVsRestSVC from a fitted scikit-learn classifier.
+
+        Parameters
+        ----------
+        model : sklearn.multiclass.OneVsRestClassifier
+            One-vs-rest classifier of :class:`sklearn.svm.SVC` estimators.
+
+        Returns
+        -------
+        OneVsRestSVC
+            Converted classifier.
+        """
+        estimators = model.estimators_
+        if not all([hasattr(x, 'support_vectors_') for x in estimators]):
+            raise ValueError('Estimators must be fitted SVC objects')
+        e = estimators[0]
+        return cls(model.classes_, [x.support_vectors_ for x in estimators],
+            [x.dual_coef_[0] for x in estimators],
+            [x.intercept_[0] for x in estimators], e.kernel, e._gamma,
+            e.degree, e.coef0)
+
+    def _kernel(self, X, Y):
+        K = X @ Y.T
+        if self.kernel == 'linear':
+            return K
+        if self.kernel == 'poly':
+            return (self.gamma * K + self.coef0) ** self.degree
+        if self.kernel == 'sigmoid':
+            return np.tanh(self.gamma * K + self.coef0)
+        K *= -2
+        K += (X ** 2).sum(axis=1)[:, None]
+        K += (Y ** 2).sum(axis=1)[None, :]
+        np.maximum(K, 0, out=K)
+        return np.exp(-self.gamma * K)
+
+    def decision_function(self, X):
+        """
+        Compute the decision value of each binary estimator.
+
+        Parameters
+        ----------
+        X : numpy.ndarray
+            Input data of shape (samples, features).
+
+        Returns
+        -------
+        numpy.ndarray
+            Decision values of shape (samples, estimators).
+        """
+        X = np.asarray(X, dtype=float)
+        values = [self._kernel(X, sv) @ coef + intercept for sv, coef,
+            intercept in zip(self.support_vectors, self.dual_coef,
+            self.intercepts)]
+        return np.column_stack(values)
+
+    def predict(self, X):
+        """
+        Predict class labels.
+
+        Parameters
+        ----------
+        X : numpy.ndarray
+            Input data of shape (samples, features).
+
+        Returns
+        -------
+        numpy.ndarray
+            Predicted class labels.
+        """
+        values = self.decision_function(X)
+        # A binary problem is solved by a single estimator.
+        if len(self.classes) == 2 and values.shape[1] == 1:
+            return self.classes[(values[:, 0] > 0).astype(int)]
+        return self.classes[np.argmax(values, axis=1)]
+
+    def to_arrays(self):
+        """
+        Return the arrays and kernel parameters of the classifier.
+
+        Returns
+        -------
+        dict
+            NumPy arrays keyed by name.
+        dict
+            Kernel parameters keyed by name.
+        """
+        arrays = {
+            'classes': self.classes,
+            'support_vectors': np.concatenate(self.support_vectors),
+            'dual_coef': np.concatenate(self.dual_coef),
+            'intercepts': self.intercepts,
+            'offsets': np.cumsum([0] + [len(x) for x in self.dual_coef]),
+        }
+        kernel = {
+            'Kernel': self.kernel,
+            'Gamma': repr(self.gamma),
+            'Degree': str(self.degree),
+            'Coef0': repr(self.coef0),
+        }
+        return arrays, kernel
+
+    @classmethod
+    def from_arrays(cls, arrays, kernel):
+        """
+        Construct OneVsRestSVC from the output of :meth:`to_arrays`.
+        """
+        offsets = arrays['offsets']
+        bounds = list(zip(offsets[:-1], offsets[1:]))
+        return cls(arrays['classes'],
+            [arrays['support_vectors'][a:b] for a, b in bounds],
+            [arrays['dual_coef'][a:b] for a, b in bounds],
+            arrays['intercepts'], kernel['Kernel'], float(kernel['Gamma']),
+            int(kernel['Degree']), float(kernel['Coef0']))
+
+def _write_model_npy(model, zf, parent):
+    """
+    Write OneVsRestSVC as NumPy binary members of the ZIP file, along with
+    a text file of its kernel parameters.
+    """
+    arrays, kernel = model.to_arrays()
+    _write_arrays(zf, parent, arrays)
+    with _open_member(zf, parent, 'kernel.txt', text=True) as f:
+        for k, v in kernel.items():
+            f.write(f'{k}={v}\n')
+
+def _read_model_npy(zf, parent):
+    """
+    Read OneVsRestSVC written by :func:`_write_model_npy` from the ZIP file.
+    """
+    names = ['classes', 'support_vectors', 'dual_coef', 'intercepts',
+        'offsets']
+    arrays = {x: _load_npy(zf, f'{parent}/{x}.npy') for x in names}
+    kernel = {}
+    with zf.open(f'{parent}/kernel.txt') as f:
+        for line in f:
+            fields = line.decode('utf-8').strip().split('=')
+            kernel[fields[0]] = fields[1]
+    return OneVsRestSVC.from_arrays(arrays, kernel)
+
+def _format_unique(values, func):
+    """
+    Format each row of a 2D array as a string, calling ``func`` only once
+    per unique row.
+    """
+    if not len(values):
+        return np.empty(0, dtype=str)
+    # Groups are numbered in the order of their first occurrence.
+    df = pd.DataFrame(values)
+    codes = df.groupby(list(df.columns), sort=False, dropna=False).ngroup()
+    uniques = df.drop_duplicates().to_numpy().tolist()
+    strings = np.array([func(x) for x in uniques], dtype=str)
+    return strings[codes.to_numpy()]
+
+def _parse_unique(values, func):
+    """
+    Parse each string of a 1D array into a row of values, calling ``func``
+    only once per unique string.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = np.array([func(x) for x in uniques])
+    return parsed.reshape(len(uniques), -1)[codes]
+
+def _format_values(values, counts, func):
+    """
+    Format the first ``counts`` values of each row joined by commas, or '.'
+    if all of them are missing.
+    """
+    def one_row(x):
+        items = [func(y) for y in x[1:int(x[0])+1]]
+        if all([y == '.' for y in items]):
+            return '.'
+        return ','.join(items)
+    return _format_unique(np.column_stack([counts, values]), one_row)
+
+def _parse_values(values, m, func, missing):
+    """
+    Parse comma-separated values into rows of ``m`` values, with
+    ``missing`` for missing and absent values.
+    """
+    def one_value(x):
+        items = [missing if y == '.' else func(y) for y in x.split(',')]
+        if len(items) > m:
+            raise ValueError(f'Too many values: {x}')
+        return items + [missing] * (m - len(items))
+    return _parse_unique(values, one_value)
+
+_GT_PATTERN = re.compile(r'^([0-9]+|\.)(?:([/|])([0-9]+|\.))?$')
+
+def _parse_gt(x):
+    """
+    Parse GT into the two allele indices and the phase bit.
+    """
+    match = _GT_PATTERN.match(x)
+    if match is None:
+        raise ValueError(f'Unsupported GT: {x}')
+    a, sep, b = match.groups()
+    return [-1 if a == '.' else int(a),
+        -2 if sep is None else -1 if b == '.' else int(b), int(sep == '|')]
+
+def _format_gt(x):
+    """
+    Format the two allele indices and the phase bit as GT.
+    """
+    a = '.' if x[0] == -1 else str(x[0])
+    if x[1] == -2:
+        return a
+    return a + ('|' if x[2] else '/') + ('.' if x[1] == -1 else str(x[1]))
+
+def _smallest_int(values):
+    """
+    Return integer values with the smallest signed dtype that fits them.
+    """
+    values = np.asarray(values)
+    dtype = np.result_type(np.min_scalar_type(-2),
+        np.min_scalar_type(values.max(initial=0)))
+    return values.astype(dtype)
+
+class GenotypeArrays:
+    """
+    Genotypes of VcfFrame stored as typed NumPy arrays.
+
+    This is the compact representation of VcfFrame data written with
+    ``payload='npy'`` (see :meth:`Archive.to_file`). The per-sample fields
+    GT, AD, DP, and AF are stored as arrays of shape (sites, samples) or
+    (sites, samples, alleles), so that they can be used without parsing
+    strings.
+
+    Parameters
+    ----------
+    meta : list
+        List of metadata lines.
+    sites : pandas.DataFrame
+        Site table with the columns CHROM, POS, ID, REF, ALT, QUAL, FILTER,
+        INFO, and FORMAT.
+    samples : list
+        Sample names.
+    alleles : numpy.ndarray
+        Allele indices of the genotypes, with -1 for missing alleles and -2
+        for the second allele of haploid genotypes.
+    phased : numpy.ndarray
+        Whether each genotype is phased.
+    ad : numpy.ndarray, optional
+        Read depth of each allele (REF first), with -1 for missing values.
+    dp : numpy.ndarray, optional
+        Read depth, with -1 for missing values.
+    af : numpy.ndarray, optional
+        Allele fraction of each allele (REF first), with NaN for missing
+        values.
+    decimals : int, default: 3
+        Number of decimals of AF.
+    """
+
+    KEYS = ['GT', 'AD', 'DP', 'AF']
+
+    def __init__(self, meta, sites, samples, alleles, phased, ad=None,
+        dp=None, af=None, decimals=3):
+        self.meta = meta
+        self.sites = sites
+        self.samples = list(samples)
+        self.alleles = alleles
+        self.phased = phased
+        self.ad = ad
+        self.dp = dp
+        self.af = af
+        self.decimals = decimals
+
+    @property
+    def counts(self):
+        """numpy.ndarray : Number of alleles (REF included) at each site."""
+        alt = self.sites.ALT
+        return np.where(alt == '.', 1, alt.str.count(',') + 2)
+
+    @classmethod
+    def from_vcfframe(cls, vf):
+        """
+        Construct GenotypeArrays from VcfFrame.
+
+        Parameters
+        ----------
+        vf : fuc.api.pyvcf.VcfFrame
+            VcfFrame whose FORMAT fields are a subset of GT, AD, DP, and AF
+            (in that order, GT first) at every site. All AF values must
+            have the same number of decimals.
+
+        Returns
+        -------
+        GenotypeArrays
+            Converted genotypes.
+
+        Raises
+        ------
+        ValueError
+            If the VcfFrame cannot be converted back from the arrays exactly
+            (e.g. other FORMAT fields).
+        """
+        sites = vf.df.iloc[:, :9].reset_index(drop=True)
+        samples = vf.samples
+        n = len(samples)
+        if not len(sites) or not n:
+            raise ValueError('VcfFrame has no genotypes')
+        formats = sites.FORMAT.unique()
+        keys = {x: x.split(':') for x in formats}
+        for fmt in formats:
+            if (keys[fmt][0] != 'GT' or
+                keys[fmt] != [x for x in cls.KEYS if x in keys[fmt]]):
+                raise ValueError(f'Unsupported FORMAT: {fmt}')
+        present = set(sum(keys.values(), []))
+        counts = np.where(sites.ALT == '.', 1, sites.ALT.str.count(',') + 2)
+        m = max(counts.max(initial=1), 1)
+        cells = vf.df[samples].to_numpy(dtype=object)
+        fields = {x: np.empty((len(sites), n), dtype=object) for x in present}
+        for fmt in formats:
+            rows = np.flatnonzero(sites.FORMAT == fmt)
+            parts = [x.split(':') for x in cells[rows].ravel()]
+            if any([len(x) != len(keys[fmt]) for x in parts]):
+                raise ValueError(f'Incomplete fields for FORMAT: {fmt}')
+            for key, column in zip(keys[fmt], zip(*parts)):
+                fields[key][rows] = np.array(column, dtype=object).reshape(
+                    len(rows), n)
+        # Fields absent from some sites are parsed as missing there.
+        for key in present:
+            fields[key][pd.isna(fields[key])] = '.'
+        gt = _parse_unique(fields['GT'].ravel(), _parse_gt)
+        arrays = {
+            'alleles': _smallest_int(gt[:, :2]).reshape(len(sites), n, 2),
+            'phased': gt[:, 2].astype(bool).reshape(len(sites), n),
+        }
+        if 'AD' in present:
+            arrays['ad'] = _smallest_int(_parse_values(fields['AD'].ravel(),
+                m, int, -1)).reshape(len(sites), n, m)
+        if 'DP' in present:
+            arrays['dp'] = _smallest_int(_parse_values(fields['DP'].ravel(),
+                1, int, -1)).reshape(len(sites), n)
+        if 'AF' in present:
+            values = fields['AF'].ravel()
+            af = _parse_values(values, m, float, np.nan)
+            arrays['af'] = af.astype(np.float32).reshape(len(sites), n, m)
+            decimals = {len(y.partition('.')[2]) for x in pd.unique(values)
+                for y in x.split(',') if y != '.'}
+            if len(decimals) > 1:
+                raise ValueError('AF values have different numbers of '
+                    'decimals')
+            if decimals:
+                arrays['decimals'] = decimals.pop()
+        result = cls(vf.meta, sites, samples, **arrays)
+        if not np.array_equal(result._format_cells(), cells):
+            raise ValueError('VcfFrame cannot be stored as arrays exactly')
+        return result
+
+    def _format_cells(self):
+        """
+        Return the sample fields as an array of strings.
+        """
+        counts = self.counts
+        n = len(self.samples)
+        cells = np.empty(self.phased.shape, dtype=object)
+        decimals = self.decimals
+        def integer(x):
+            return '.' if x < 0 else str(x)
+        def fraction(x):
+            return '.' if x != x else f'{x:.{decimals}f}'
+        for fmt in self.sites.FORMAT.unique():
+            rows = np.flatnonzero(self.sites.FORMAT == fmt)
+            c = np.repeat(counts[rows], n)
+            fields = []
+            for key in fmt.split(':'):
+                if key == 'GT':
+                    values = np.column_stack([
+                        self.alleles[rows].reshape(-1, 2),
+                        self.phased[rows].reshape(-1)])
+                    fields.append(_format_unique(values, _format_gt))
+                elif key == 'AD':
+                    values = self.ad[rows].reshape(len(c), -1)
+                    fields.append(_format_values(values, c, integer))
+                elif key == 'DP':
+                    values = self.dp[rows].reshape(-1, 1)
+                    fields.append(_format_unique(values,
+                        lambda x: integer(x[0])))
+                else:
+                    values = self.af[rows].reshape(len(c), -1)
+                    fields.append(_format_values(values, c, fraction))
+            result = fields[0]
+            for field in fields[1:]:
+                result = np.char.add(np.char.add(result, ':'), field)
+            cells[rows] = result.reshape(len(rows), n)
+        return cells
+
+    def to_vcfframe(self):
+        """
+        Convert the arrays back to VcfFrame.
+
+        Returns
+        -------
+        fuc.api.pyvcf.VcfFrame
+            VcfFrame object.
+        """
+        from fuc import pyvcf
+
+        df = pd.DataFrame(self._format_cells(), columns=self.samples)
+        df = pd.concat([self.sites, df], axis=1)
+        return pyvcf.VcfFrame(list(self.meta), df)
+
+def _write_genotype_arrays(ga, zf, parent):
+    """
+    Write GenotypeArrays as a sites-only VCF file and NumPy binary members
+    of the ZIP file.
+    """
+    with _open_member(zf, parent, 'sites.vcf', text=True) as f:
+        if ga.meta:
+            f.write('\n'.join(ga.meta) + '\n')
+        ga.sites.rename(columns={'CHROM': '#CHROM'}).to_csv(f, index=False,
+            sep='\t')
+    arrays = {'samples': np.array(ga.samples, dtype=str),
+        'alleles': ga.alleles, 'phased': ga.phased}
+    for name in ['ad', 'dp', 'af']:
+        if getattr(ga, name) is not None:
+            arrays[name] = getattr(ga, name)
+    if ga.af is not None:
+        arrays['decimals'] = np.array(ga.decimals)
+    _write_arrays(zf, parent, arrays)
+
+def _read_genotype_arrays(zf, parent):
+    """
+    Read GenotypeArrays written by :func:`_write_genotype_arrays` from the
+    ZIP file.
+
+    The arrays are compressed like the other members of the archive, so
+    they are decompressed into memory rather than memory-mapped.
+    """
+    from fuc import pyvcf
+
+    with zf.open(f'{parent}/sites.vcf') as fh:
+        vf = pyvcf.VcfFrame.from_file(fh)
+    names = zf.namelist()
+    arrays = {}
+    for name in ['samples', 'alleles', 'phased', 'ad', 'dp', 'af']:
+        if f'{parent}/{name}.npy' in names:
+            arrays[name] = _load_npy(zf, f'{parent}/{name}.npy')
+    arrays['samples'] = arrays['samples'].tolist()
+    if f'{parent}/decimals.npy' in names:
+        arrays['decimals'] = int(_load_npy(zf, f'{parent}/decimals.npy'))
+    return GenotypeArrays(vf.meta, vf.df, **arrays)
+
 class Archive:
     """
     Class for storing various data.
@@ -52,6 +1226,25 @@ class Archive:
         self.metadata = metadata
         self.data = data
 
+    @property
+    def data(self):
+        """data, results, or model : Data, results, or model. For a lazy
+        Archive, it is read from the ZIP file on first access."""
+        if self._loader is not None:
+            self._data = self._loader()
+            self._loader = None
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._loader = None
+
+    @property
+    def loaded(self):
+        """bool : Whether the data has been loaded."""
+        return self._loader is None
+
     @property
     def type(self):
         """str : Semantic type."""
@@ -61,78 +1254,365 @@ class Archive:
         """dict : Copy of the metadata."""
         return copy.deepcopy(self.metadata)
 
-    def to_file(self, fn):
+    def to_file(self, fn, payload='tsv', compression=None, level=None,
+        threads=None):
         """
         Create a ZIP file for the Archive.
 
+        Model data of :class:`OneVsRestSVC` is stored as NumPy binary files;
+        other models are pickled.
+
         Parameters
         ----------
         fn : str
             ZIP file.
+        payload : {'tsv', 'npy', 'chunked', 'sharded'}, default: 'tsv'
+            Format of CovFrame data. The 'npy' format stores positions and
+            the sample matrix as typed NumPy binary files, which are much
+            faster to read than text. Numeric files are stored without
+            compression and aligned so that they can be memory-mapped (see
+            :meth:`from_file`). The 'chunked' format splits the data into
+            contiguous regions stored in the 'npy' format, with an index of
+            the regions, so that :meth:`slice` only reads the chunks it
+            needs. The 'sharded' format stores the samples in shards of
+            :data:`SHARD_SIZE` samples, so that :meth:`subset` only reads the
+            shards it needs and :meth:`append_samples` can add samples
+            without rewriting the file. For VcfFrame data, the 'npy' format
+            stores the site table as a sites-only VCF file and the GT, AD,
+            DP, and AF fields as typed arrays (see :class:`GenotypeArrays`);
+            data with other FORMAT fields is stored as VCF as usual. It is
+            ignored for other semantic types.
+        compression : {'deflate', 'stored', 'bzip2', 'lzma', 'zstd'}, optional
+            Compression codec of the ZIP file members ('zstd' requires
+            Python 3.14+). By default, use the ``PYPGX_COMPRESSION``
+            environment variable or 'deflate'. The codec is detected
+            automatically when the archive is read.
+        level : int, optional
+            Compression level (e.g. 1 for fast deflate), between -1 and 9
+            for 'deflate' and between 1 and 9 for 'bzip2' (see
+            :data:`LEVELS`). By default, use the ``PYPGX_COMPRESSION_LEVEL``
+            environment variable or the default level of the codec. It is
+            ignored for 'stored' and 'lzma'.
+        threads : int, optional
+            Number of threads used to deflate large members in parallel
+            blocks. By default, use the ``PYPGX_COMPRESSION_THREADS``
+            environment variable or 1. It is ignored for other codecs.
         """
-        with tempfile.TemporaryDirectory() as t:
-            with open(f'{t}/metadata.txt', 'w') as f:
-                for k, v in self.metadata.items():
-                    if k == 'SemanticType':
-                        semantic_type = v
-                    f.write(f'{k}={v}\n')
-            if 'CovFrame' in self.metadata['SemanticType']:
-                self.data.to_file(f'{t}/data.tsv')
-            elif 'SampleTable' in self.metadata['SemanticType']:
-                self.data.to_csv(f'{t}/data.tsv', sep='\t')
-            elif 'VcfFrame' in self.metadata['SemanticType']:
-                self.data.to_file(f'{t}/data.vcf')
-            elif 'Model' in self.metadata['SemanticType']:
-                pickle.dump(self.data, open(f'{t}/data.sav', 'wb'))
-            else:
-                raise SemanticTypeNotFoundError(self.metadata['SemanticType'])
-            zipf = zipfile.ZipFile(fn, 'w', zipfile.ZIP_DEFLATED)
-            for root, dirs, files in os.walk(t):
-                for file in files:
-                    if file == '.DS_Store':
-                        continue
-                    zipf.write(os.path.join(root, file),
-                               os.path.relpath(os.path.join(root, file),
-                                               os.path.join(t, '..')))
-            zipf.close()
-
-            common.color_print(f'Saved {semantic_type} to: {fn}')
+        from fuc import common
+
+        if payload not in PAYLOADS:
+            raise ValueError(f'Incorrect payload: {payload}')
+
+        compression, level, threads = _get_compression(compression, level,
+            threads)
+
+        semantic_type = self.metadata['SemanticType']
+
+        if not any([x in semantic_type for x in
+            ['CovFrame', 'SampleTable', 'VcfFrame', 'Model']]):
+            raise SemanticTypeNotFoundError(semantic_type)
+
+        # VcfFrame data that cannot be stored as arrays exactly falls back
+        # to the VCF format.
+        genotypes = None
+        if 'VcfFrame' in semantic_type and payload == 'npy':
+            try:
+                genotypes = GenotypeArrays.from_vcfframe(self.data)
+            except ValueError:
+                pass
+
+        # Members are written directly into the ZIP file under a directory
+        # named after it (e.g. 'alleles/data.tsv' for 'alleles.zip').
+        parent = os.path.splitext(os.path.basename(fn))[0]
+
+        # The ZIP file is written under a temporary name and then renamed,
+        # so that an existing file at the same path (which may still be
+        # memory-mapped by another Archive) is never truncated.
+        temp = f'{fn}.{os.getpid()}.tmp'
+
+        try:
+            with _ZipFile(temp, 'w', compression, compresslevel=level,
+                threads=threads) as zf:
+                with _open_member(zf, parent, 'metadata.txt', text=True) as f:
+                    for k, v in self.metadata.items():
+                        f.write(f'{k}={v}\n')
+                if 'CovFrame' in semantic_type and payload == 'sharded':
+                    _write_arrays(zf, parent, _coordinate_arrays(self.data),
+                        aligned=MMAP_ARRAYS)
+                    _write_covframe_shards(self.data, zf, parent)
+                elif 'CovFrame' in semantic_type and payload == 'chunked':
+                    _write_covframe_chunks(self.data, zf, parent)
+                elif 'CovFrame' in semantic_type and payload == 'npy':
+                    _write_covframe_npy(self.data, zf, parent)
+                elif 'CovFrame' in semantic_type:
+                    with _open_member(zf, parent, 'data.tsv', text=True) as f:
+                        self.data.df.to_csv(f, index=False, sep='\t')
+                elif 'SampleTable' in semantic_type:
+                    with _open_member(zf, parent, 'data.tsv', text=True) as f:
+                        self.data.to_csv(f, sep='\t')
+                elif ('VcfFrame' in semantic_type and payload == 'npy' and
+                    genotypes is not None):
+                    _write_genotype_arrays(genotypes, zf, parent)
+                elif 'VcfFrame' in semantic_type:
+                    with _open_member(zf, parent, 'data.vcf', text=True) as f:
+                        if self.data.meta:
+                            f.write('\n'.join(self.data.meta) + '\n')
+                        self.data.df.rename(columns={'CHROM': '#CHROM'}
+                            ).to_csv(f, index=False, sep='\t')
+                elif isinstance(self.data, OneVsRestSVC):
+                    _write_model_npy(self.data, zf, parent)
+                else:
+                    with _open_member(zf, parent, 'data.sav') as f:
+                        pickle.dump(self.data, f)
+            os.replace(temp, fn)
+        except BaseException:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+        common.color_print(f'Saved {semantic_type} to: {fn}')
 
     @classmethod
-    def from_file(cls, fn):
+    def from_file(cls, fn, lazy=False, mmap=False):
         """
         Construct Archive from a ZIP file.
 
+        The format of CovFrame and VcfFrame data (text or NumPy binary) is
+        detected automatically.
+
         Parameters
         ----------
         fn : str
             ZIP file.
+        lazy : bool, default: False
+            If True, only read the metadata and load the data from the ZIP
+            file when :attr:`data` is first accessed. This makes checking the
+            semantic type or metadata of a large archive cheap. Loading the
+            data raises RuntimeError if the file has been replaced or
+            modified in the meantime.
+        mmap : bool, default: False
+            If True, memory-map the numeric members of CovFrame data stored
+            with ``payload='npy'`` instead of reading them into memory. Only
+            the parts of the sample matrix that are actually used (e.g. a
+            few columns) are then read from disk. It is ignored for other
+            semantic types and payloads, including the arrays returned by
+            :meth:`genotype_arrays`, which are always decompressed.
+
+        See Also
+        --------
+        enable_archive_cache
+            Cache the data of archives read from ZIP files in memory.
         """
-        metadata = {}
-        zf = zipfile.ZipFile(fn)
-        parent = zf.filelist[0].filename.split('/')[0]
-        with zf.open(f'{parent}/metadata.txt') as f:
-            for line in f:
-                fields = line.decode('utf-8').strip().split('=')
-                metadata[fields[0]] = fields[1]
-        if 'CovFrame' in metadata['SemanticType']:
-            with zf.open(f'{parent}/data.tsv') as fh:
-                data = pycov.CovFrame.from_file(fh)
-        elif 'SampleTable' in metadata['SemanticType']:
-            with zf.open(f'{parent}/data.tsv') as fh:
-                data = pd.read_table(fh, dtype={0: str})
-                data = data.set_index(data.columns[0])
-                data.index.name = None
-        elif 'VcfFrame' in metadata['SemanticType']:
-            with zf.open(f'{parent}/data.vcf') as fh:
-                data = pyvcf.VcfFrame.from_file(fh)
-        elif 'Model' in metadata['SemanticType']:
-            with zf.open(f'{parent}/data.sav') as fh:
-                data = pickle.load(fh)
-        else:
-            raise SemanticTypeNotFoundError(metadata['SemanticType'])
+        cache = _ARCHIVE_CACHE
+        key = None if cache is None else cache.key(fn, mmap)
+
+        if key is not None:
+            entry = cache.get(key)
+            if entry is not None:
+                return cls(*entry)
+
+        with zipfile.ZipFile(fn) as zf:
+            parent = zf.filelist[0].filename.split('/')[0]
+            metadata = _read_metadata(zf, parent)
+            semantic_type = metadata['SemanticType']
+            if not any([x in semantic_type for x in
+                ['CovFrame', 'SampleTable', 'VcfFrame', 'Model']]):
+                raise SemanticTypeNotFoundError(semantic_type)
+            if lazy:
+                original = copy.deepcopy(metadata)
+                signature = None
+                if isinstance(fn, (str, os.PathLike)):
+                    signature = _file_signature(os.fstat(zf.fp.fileno()))
+                def loader(**kwargs):
+                    data = _load_data(fn, semantic_type, signature=signature,
+                        mmap=mmap, **kwargs)
+                    # Only complete data of an unchanged file is cached.
+                    if (key is not None and not kwargs and
+                        cache.key(fn, mmap) == key):
+                        cache.put(key, original, data)
+                        data = _copy_data(data)
+                    return data
+                archive = cls(metadata, None)
+                archive._loader = loader
+                return archive
+            data = _read_data(zf, parent, semantic_type, mmap=mmap)
+
+        if key is not None:
+            cache.put(key, metadata, data)
+            data = _copy_data(data)
+
         return cls(metadata, data)
 
+    def slice(self, region):
+        """
+        Slice CovFrame data for the region.
+
+        If the data has not been loaded yet (see ``lazy`` in
+        :meth:`from_file`) and was stored with ``payload='chunked'``, only
+        the chunks overlapping the region are read from the ZIP file. The
+        'chr' prefix in contig names is ignored when matching the region.
+
+        Parameters
+        ----------
+        region : str
+            Region ('chrom:start-end').
+
+        Returns
+        -------
+        pypgx.Archive
+            Archive object with the sliced data.
+        """
+        if 'CovFrame' not in self.type:
+            raise IncorrectSemanticTypeError(
+                f'Expected CovFrame, but instead found {self.type}')
+        if self._loader is None:
+            data = _slice_covframe(self.data, region)
+        else:
+            data = self._loader(region=region)
+        return self.__class__(self.copy_metadata(), data)
+
+    def subset(self, samples, exclude=False):
+        """
+        Subset CovFrame data for specified samples.
+
+        If the data has not been loaded yet (see ``lazy`` in
+        :meth:`from_file`) and was stored with ``payload='sharded'``, only
+        the shards containing the selected samples are read from the ZIP
+        file.
+
+        Parameters
+        ----------
+        samples : str or list
+            Sample name or list of names (the order matters).
+        exclude : bool, default: False
+            If True, exclude specified samples.
+
+        Returns
+        -------
+        pypgx.Archive
+            Archive object with the subsetted data.
+        """
+        if 'CovFrame' not in self.type:
+            raise IncorrectSemanticTypeError(
+                f'Expected CovFrame, but instead found {self.type}')
+        if self._loader is None:
+            data = self.data.subset(samples, exclude=exclude)
+        else:
+            data = self._loader(samples=samples, exclude=exclude)
+        return self.__class__(self.copy_metadata(), data)
+
+    def genotype_arrays(self):
+        """
+        Return the genotypes of VcfFrame data as typed arrays.
+
+        If the data has not been loaded yet (see ``lazy`` in
+        :meth:`from_file`) and was stored with ``payload='npy'``, the arrays
+        are read from the ZIP file directly without building the VcfFrame.
+
+        Returns
+        -------
+        GenotypeArrays
+            Genotypes of the data.
+        """
+        if 'VcfFrame' not in self.type:
+            raise IncorrectSemanticTypeError(
+                f'Expected VcfFrame, but instead found {self.type}')
+        if self._loader is None:
+            return GenotypeArrays.from_vcfframe(self.data)
+        return self._loader(genotypes=True)
+
+    def append_samples(self, fn, compression=None, level=None,
+        threads=None):
+        """
+        Append the samples of the archive to an existing ZIP file in place.
+
+        The ZIP file must contain CovFrame data with the same semantic type
+        and positions, written with ``payload='sharded'``. The samples are
+        added as new shards at the end of the file; existing samples are
+        neither read nor rewritten. Members of the ZIP file may use
+        different codecs, so the new shards can be compressed differently
+        from the existing ones.
+
+        Unlike :meth:`to_file`, the ZIP file is modified in place. If an
+        error is raised while appending, the file is restored to its
+        original contents; if the process is killed instead, the file may
+        be left without a valid central directory.
+
+        Parameters
+        ----------
+        fn : str
+            ZIP file.
+        compression : {'deflate', 'stored', 'bzip2', 'lzma', 'zstd'}, optional
+            Compression codec of the new members. By default, use the
+            ``PYPGX_COMPRESSION`` environment variable or 'deflate' (see
+            :meth:`to_file`).
+        level : int, optional
+            Compression level. By default, use the
+            ``PYPGX_COMPRESSION_LEVEL`` environment variable or the default
+            level of the codec (see :meth:`to_file`).
+        threads : int, optional
+            Number of threads used to deflate large members. By default,
+            use the ``PYPGX_COMPRESSION_THREADS`` environment variable or 1
+            (see :meth:`to_file`).
+        """
+        if 'CovFrame' not in self.type:
+            raise IncorrectSemanticTypeError(
+                f'Expected CovFrame, but instead found {self.type}')
+
+        compression, level, threads = _get_compression(compression, level,
+            threads)
+
+        # New members overwrite the central directory at the end of the
+        # file, which is kept so that the file can be restored on error.
+        with zipfile.ZipFile(fn) as zf:
+            start = zf.start_dir
+        with open(fn, 'rb') as f:
+            f.seek(start)
+            directory = f.read()
+
+        try:
+            self._append_samples(fn, compression, level, threads)
+        except BaseException:
+            with open(fn, 'r+b') as f:
+                f.seek(start)
+                f.write(directory)
+                f.truncate()
+            raise
+
+    def _append_samples(self, fn, compression, level, threads):
+        """
+        Append the samples to the ZIP file (see :meth:`append_samples`).
+        """
+        with _ZipFile(fn, 'a', compression, compresslevel=level,
+            threads=threads) as zf:
+            parent = zf.filelist[0].filename.split('/')[0]
+            target = self.__class__(_read_metadata(zf, parent), None)
+            target.check_type(self.type)
+            for key in ['Gene', 'Assembly']:
+                if key in self.metadata and key in target.metadata:
+                    compare_metadata(key, target, self)
+            shards = _list_shards(zf, parent)
+            if not shards:
+                raise ValueError(f"Samples can only be appended to a ZIP "
+                    f"file written with payload='sharded': {fn}")
+            coordinates = _coordinate_arrays(self.data)
+            contigs = _load_npy(zf, f'{parent}/contigs.npy')
+            chromosomes = _load_npy(zf, f'{parent}/chromosomes.npy')
+            positions = _load_npy(zf, f'{parent}/positions.npy')
+            if not (np.array_equal(positions, coordinates['positions']) and
+                np.array_equal(contigs[chromosomes],
+                coordinates['contigs'][coordinates['chromosomes']])):
+                raise ValueError(f'Positions are different from {fn}')
+            existing = set()
+            for shard in shards:
+                existing.update(_load_npy(zf,
+                    f'{parent}/shards/{shard}/samples.npy').tolist())
+            duplicates = [x for x in self.data.samples if x in existing]
+            if duplicates:
+                raise ValueError(f'Samples already present in {fn}: '
+                    f'{duplicates}')
+            _write_covframe_shards(self.data, zf, parent, start=shards[-1]+1)
+
     def check_type(self, semantic_types):
         """
         Raise IncorrectSemanticTypeError if the archive does not have
@@ -169,6 +1649,51 @@ class Archive:
                 f"Expected '{key}={value}' but found '{key}={actual_value}' "
                 f"for semantic type '{semantic_type}'")
 
+def enable_archive_cache(maxbytes=2**30):
+    """
+    Enable the in-memory cache of archives read from ZIP files.
+
+    When enabled, :meth:`Archive.from_file` keeps the data of each ZIP file
+    it reads, keyed by the real path, size, and modification time of the
+    file, so reading an unchanged file again does not parse it. The least
+    recently used archives are evicted when the total size of the cached
+    data exceeds ``maxbytes``. Each call returns its own copy of the data,
+    which shares memory with the cached data until either is modified
+    (Copy-on-Write), so callers cannot change the cached archive.
+
+    Calling this function again replaces the cache with an empty one.
+
+    Parameters
+    ----------
+    maxbytes : int, default: 1073741824
+        Maximum total size of the cached data in bytes (1 GiB by default).
+    """
+    global _ARCHIVE_CACHE
+    _ARCHIVE_CACHE = _ArchiveCache(maxbytes)
+
+def disable_archive_cache():
+    """
+    Disable the in-memory cache of archives and release the cached data.
+    """
+    global _ARCHIVE_CACHE
+    _ARCHIVE_CACHE = None
+
+def get_archive_cache_info():
+    """
+    Return the statistics of the in-memory cache of archives.
+
+    Returns
+    -------
+    CacheInfo or None
+        Named tuple with the number of hits, misses, and evictions, the
+        number of cached archives (``currsize``), and the total and maximum
+        size of the cached data in bytes (``nbytes`` and ``maxbytes``).
+        None if the cache is disabled.
+    """
+    if _ARCHIVE_CACHE is None:
+        return None
+    return _ARCHIVE_CACHE.info()
+
 def compare_metadata(key, *archives):
     """
     Raise IncorrectMetadataError if two or more archives have different
@@ -214,6 +1739,8 @@ def parse_pharmvar(fn):
     fn : str
         Gene data directory.
     """
+    from fuc import pyvcf
+
     gene = os.path.basename(fn).split('-')[0]
 
     rs_dict = {}
@@ -308,14 +1835,14 @@ def simulate_copy_number(
         Target archive the semantic type CovFrame[CopyNumber] with simultated
         samples appended.
     """
-    target = Archive.from_file(target)
-    source = Archive.from_file(source)
+    target = Archive.from_file(target, lazy=True)
+    source = Archive.from_file(source, lazy=True)
 
     target.check_type('CovFrame[CopyNumber]')
     source.check_type('CovFrame[CopyNumber]')
     compare_metadata('Assembly', target, source)
 
-    data = source.data.df[sample]
+    data = source.subset(sample).data.df[sample]
 
     target.data.df[sample] = data
 
@@ -356,15 +1883,17 @@ def add_cn_samples(target, source, samples):
         Target archive the semantic type CovFrame[CopyNumber] with new
         samples appended.
     """
-    target = Archive.from_file(target)
-    source = Archive.from_file(source)
+    from fuc import common
+
+    target = Archive.from_file(target, lazy=True)
+    source = Archive.from_file(source, lazy=True)
     samples = common.parse_list_or_file(samples)
 
     target.check_type('CovFrame[CopyNumber]')
     source.check_type('CovFrame[CopyNumber]')
     compare_metadata('Assembly', target, source)
 
-    df = source.data.df[samples]
+    df = source.subset(samples).data.df[samples]
     target.data.df = pd.concat([target.data.df, df], axis=1)
     return target
 
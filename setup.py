@@ -1,9 +1,32 @@
+import importlib.util
+import os
+import warnings
+
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 
 exec(open('pypgx/version.py').read())
 
 requirements = ['fuc', 'scikit-learn']
 
+class BuildPyCommand(build_py):
+    """Compile the bundled data tables into a binary snapshot."""
+
+    def run(self):
+        super().run()
+        if self.dry_run:
+            return
+        try:
+            spec = importlib.util.spec_from_file_location(
+                'pypgx_data', 'pypgx/api/data/__init__.py')
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except ImportError as e:
+            warnings.warn(f'Skipping table snapshot: {e}')
+            return
+        path = os.path.join(self.build_lib, 'pypgx', 'api', 'data')
+        module.write_snapshot(path=path)
+
 setup(
     name='pypgx',
     version=__version__,
@@ -23,5 +46,6 @@ setup(
     package_data={
         'pypgx.api': ['beagle.22Jul22.46e.jar', 'data/*']
     },
+    cmdclass={'build_py': BuildPyCommand},
     entry_points={'console_scripts': ['pypgx=pypgx.__main__:main']}
 )
@@ -1,11 +1,63 @@
 import unittest
+import subprocess
+import os
+import sys
+import argparse
+import pathlib
+import tempfile
+import zipfile
+import pickle
+import warnings
+import threading
+from unittest import mock
 
 import pypgx
 import pandas as pd
 import numpy as np
-from fuc import pyvcf, common
+from fuc import pyvcf, pycov, common
 
 class TestPypgx(unittest.TestCase):
+    def write_bam(self, fn, reads, sample=None, chr_prefix=False):
+        # Write a small indexed BAM file from (contig, start, cigar, flag,
+        # mapq) tuples, with 0-based starts and contigs 10 and 22 of the
+        # same length as chromosome 22 of GRCh37.
+        import pysam
+        names = [f'chr{x}' if chr_prefix else x for x in ['10', '22']]
+        header = {'HD': {'VN': '1.6', 'SO': 'coordinate'}, 'SQ': [{'SN': x, 'LN': 51304566} for x in names]}
+        if sample is not None:
+            header['RG'] = [{'ID': 'RG', 'SM': sample}]
+        with pysam.AlignmentFile(fn, 'wb', header=header) as f:
+            for i, (contig, start, cigar, flag, mapq) in enumerate(sorted(reads, key=lambda x: (x[0], x[1]))):
+                read = pysam.AlignedSegment(f.header)
+                read.query_name = f'r{i}'
+                read.reference_id = ['10', '22'].index(contig)
+                read.reference_start = start
+                read.cigarstring = cigar
+                read.flag = flag
+                read.mapping_quality = mapq
+                read.query_sequence = 'A' * read.query_length
+                if sample is not None:
+                    read.set_tag('RG', 'RG')
+                f.write(read)
+        pysam.index(fn)
+
+
+    def test_import(self):
+        # Heavy dependencies must not be imported by ``import pypgx``.
+        code = 'import sys, pypgx; print(",".join(x for x in ["matplotlib", "seaborn", "sklearn", "pysam", "scipy"] if x in sys.modules))'
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual('', result.stdout.strip())
+        self.assertIn('plot_cn_af', dir(pypgx))
+        self.assertTrue(callable(pypgx.predict_alleles))
+
+    def test_cli_manifest(self):
+        from pypgx.cli import MANIFEST, commands
+        stems = sorted(x.stem for x in pathlib.Path('pypgx/cli').glob('*.py') if '__' not in x.stem)
+        self.assertEqual(stems, [x[2] for x in MANIFEST])
+        for name, help, module in MANIFEST:
+            subparsers = argparse.ArgumentParser().add_subparsers()
+            commands[name].create_parser(subparsers)
+            self.assertEqual([(name, help)], [(x.dest, x.help) for x in subparsers._choices_actions])
 
     def test_allele_table(self):
         df = pypgx.load_allele_table()
@@ -80,10 +132,436 @@ class TestPypgx(unittest.TestCase):
                 if diff:
                     raise ValueError(gene, assembly, diff)
 
+    def test_load_table(self):
+        df = pypgx.load_gene_table()
+        df.loc[df.Gene == 'CYP2D6', 'Target'] = False
+        self.assertIn('CYP2D6', pypgx.list_genes())
+        self.assertTrue(pypgx.load_gene_table().equals(pypgx.load_gene_table()))
+
+    def test_table_snapshot(self):
+        from pypgx.api import data, core
+        get_data = data.pkgutil.get_data
+        expected = {k: data.parse_table(k, get_data('pypgx.api.data', f'{k}-table.csv')) for k in data.TABLES}
+        with tempfile.TemporaryDirectory() as t:
+            data.write_snapshot(output=f'{t}/{data.SNAPSHOT}')
+            with open(f'{t}/{data.SNAPSHOT}', 'rb') as f:
+                snapshot = pickle.load(f)
+        def run(snapshot):
+            b = pickle.dumps(snapshot)
+            with mock.patch.object(data.pkgutil, 'get_data', lambda package, resource: b if resource == data.SNAPSHOT else get_data(package, resource)):
+                with warnings.catch_warnings(record=True) as w:
+                    warnings.simplefilter('always')
+                    index, tables = data.read_index()
+                    return index, dict(tables), [str(x.message) for x in w]
+        # A matching snapshot is used as is, without parsing the CSV files,
+        # and only needs hashing them when their timestamps differ.
+        marker = pd.DataFrame({'Marker': [1]})
+        for stats in [snapshot['Stats'], dict(snapshot['Stats'], gene=(0, 0))]:
+            index, tables, w = run(dict(snapshot, Stats=stats, Index=dict(snapshot['Index'], priorities='Marker'), Tables=dict(snapshot['Tables'], gene=pickle.dumps({'Marker': [1]}))))
+            self.assertEqual([], w)
+            self.assertEqual('Marker', index['priorities'])
+            self.assertIs(True, tables['gene'].equals(marker))
+        # The tables do not depend on the pandas version.
+        for k in expected:
+            pd.testing.assert_frame_equal(expected[k], pd.DataFrame(pickle.loads(snapshot['Tables'][k])))
+        # A stale checksum or snapshot version falls back to the CSV files.
+        stale = dict(snapshot, Stats=None, Checksums=dict(snapshot['Checksums'], gene='0'))
+        for stale in [stale, dict(snapshot, Version=0)]:
+            index, tables, w = run(dict(stale, Tables=dict(stale['Tables'], gene=pickle.dumps({'Marker': [1]}))))
+            self.assertEqual(1, len(w))
+            self.assertIn('Ignoring outdated', w[0])
+            # Records contain NaN, which never compares equal.
+            self.assertEqual(repr(snapshot['Index']), repr(index))
+            self.assertEqual(sorted(expected), sorted(tables))
+            for k in expected:
+                self.assertTrue(tables[k].equals(expected[k]))
+        kb = core._KnowledgeBase(snapshot['Index'], data.SnapshotTables(snapshot['Tables']))
+        self.assertEqual(core._get_knowledge_base().genes['CYP2D6'], kb.genes['CYP2D6'])
+        self.assertTrue(kb.tables['gene'].equals(expected['gene']))
+
+    def test_table_snapshot_wheel(self):
+        # The snapshot is compiled into the wheel and used when installed.
+        import shutil
+        root = pathlib.Path(pypgx.__file__).parent.parent
+        with tempfile.TemporaryDirectory() as t:
+            for name in ['setup.py', 'pyproject.toml', 'README.rst']:
+                shutil.copy(root / name, t)
+            shutil.copytree(root / 'pypgx', f'{t}/pypgx', ignore=shutil.ignore_patterns('__pycache__', 'tables.pkl'))
+            subprocess.run([sys.executable, '-m', 'pip', 'wheel', '--no-deps', '--no-build-isolation', '-w', f'{t}/dist', t], capture_output=True, check=True)
+            wheel = next(pathlib.Path(f'{t}/dist').glob('*.whl'))
+            with zipfile.ZipFile(wheel) as zf:
+                self.assertIn('pypgx/api/data/tables.pkl', zf.namelist())
+                zf.extractall(f'{t}/site')
+            code = 'import warnings; from pypgx.api import data; warnings.simplefilter("error"); index, tables = data.read_index(); print(data.__file__, type(tables).__name__)'
+            env = dict(os.environ, PYTHONPATH=f'{t}/site')
+            result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=f'{t}/site', env=env)
+            path, tables = result.stdout.split()
+            self.assertTrue(path.startswith(f'{t}/site'))
+            self.assertEqual('SnapshotTables', tables)
+
+    def test_allele_definitions(self):
+        for gene in ['CYP2B6', 'CYP2D6', 'UGT1A1']:
+            for assembly in ['GRCh37', 'GRCh38']:
+                definitions = pypgx.get_allele_definitions(gene, assembly=assembly)
+                self.assertIs(definitions, pypgx.get_allele_definitions(gene, assembly=assembly))
+                for allele in definitions.alleles:
+                    for mode in ['all', 'core', 'tag']:
+                        a = definitions.list_variants(allele, mode=mode)
+                        b = pypgx.list_variants(gene, alleles=allele, mode=mode, assembly=assembly)
+                        self.assertEqual(a, b)
+
+    def test_collapse_alleles(self):
+        self.assertEqual(['*7'], pypgx.collapse_alleles('CYP2B6', ['*6', '*7']))
+        definitions = pypgx.get_allele_definitions('CYP2B6')
+        a = definitions.collapse_many([['*6', '*7'], ['*7', '*6', '*9'], ['*6'], []])
+        self.assertEqual([['*7'], ['*7'], ['*6'], []], a)
+
+    def test_variant_index(self):
+        index = pypgx.get_variant_index()
+        for variant in ['2-234668879-C-CAT', '2-234668879-CAT-CATAT', 'chr2-234668879-CATAT-CATATAT']:
+            self.assertEqual('2-234668879-C-CAT', index.canonicalize(variant))
+        self.assertIsNone(index.canonicalize('1-1-A-G'))
+        for variant in ['rs123', '2-234668879-C', '2-X-C-CAT', '2-1-A-G-T', np.nan]:
+            self.assertIsNone(index.canonicalize(variant))
+        df = index.annotate(['19-41515263-A-G', '1-1-A-G'])
+        self.assertEqual(pypgx.list_alleles('CYP2B6', variants='19-41515263-A-G'), df.StarAllele.to_list())
+
+    def test_predict_scores(self):
+        alleles = ['*1', '*1x2', '*36+*10', '*1x2+*4x2+*10', '*22', '*1']
+        a = pypgx.predict_scores('CYP2D6', alleles)
+        b = [pypgx.predict_score('CYP2D6', x) for x in alleles]
+        np.testing.assert_array_equal(b, a)
+
+    def test_call_phenotypes(self):
+        for gene in ['CYP2D6', 'CYP2B6']:
+            data = pd.DataFrame({'Genotype': ['*1/*4', '*4/*1', '*1/*1x2', 'Indeterminate', '*1/*4']}, index=list('ABCDE'))
+            archive = pypgx.Archive({'Gene': gene, 'SemanticType': 'SampleTable[Genotypes]'}, data)
+            a = pypgx.call_phenotypes(archive).data.Phenotype.to_list()
+            b = [pypgx.predict_phenotype(gene, *x.split('/')) if x != 'Indeterminate' else x for x in data.Genotype]
+            self.assertEqual(a, b)
+
+    def test_get_priority(self):
+        self.assertEqual('Normal/Routine/Low Risk', pypgx.get_priority('CYP2D6', 'Normal Metabolizer'))
+        # A phenotype of another gene raises IndexError, as it always has.
+        self.assertRaises(IndexError, pypgx.get_priority, 'CYP2D6', 'Normal Function')
+
+    def test_get_recommendations(self):
+        df = pd.DataFrame({'CYP2D6': ['Normal Metabolizer', 'Poor Metabolizer', np.nan], 'CYP2C19': ['Normal Metabolizer', 'Intermediate Metabolizer', 'Poor Metabolizer']}, index=['A', 'B', 'C'])
+        a = pypgx.get_recommendations(df, drugs=['codeine', 'amitriptyline'])
+        self.assertEqual(pypgx.get_recommendation('codeine', 'CYP2D6', 'Poor Metabolizer'), a.loc['B', 'codeine'])
+        self.assertEqual(pypgx.get_recommendation('amitriptyline', 'CYP2C19', 'Intermediate Metabolizer', 'CYP2D6', 'Poor Metabolizer'), a.loc['B', 'amitriptyline'])
+        self.assertTrue(a.loc['C'].isna().all())
+
+    def test_archive_payload(self):
+        data = {'Chromosome': ['22'] * 5 + ['X'] * 5, 'Position': np.arange(10) + 100, 'A': np.arange(10), 'B': np.arange(10) * 2}
+        cf = pycov.CovFrame(pd.DataFrame(data))
+        archive = pypgx.Archive({'Gene': 'CYP2D6', 'Assembly': 'GRCh37', 'SemanticType': 'CovFrame[ReadDepth]'}, cf)
+        with tempfile.TemporaryDirectory() as t:
+            for payload in ['tsv', 'npy', 'chunked', 'sharded']:
+                archive.to_file(f'{t}/{payload}.zip', payload=payload)
+                result = pypgx.Archive.from_file(f'{t}/{payload}.zip')
+                self.assertTrue(result.data.df.equals(cf.df))
+                result = pypgx.Archive.from_file(f'{t}/{payload}.zip', lazy=True)
+                result.check_type('CovFrame[ReadDepth]')
+                self.assertFalse(result.loaded)
+                self.assertTrue(result.data.df.equals(cf.df))
+                self.assertTrue(result.loaded)
+                result = pypgx.Archive.from_file(f'{t}/{payload}.zip', mmap=True)
+                self.assertTrue(result.data.df.equals(cf.df))
+                with zipfile.ZipFile(f'{t}/{payload}.zip') as zf:
+                    stored = sorted(set(x.filename.split('/')[-1] for x in zf.infolist() if x.compress_type == zipfile.ZIP_STORED))
+                self.assertEqual([] if payload == 'tsv' else ['chromosomes.npy', 'data.npy', 'positions.npy'], stored)
+                result = pypgx.Archive.from_file(f'{t}/{payload}.zip', lazy=True)
+                self.assertTrue(result.slice('chr22:101-103').data.df.reset_index(drop=True).equals(cf.slice('22:101-103').df))
+                self.assertTrue(result.subset(['B']).data.df.equals(cf.subset(['B']).df))
+            other = pycov.CovFrame(cf.df.rename(columns={'A': 'C', 'B': 'D'}))
+            with mock.patch.dict(os.environ, {'PYPGX_COMPRESSION': 'bzip2'}):
+                pypgx.Archive(archive.copy_metadata(), other).append_samples(f'{t}/sharded.zip', compression='lzma')
+            result = pypgx.Archive.from_file(f'{t}/sharded.zip')
+            self.assertEqual(['A', 'B', 'C', 'D'], result.data.samples)
+            with zipfile.ZipFile(f'{t}/sharded.zip') as zf:
+                self.assertEqual(zipfile.ZIP_LZMA, zf.getinfo('sharded/shards/1/samples.npy').compress_type)
+            self.assertRaises(ValueError, archive.append_samples, f'{t}/sharded.zip')
+            # A failure while appending leaves the ZIP file unchanged.
+            with open(f'{t}/sharded.zip', 'rb') as f:
+                original = f.read()
+            write_arrays = pypgx.sdk.utils._write_arrays
+            def fail(zf, parent, arrays, aligned=()):
+                write_arrays(zf, parent, {'samples': arrays['samples']})
+                raise ZeroDivisionError
+            other = pycov.CovFrame(cf.df.rename(columns={'A': 'E', 'B': 'F'}))
+            with mock.patch.object(pypgx.sdk.utils, '_write_arrays', fail):
+                self.assertRaises(ZeroDivisionError, pypgx.Archive(archive.copy_metadata(), other).append_samples, f'{t}/sharded.zip')
+            with open(f'{t}/sharded.zip', 'rb') as f:
+                self.assertEqual(original, f.read())
+            self.assertEqual(['A', 'B', 'C', 'D'], pypgx.Archive.from_file(f'{t}/sharded.zip').data.samples)
+
+    def test_archive_dtypes(self):
+        data = {'Chromosome': ['22'] * 3, 'Position': [1, 2, 3], 'A': [1, 2, 3], 'B': [0.5, 1.5, 2.5], 'C': [4, 5, 6]}
+        cf = pycov.CovFrame(pd.DataFrame(data))
+        archive = pypgx.Archive({'Gene': 'CYP2D6', 'Assembly': 'GRCh37', 'SemanticType': 'CovFrame[ReadDepth]'}, cf)
+        with tempfile.TemporaryDirectory() as t:
+            for payload in ['npy', 'chunked', 'sharded']:
+                archive.to_file(f'{t}/{payload}.zip', payload=payload)
+                for kwargs in [{}, {'lazy': True}, {'mmap': True}]:
+                    result = pypgx.Archive.from_file(f'{t}/{payload}.zip', **kwargs)
+                    pd.testing.assert_frame_equal(cf.df, result.data.df)
+                result = pypgx.Archive.from_file(f'{t}/{payload}.zip', lazy=True)
+                pd.testing.assert_frame_equal(cf.df[['Chromosome', 'Position', 'C', 'B']], result.subset(['C', 'B']).data.df)
+
+    def test_archive_lazy_replaced(self):
+        metadata = {'Gene': 'CYP2D6', 'Assembly': 'GRCh37', 'SemanticType': 'CovFrame[ReadDepth]'}
+        a = pycov.CovFrame(pd.DataFrame({'Chromosome': ['22'] * 3, 'Position': [1, 2, 3], 'A': [1, 2, 3]}))
+        b = pycov.CovFrame(pd.DataFrame({'Chromosome': ['22'] * 2, 'Position': [1, 2], 'B': [4, 5], 'C': [6, 7]}))
+        with tempfile.TemporaryDirectory() as t:
+            pypgx.Archive(metadata, a).to_file(f'{t}/depth.zip')
+            result = pypgx.Archive.from_file(f'{t}/depth.zip', lazy=True)
+            pypgx.Archive(metadata, b).to_file(f'{t}/depth.zip')
+            # Data of a replaced file is never returned for the old metadata.
+            with self.assertRaises(RuntimeError):
+                result.data
+            self.assertRaises(RuntimeError, result.subset, ['B'])
+            result = pypgx.Archive.from_file(f'{t}/depth.zip', lazy=True)
+            self.assertEqual(['B', 'C'], result.data.samples)
+
+    def test_archive_compression(self):
+        data = pd.DataFrame(np.arange(300000).reshape(-1, 3), index=[f'S{i}' for i in range(100000)], columns=list('ABC'))
+        archive = pypgx.Archive({'Gene': 'CYP2D6', 'SemanticType': 'SampleTable[Statistics]'}, data)
+        with tempfile.TemporaryDirectory() as t:
+            for compression, threads in [('deflate', 1), ('deflate', 3), ('stored', 1)]:
+                archive.to_file(f'{t}/archive.zip', compression=compression, threads=threads)
+                self.assertTrue(pypgx.Archive.from_file(f'{t}/archive.zip').data.equals(data))
+            for compression, level in [('deflate', 12), ('deflate', -2), ('bzip2', 0)]:
+                with self.assertRaisesRegex(ValueError, 'Incorrect compression level'):
+                    archive.to_file(f'{t}/archive.zip', compression=compression, level=level)
+            archive.to_file(f'{t}/archive.zip', compression='stored', level=12)
+            # Without the zipfile attributes, members are written by zipfile alone with a warning.
+            with mock.patch.object(pypgx.sdk.utils, '_LEVEL_ATTRIBUTE', None), mock.patch.object(pypgx.sdk.utils, '_ZLIB_COMPRESSOR', type(None)), mock.patch.object(pypgx.sdk.utils, '_WARNED', set()):
+                with warnings.catch_warnings(record=True) as w:
+                    warnings.simplefilter('always')
+                    archive.to_file(f'{t}/archive.zip', level=1, threads=3)
+                    archive.to_file(f'{t}/archive.zip', level=1, threads=3)
+            self.assertEqual(2, len(w))
+            self.assertTrue(pypgx.Archive.from_file(f'{t}/archive.zip').data.equals(data))
+            # Compression threads are shut down even if writing fails.
+            def to_csv(self, f, **kwargs):
+                f.write('A' * 2**23)
+                raise ZeroDivisionError
+            threads = threading.active_count()
+            with self.assertRaises(ZeroDivisionError):
+                with mock.patch.object(pd.DataFrame, 'to_csv', to_csv):
+                    archive.to_file(f'{t}/archive.zip', threads=3)
+            self.assertEqual(threads, threading.active_count())
+
+    def test_archive_cache(self):
+        pypgx.sdk.enable_archive_cache()
+        try:
+            a = pypgx.Archive.from_file('test-data/CYP4F2-GRCh37.zip')
+            a.data.df.loc[0, 'POS'] = 1
+            b = pypgx.Archive.from_file('test-data/CYP4F2-GRCh37.zip', lazy=True)
+            self.assertNotEqual(1, b.data.df.loc[0, 'POS'])
+            self.assertEqual((1, 1), pypgx.sdk.get_archive_cache_info()[:2])
+        finally:
+            pypgx.sdk.disable_archive_cache()
+
+    def test_cnv_model(self):
+        from sklearn.multiclass import OneVsRestClassifier
+        from sklearn.svm import SVC
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(60, 40))
+        Y = np.repeat([0, 1, 2], 20)
+        X[:, :10] += Y[:, None]
+        model = OneVsRestClassifier(SVC(random_state=1)).fit(X, Y)
+        archive = pypgx.Archive({'Gene': 'CYP2D6', 'Assembly': 'GRCh37', 'SemanticType': 'Model[CNV]'}, pypgx.sdk.OneVsRestSVC.from_sklearn(model))
+        with tempfile.TemporaryDirectory() as t:
+            archive.to_file(f'{t}/model.zip')
+            result = pypgx.Archive.from_file(f'{t}/model.zip')
+        X = rng.normal(size=(100, 40)) + rng.integers(0, 3, size=(100, 1))
+        np.testing.assert_array_equal(model.predict(X), result.data.predict(X))
+        # Bundle models are cached, but each caller gets its own Archive.
+        with tempfile.TemporaryDirectory() as t:
+            os.makedirs(f'{t}/cnv/GRCh37')
+            archive.to_file(f'{t}/cnv/GRCh37/CYP2D6.zip')
+            with mock.patch.object(pypgx.sdk, 'get_bundle_path', return_value=t):
+                a = pypgx.api.utils._get_bundle_cnv_caller('CYP2D6', 'GRCh37')
+                a.metadata['Gene'] = 'CYP2B6'
+                b = pypgx.api.utils._get_bundle_cnv_caller('CYP2D6', 'GRCh37')
+        self.assertIsNot(a, b)
+        self.assertEqual('CYP2D6', b.metadata['Gene'])
+        self.assertIs(a.data, b.data)
+
+    def test_genotype_arrays(self):
+        archive = pypgx.Archive.from_file('test-data/CYP4F2-GRCh37.zip')
+        with tempfile.TemporaryDirectory() as t:
+            archive.to_file(f'{t}/variants.zip', payload='npy')
+            result = pypgx.Archive.from_file(f'{t}/variants.zip', lazy=True)
+            ga = result.genotype_arrays()
+            with zipfile.ZipFile(f'{t}/variants.zip') as zf:
+                self.assertEqual({zipfile.ZIP_DEFLATED}, set(x.compress_type for x in zf.infolist()))
+            self.assertTrue(pypgx.Archive.from_file(f'{t}/variants.zip').data.df.equals(archive.data.df))
+        self.assertEqual([[[1, 1]], [[0, 1]]], ga.alleles.tolist())
+        self.assertEqual([[[0, 30]], [[15, 15]]], ga.ad.tolist())
+        self.assertTrue(ga.phased.all())
+
     def test_predict_alleles(self):
         a = pypgx.predict_alleles('test-data/CYP4F2-GRCh37.zip')
         b = pypgx.predict_alleles('test-data/CYP4F2-GRCh38.zip')
         self.assertEqual(['*1;', '*2;', ';', '*2:19-16008388-A-C:0.5;*1:default;'], a.data.loc['A'].to_list(), b.data.loc['A'].to_list())
 
+    def test_merge_depth(self):
+        from pypgx.api.utils import _merge_depth
+        regions = ['22:100-200', '10:50-60']
+        a = pd.DataFrame({'Chromosome': ['22', '22', '10'], 'Position': [150, 160, 55], 'A': [1, 2, 3]})
+        b = pd.DataFrame({'Chromosome': ['10', '10'], 'Position': [50, 55], 'B': [4, 5]})
+        c = pd.DataFrame({'Chromosome': ['22', '10'], 'Position': [100, 60], 'C': [6, 7]})
+        expected = pd.DataFrame({'Chromosome': ['10', '10', '10', '22', '22', '22'], 'Position': [50, 55, 60, 100, 150, 160], 'A': [0, 3, 0, 0, 1, 2], 'B': [4, 5, 0, 0, 0, 0], 'C': [0, 0, 7, 6, 0, 0]})
+        result = _merge_depth([a, b, c], regions).df
+        self.assertEqual(['Chromosome', 'Position', 'A', 'B', 'C'], result.columns.to_list())
+        self.assertTrue(all([x.kind == 'i' for x in result.dtypes.iloc[1:]]))
+        pd.testing.assert_frame_equal(expected, result, check_dtype=False)
+        # Float read depth is not truncated.
+        result = _merge_depth([a.assign(A=a.A / 4), b], regions).df
+        self.assertEqual([0, 0.75, 0.25, 0.5], result.A.to_list())
+        self.assertEqual('i', result.B.dtype.kind)
+        # BAM files read separately are merged as if read all at once.
+        with tempfile.TemporaryDirectory() as t:
+            self.write_bam(f'{t}/A.bam', [('22', 149, '2M', 0, 60), ('10', 54, '1M', 0, 60)], 'A')
+            self.write_bam(f'{t}/B.bam', [('10', 49, '6M', 0, 60)], 'B')
+            self.write_bam(f'{t}/C.bam', [('22', 99, '1M', 0, 60), ('10', 59, '1M', 0, 60)], 'C')
+            bams = [f'{t}/{x}.bam' for x in 'ABC']
+            expected = pycov.CovFrame.from_bam(bams, regions=regions).df
+            dfs = [pycov.CovFrame.from_bam([x], regions=regions).df for x in bams]
+        pd.testing.assert_frame_equal(expected, _merge_depth(dfs, regions).df, check_dtype=False)
+        # Equal coordinates are concatenated as they are.
+        result = _merge_depth([a, a.rename(columns={'A': 'B'})], regions).df
+        self.assertEqual([150, 160, 55], result.Position.to_list())
+        self.assertEqual(result.A.to_list(), result.B.to_list())
+
+    def test_prepare_sv_inputs(self):
+        from pypgx.api import utils
+        reads = [('22', 42512600, '50M', 0, 60), ('22', 42520000, '20M5D20M', 0, 60), ('22', 42530000, '30M', 1024, 60), ('10', 150, '40M', 0, 60), ('10', 170, '10M100N10M', 0, 10)]
+        with tempfile.TemporaryDirectory() as t:
+            self.write_bam(f'{t}/A.bam', reads, 'A')
+            self.write_bam(f'{t}/B.bam', reads[:2] + [('10', 400, '60M', 0, 60)], 'B')
+            self.write_bam(f'{t}/C.bam', reads[1:3], 'C')
+            bams = [f'{t}/{x}.bam' for x in 'ABC']
+            for kwargs in [{}, {'min_mapq': 20}, {'bin_size': 100}, {'engine': 'pysam'}, {'engine': 'pysam', 'bin_size': 100, 'n_jobs': 2}]:
+                control = {k: v for k, v in kwargs.items() if k != 'bin_size'}
+                a = utils.prepare_depth_of_coverage(bams, genes=['CYP2D6'], **kwargs)
+                b = utils.compute_control_statistics('10:100-900', bams, **control)
+                c, d = utils.prepare_sv_inputs('10:100-900', bams, genes=['CYP2D6'], **kwargs)
+                self.assertEqual(a.metadata, c.metadata)
+                self.assertEqual(b.metadata, d.metadata)
+                pd.testing.assert_frame_equal(a.data.df, c.data.df)
+                pd.testing.assert_frame_equal(b.data, d.data)
+        self.assertEqual(['A', 'B', 'C'], d.data.index.to_list())
+
+    def test_bin_depth(self):
+        from pypgx.api.utils import _bin_depth
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({'Chromosome': ['1'] * 250 + ['2'] * 50, 'Position': np.r_[np.arange(95, 345), np.arange(1, 51)], 'A': rng.integers(0, 50, 300).astype(float), 'B': rng.integers(0, 50, 300).astype(float)})
+        df.loc[10:30, 'A'] = np.nan
+        expected = df.groupby(['Chromosome', (df.Position - 1) // 100 * 100 + 1], sort=False)[['A', 'B']].mean().reset_index()
+        result = _bin_depth(df, 100)
+        self.assertEqual([1, 101, 201, 301, 1], result.Position.to_list())
+        pd.testing.assert_frame_equal(expected, result, check_dtype=False)
+        pd.testing.assert_frame_equal(df, _bin_depth(df, 1), check_dtype=False)
+
+    def test_unbin_copy_number(self):
+        from pypgx.api.utils import _unbin_copy_number, _process_copy_number, _match_bin_size
+        metadata = {'Gene': 'CYP2D6', 'Assembly': 'GRCh37', 'SemanticType': 'CovFrame[CopyNumber]', 'Platform': 'WGS', 'Control': 'VDR', 'Samples': 'None', 'BinSize': '100'}
+        positions = np.arange(42512401, 42551884, 100)
+        df = pd.DataFrame({'Chromosome': '22', 'Position': positions, 'A': np.linspace(1, 3, len(positions))})
+        binned = pypgx.Archive(metadata, pycov.CovFrame(df))
+        model = pypgx.Archive({'Gene': 'CYP2D6', 'Assembly': 'GRCh37', 'SemanticType': 'Model[CNV]'}, None)
+        result = _process_copy_number(_match_bin_size(binned, model))
+        self.assertNotIn('BinSize', result.metadata)
+        self.assertEqual(39384, result.data.df.shape[0])
+        self.assertEqual(42512500, result.data.df.Position.iat[0])
+        self.assertEqual(42551883, result.data.df.Position.iat[-1])
+        unbinned = _unbin_copy_number(binned).data.df
+        self.assertEqual(df.A.to_list(), unbinned.groupby((unbinned.Position - 1) // 100).A.first().to_list())
+        # Binned models require copy number with the same bins.
+        model.metadata['BinSize'] = '100'
+        self.assertIs(binned, _match_bin_size(binned, model))
+        for size, copy_number in [('200', binned), ('100', result)]:
+            model.metadata['BinSize'] = size
+            self.assertRaises(pypgx.sdk.utils.IncorrectMetadataError, _match_bin_size, copy_number, model)
+
+    def test_count_coverage(self):
+        from pypgx.api.utils import _count_coverage
+        np.testing.assert_array_equal([1, 2, 1, 0, 1, 1], _count_coverage([0, 2, 5], [3, 4, 9], 1, 6))
+        np.testing.assert_array_equal([0, 0, 0], _count_coverage([], [], 10, 3))
+
+    def test_count_depth(self):
+        from pypgx.api.utils import _count_depth
+        reads = [('10', 10, '5M2D5M', 0, 60), ('10', 12, '3M3N3M', 0, 60), ('10', 14, '4M', 1024, 60), ('10', 30, '3M', 0, 5), ('10', 50, '5M', 4, 60)]
+        default = [1, 1, 2, 2, 2, 0, 0, 1, 2, 2, 2, 1]
+        with tempfile.TemporaryDirectory() as t:
+            self.write_bam(f'{t}/A.bam', reads, 'A')
+            a, b, c, d = _count_depth(f'{t}/A.bam', [('10:1-40', False), ('10:1-40', True), ('chr22:1-100', False), ('22:1-100', True)], 'chr')
+            e, f = _count_depth(f'{t}/A.bam', [('10:1-40', False), ('10:16-18', True)], '', min_mapq=10, flag_filter=0)
+        # Deletions and reference skips are reported with zero depth.
+        self.assertEqual(list(range(11, 23)) + [31, 32, 33], a.Position.to_list())
+        self.assertEqual(default + [1, 1, 1], a.A.to_list())
+        self.assertEqual(['chr10'], a.Chromosome.unique().tolist())
+        self.assertEqual(list(range(1, 41)), b.Position.to_list())
+        self.assertEqual([0] * 10 + default + [0] * 8 + [1, 1, 1] + [0] * 7, b.A.to_list())
+        self.assertTrue(c.empty)
+        self.assertEqual(['Chromosome', 'Position', 'A'], c.columns.to_list())
+        self.assertEqual([0] * 100, d.A.to_list())
+        self.assertEqual(list(range(11, 23)), e.Position.to_list())
+        self.assertEqual([1, 1, 2, 2, 3, 1, 1, 2, 2, 2, 2, 1], e.A.to_list())
+        self.assertEqual([[16, 1], [17, 1], [18, 2]], f[['Position', 'A']].values.tolist())
+
+    def test_get_depth_options(self):
+        from pypgx.api.utils import _get_depth_options
+        self.assertEqual({'engine': 'pysam', 'min_mapq': 0, 'flag_filter': 0, 'hts_threads': 2}, _get_depth_options('pysam', 0, 0, 2))
+        for args in [('samtools', 0, 0, 1), ('samtools', 0, 1796, 2), ('pysam', 0, 1796, 0), ('bwa', 0, 1796, 1)]:
+            self.assertRaises(ValueError, _get_depth_options, *args)
+
+    def test_describe_counts(self):
+        from pypgx.api.utils import _describe_counts
+        rng = np.random.default_rng(0)
+        for n in [0, 1, 2, 5, 1000, 4321]:
+            for high in [1, 3, 200]:
+                values = rng.integers(0, high, n)
+                expected = pd.Series(values, dtype=float).describe().to_numpy()
+                result = np.array(_describe_counts(np.bincount(values, minlength=1)), dtype=float)
+                np.testing.assert_array_equal(np.delete(expected, 2), np.delete(result, 2))
+                if n > 1:
+                    np.testing.assert_array_max_ulp(expected[2], result[2], maxulp=2)
+                else:
+                    self.assertTrue(np.isnan(result[2]))
+
+    def test_mask_bed(self):
+        from fuc import pybed
+        from pypgx.api.utils import _mask_bed
+        df = pd.DataFrame({'Chromosome': ['10'] * 30 + ['22'] * 10, 'Position': np.r_[np.arange(1, 31), np.arange(101, 111)], 'A': np.arange(40), 'B': np.arange(40) * 2})
+        cf = pycov.CovFrame(df)
+        with tempfile.TemporaryDirectory() as t:
+            for lines in [['10\t4\t9', '10\t6\t12', '10\t20\t21', '22\t105\t200'], ['10\t0\t100', '22\t0\t200']]:
+                with open(f'{t}/probes.bed', 'w') as f:
+                    f.write('\n'.join(lines) + '\n')
+                expected = cf.mask_bed(f'{t}/probes.bed', opposite=True).df
+                result = _mask_bed(cf, pybed.BedFrame.from_file(f'{t}/probes.bed')).df
+                pd.testing.assert_frame_equal(expected, result)
+                # Unlike CovFrame.mask_bed, the 'chr' prefix is ignored.
+                prefixed = _mask_bed(pycov.CovFrame(df.assign(Chromosome='chr' + df.Chromosome)), pybed.BedFrame.from_file(f'{t}/probes.bed')).df
+                pd.testing.assert_frame_equal(expected, prefixed.assign(Chromosome=df.Chromosome))
+        self.assertEqual(40, result.A.notna().sum())
+        self.assertEqual('int64', str(result.A.dtype))
+
+    def test_read_depth_one(self):
+        from pypgx.api.utils import _read_depth_one
+        with tempfile.TemporaryDirectory() as t:
+            self.write_bam(f'{t}/A.bam', [('10', 10, '5M', 0, 60)], 'A')
+            # samtools depth reports nothing without reads in the region.
+            result = _read_depth_one(f'{t}/A.bam', '22:1-100', False)
+            self.assertTrue(result.empty)
+            self.assertEqual(['Chromosome', 'Position', 'A'], result.columns.to_list())
+            self.assertEqual([1] * 5, _read_depth_one(f'{t}/A.bam', '10:1-100', False).A.to_list())
+            self.assertEqual(100, len(_read_depth_one(f'{t}/A.bam', '22:1-100', True)))
+
 if __name__ == '__main__':
     unittest.main()